@@ -1,13 +1,30 @@
-import plotly.subplots as sp
-import plotly.graph_objects as go
-import pandas as pd
-from signature import Fingerprint
+import time
+from cache import LRUCache
+from signature import Fingerprint, content_hash
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
+
+# plotly, pandas, fetch (requests) and extract are imported where they are used,
+# so the first page render does not wait for them
+
+# Results kept across reruns and sessions: fingerprints and figures keyed by the content
+# hash of their text, and page texts keyed by URL, refetched after PAGE_CACHE_SECONDS
+FINGERPRINT_CACHE_SIZE = 1024
+FIGURE_CACHE_SIZE = 64
+PAGE_CACHE_SIZE = 256
+PAGE_CACHE_SECONDS = 600
+
+
+@st.cache_resource
+def result_caches():
+    # Streamlit reruns this script on every interaction; these caches live in the server process instead
+    return LRUCache(FINGERPRINT_CACHE_SIZE), LRUCache(FIGURE_CACHE_SIZE), LRUCache(PAGE_CACHE_SIZE)
 
 
 def visualize_fingerprint_identity(fingerprint):
+    import plotly.subplots as sp
+    import plotly.graph_objects as go
+    import pandas as pd
+
     # Extract the required data
     character_frequency = fingerprint.CHARACTER_FREQUENCY
     word_frequency = fingerprint.WORD_FREQUENCY
@@ -76,32 +93,90 @@ def visualize_fingerprint_identity(fingerprint):
 
     return fig, df
 
-def get_text_from_url(url):
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Ensure the request was successful
-        soup = BeautifulSoup(response.text, 'html.parser')
-        return soup.get_text()
-    except requests.RequestException as e:
-        st.error(f"Failed to retrieve the URL: {e}")
-        return None
+def html_to_text(html):
+    from extract import html_to_text as extract_text
+    # Page text without scripts, styles and navigation, capped at extract.MAX_CHARS
+    return extract_text(html)
+
+def get_texts_from_urls(urls):
+    # (text, error) for every URL; the ones not cached are fetched at once,
+    # so one slow site does not hold up the others
+    from fetch import fetch_all
+
+    _, _, pages = result_caches()
+    now = time.time()
+    cached = {url: pages.get(url) for url in urls}
+    missing = [url for url, page in cached.items() if page is None or now - page[1] > PAGE_CACHE_SECONDS]
+    results = {url: (page[0], None) for url, page in cached.items() if url not in missing}
+    for url, result in zip(missing, fetch_all(missing)):
+        if result.ok:
+            text = html_to_text(result.text)
+            pages[url] = (text, now)
+            results[url] = (text, None)
+        else:
+            results[url] = (None, result.error)
+    return [results[url] for url in urls]
+
+def cached_fingerprints(texts):
+    # Fingerprint only the texts not seen before, as one batch
+    fingerprints, _, _ = result_caches()
+    keys = [content_hash(text) for text in texts]
+    results = {key: fingerprints.get(key) for key in keys if key in fingerprints}
+    missing = {key: text for key, text in zip(keys, texts) if key not in results}
+    for key, fingerprint in zip(missing, Fingerprint.from_texts(list(missing.values()))):
+        results[key] = fingerprints[key] = fingerprint
+    return keys, [results[key] for key in keys]
+
+def cached_figure(key, fingerprint):
+    _, figures, _ = result_caches()
+    figure = figures.get(key)
+    if figure is None:
+        figure = figures[key] = visualize_fingerprint_identity(fingerprint)
+    return figure
+
+def cached_comparison(keys, fingerprints, labels, comparison, texts):
+    from visualize import render_comparison
+
+    _, figures, _ = result_caches()
+    key = (tuple(keys), tuple(labels), comparison)
+    figure = figures.get(key)
+    if figure is None:
+        figure = figures[key] = render_comparison(fingerprints, labels, comparison, texts)
+    return figure
+
+def snippet_label(index, text, length=24):
+    text = ' '.join(text.split())
+    return f"{index + 1}. {text[:length]}{'…' if len(text) > length else ''}"
 
 def compare_fingerprints(inputs):
-    figures = []
-    data_tables = []
-    for input_type, input_value in inputs:
+    from visualize import COMPARISONS
+
+    pages = iter(get_texts_from_urls([value for input_type, value in inputs if input_type == "URL"]))
+    texts = []
+    labels = []
+    for index, (input_type, input_value) in enumerate(inputs):
         if input_type == "URL":
-            input_value = get_text_from_url(input_value)
-            if input_value is None:
+            input_value, error = next(pages)
+            if error is not None:
+                st.error(f"Failed to retrieve the URL: {error}")
                 continue  # Skip to the next input if URL retrieval failed
-        
-        fingerprint = Fingerprint.from_text(input_value)
-        fig, df = visualize_fingerprint_identity(fingerprint)
-        figures.append(fig)
-        data_tables.append(df)
-    
-    for i, (fig, df) in enumerate(zip(figures, data_tables)):
-        st.write(f'### Text Snippet {i + 1}')
+        texts.append(input_value)
+        labels.append(snippet_label(index, input_value))
+
+    keys, fingerprints = cached_fingerprints(texts)
+
+    # One pairwise matrix for all inputs
+    if len(fingerprints) > 1:
+        comparison = st.selectbox("Compare by", list(COMPARISONS), key="comparison")
+        st.plotly_chart(cached_comparison(keys, fingerprints, labels, COMPARISONS[comparison], texts))
+
+    # Per-input detail only for the input asked for
+    detail = st.selectbox("Show details for", ["None"] + labels, key="detail",
+                          index=1 if len(labels) == 1 else 0)
+    if detail != "None":
+        index = labels.index(detail)
+        fig, df = cached_figure(keys[index], fingerprints[index])
+        st.write(f'### Text Snippet {detail}')
         st.plotly_chart(fig)
         st.write(df)
 
@@ -118,6 +193,10 @@ for i in range(num_inputs):
 
 if st.button('Analyze'):
     if inputs:
-        compare_fingerprints(inputs)
+        # Remembered so that choosing a comparison or a detail view, which reruns the script, keeps the results
+        st.session_state['analyzed_inputs'] = inputs
     else:
-        st.error("Please enter at least one text snippet or URL.")
\ No newline at end of file
+        st.error("Please enter at least one text snippet or URL.")
+
+if st.session_state.get('analyzed_inputs'):
+    compare_fingerprints(st.session_state['analyzed_inputs'])
@@ -0,0 +1,47 @@
+import unittest
+from unittest import mock
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+
+
+class AppCachingTests(unittest.TestCase):
+    def setUp(self):
+        # The result caches live in the process, across AppTest instances
+        st.cache_resource.clear()
+
+    def run_app(self, app, texts):
+        app.number_input[0].set_value(len(texts)).run()
+        for index, text in enumerate(texts):
+            app.text_area(key=f'input_value_{index}').set_value(text)
+        app.button[0].click().run(timeout=60)
+        self.assertFalse(app.exception)
+
+    def test_edit_refingerprints_one_input(self):
+        app = AppTest.from_file('app.py', default_timeout=60)
+        app.run()
+        with mock.patch.object(Fingerprint, 'from_texts', wraps=Fingerprint.from_texts) as from_texts:
+            self.run_app(app, ["The cat sat on the mat.", "Dogs were barking!", "Is it Friday yet?"])
+            self.assertEqual(len(from_texts.call_args[0][0]), 3)
+            self.run_app(app, ["The cat sat on the mat.", "Dogs were barking loudly!", "Is it Friday yet?"])
+            self.assertEqual(from_texts.call_args[0][0], ["Dogs were barking loudly!"])
+        self.assertEqual(len(app.get('plotly_chart')), 1)
+
+    def test_comparison_and_details_on_demand(self):
+        app = AppTest.from_file('app.py', default_timeout=60)
+        app.run()
+        self.run_app(app, ["The cat sat on the mat.", "Dogs were barking!"])
+        self.assertEqual(len(app.get('plotly_chart')), 1)
+        app.selectbox(key='comparison').set_value('Structural deviation (difference)').run()
+        self.assertEqual(len(app.get('plotly_chart')), 1)
+        app.selectbox(key='comparison').set_value('Hashed n-grams (cosine)').run()
+        self.assertFalse(app.exception)
+        self.assertEqual(len(app.get('plotly_chart')), 1)
+        app.selectbox(key='detail').set_value(app.selectbox(key='detail').options[2]).run()
+        self.assertFalse(app.exception)
+        self.assertEqual(len(app.get('plotly_chart')), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from signature import Fingerprint
+
+
+# Texts per task sent to a worker process
+DEFAULT_CHUNKSIZE = 64
+
+# Batches smaller than this are fingerprinted in-process, where a pool would cost more than it saves
+MIN_PARALLEL_TEXTS = 32
+
+
+class BatchStats(NamedTuple):
+    # Throughput of one chunk of texts
+    batch: int
+    documents: int
+    characters: int
+    seconds: float
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.documents / self.seconds if self.seconds else float('inf')
+
+    @property
+    def characters_per_second(self) -> float:
+        return self.characters / self.seconds if self.seconds else float('inf')
+
+
+def fingerprint_chunk(texts: List[str]) -> Tuple[List[Fingerprint], float]:
+    # Runs in a worker process; returns the fingerprints and the time spent on them
+    start = time.perf_counter()
+    fingerprints = [Fingerprint.from_text(text) for text in texts]
+    return fingerprints, time.perf_counter() - start
+
+
+# Workers are started from a clean server process rather than forked from the caller: a caller
+# that has run UMAP/numba holds runtime threads, and forked workers inherit their locks held and
+# never exit. Platforms without a fork server spawn fresh interpreters instead.
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD))
+
+
+def _chunks(texts: Iterable[str], chunksize: int) -> Iterator[List[str]]:
+    texts = iter(texts)
+    while True:
+        chunk = list(islice(texts, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_fingerprints(texts: Iterable[str], workers: Optional[int] = None, chunksize: int = DEFAULT_CHUNKSIZE,
+                      max_pending: Optional[int] = None, min_parallel: int = MIN_PARALLEL_TEXTS,
+                      on_batch: Optional[Callable[[BatchStats], None]] = None) -> Iterator[Fingerprint]:
+    """
+    Fingerprint a stream of texts across a process pool, yielding results in input order.
+
+    Texts are sent to the workers in chunks of chunksize. At most max_pending chunks
+    (default: twice the number of workers) are in flight at once, and the input is only
+    read as results are consumed, so an unbounded stream is fingerprinted in bounded memory.
+    Inputs with fewer than min_parallel texts, or workers=1, run in-process.
+    Workers start without forking the caller, so a script using a pool needs the usual
+    `if __name__ == '__main__':` guard.
+
+    Args:
+        texts (iterable): Texts to fingerprint; may be a generator.
+        workers (int): Number of worker processes (default is the number of CPUs).
+        chunksize (int): Number of texts per task.
+        max_pending (int): Largest number of chunks submitted but not yet consumed.
+        min_parallel (int): Smallest number of texts worth starting a pool for.
+        on_batch (callable): Called with a BatchStats for every finished chunk.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    texts = iter(texts)
+
+    # Look ahead far enough to know whether a pool is worth starting
+    head = list(islice(texts, min_parallel))
+    if workers <= 1 or len(head) < min_parallel:
+        for batch, chunk in enumerate(_chunks(chain(head, texts), chunksize)):
+            fingerprints, seconds = fingerprint_chunk(chunk)
+            if on_batch:
+                on_batch(BatchStats(batch, len(chunk), sum(map(len, chunk)), seconds))
+            yield from fingerprints
+        return
+
+    executor = process_pool(workers)
+    pending = deque()
+    try:
+        for batch, chunk in enumerate(_chunks(chain(head, texts), chunksize)):
+            pending.append((batch, len(chunk), sum(map(len, chunk)), executor.submit(fingerprint_chunk, chunk)))
+            if len(pending) >= max_pending:
+                yield from _collect(pending.popleft(), on_batch)
+        while pending:
+            yield from _collect(pending.popleft(), on_batch)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _collect(task, on_batch) -> List[Fingerprint]:
+    batch, documents, characters, future = task
+    fingerprints, seconds = future.result()
+    if on_batch:
+        on_batch(BatchStats(batch, documents, characters, seconds))
+    return fingerprints
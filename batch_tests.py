@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+from batch import iter_fingerprints
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+
+
+class BatchTests(unittest.TestCase):
+    def setUp(self):
+        self.texts = [f"Post number {i}: teh cats are runnning, {'dogs ' * (i % 3)}were barking!" for i in range(20)]
+
+    def test_parallel_results_are_ordered(self):
+        batches = []
+        fingerprints = Fingerprint.from_texts(self.texts, workers=2, chunksize=3, min_parallel=4, on_batch=batches.append)
+
+        self.assertEqual(fingerprints, [Fingerprint.from_text(text) for text in self.texts])
+        self.assertEqual(sorted(stats.batch for stats in batches), list(range(7)))
+        self.assertEqual(sum(stats.documents for stats in batches), 20)
+        self.assertTrue(all(stats.documents_per_second > 0 for stats in batches))
+
+    def test_small_batches_run_in_process(self):
+        with mock.patch('batch.ProcessPoolExecutor') as executor:
+            fingerprints = Fingerprint.from_texts(self.texts[:3], workers=4)
+
+        executor.assert_not_called()
+        self.assertEqual(fingerprints, [Fingerprint.from_text(text) for text in self.texts[:3]])
+
+    def test_streaming_input_is_read_lazily(self):
+        consumed = []
+
+        def stream():
+            for text in self.texts:
+                consumed.append(text)
+                yield text
+
+        results = iter_fingerprints(stream(), workers=2, chunksize=2, max_pending=2, min_parallel=2)
+        next(results)
+        # Only the submitted chunks have been read, not the whole stream
+        self.assertLessEqual(len(consumed), 2 * 2 + 2)
+        self.assertEqual(len(list(results)), 19)
+
+    def test_pool_exits_after_umap_has_run(self):
+        # Forked workers inherit numba's threads mid-lock; the process then hangs at exit
+        script = ("import numpy, umap\n"
+                  "from batch import iter_fingerprints\n"
+                  "umap.UMAP(n_neighbors=5).fit(numpy.random.default_rng(0).random((60, 8)))\n"
+                  "texts = [f'post {i} about cats' for i in range(8)]\n"
+                  "print(len(list(iter_fingerprints(texts, workers=2, chunksize=2, min_parallel=2))))\n")
+        result = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, timeout=300)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '8')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Measure ChangePointDetector throughput and accuracy on a synthetic stream of many authors,
+with injected author switches: from a random point on, an account posts with another
+author's identity features.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_changepoint [--authors 5000] [--events 1000000]
+"""
+import argparse
+import random
+import time
+from changepoint import ChangePointDetector
+
+
+def make_profiles(authors: int, rng: random.Random):
+    # Per-author mean and spread of (character_delta, word_delta, structural_deviation)
+    profiles = []
+    for _ in range(authors):
+        means = (rng.uniform(0.01, 0.2), rng.uniform(0.05, 1.0), rng.uniform(0.001, 0.1))
+        profiles.append((means, tuple(mean * rng.uniform(0.05, 0.15) for mean in means)))
+    return profiles
+
+
+def make_stream(authors: int, events: int, switch_rate: float, seed: int = 0):
+    """
+    Returns the events as (author, values) pairs, and the event index from which each
+    switched author posts as someone else.
+    """
+    rng = random.Random(seed)
+    profiles = make_profiles(authors, rng)
+    posts_per_author = events // authors
+    switches = {}
+    for author in rng.sample(range(authors), int(authors * switch_rate)):
+        switches[author] = (rng.randrange(posts_per_author // 4, 3 * posts_per_author // 4), rng.randrange(authors))
+
+    stream, posted, switched_at = [], [0] * authors, {}
+    for index in range(events):
+        author = index % authors
+        profile = profiles[author]
+        if author in switches and posted[author] >= switches[author][0]:
+            profile = profiles[switches[author][1]]
+            switched_at.setdefault(author, posted[author] + 1)
+        means, spreads = profile
+        stream.append((author, tuple(rng.gauss(mean, spread) for mean, spread in zip(means, spreads))))
+        posted[author] += 1
+    return stream, switched_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--authors', type=int, default=5000)
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--switch-rate', type=float, default=0.2, help="Share of authors whose account switches hands")
+    parser.add_argument('--max-delay', type=int, default=20, help="Observations within which a detection counts")
+    args = parser.parse_args()
+
+    stream, switched_at = make_stream(args.authors, args.events, args.switch_rate)
+    detector = ChangePointDetector()
+    alarms = []
+    start = time.perf_counter()
+    for author, values in stream:
+        alarm = detector.observe_values(author, values)
+        if alarm is not None:
+            alarms.append(alarm)
+    seconds = time.perf_counter() - start
+
+    detected, delays, false_alarms = set(), [], 0
+    for alarm in alarms:
+        switch = switched_at.get(alarm.author)
+        if switch is not None and switch <= alarm.observation < switch + args.max_delay and alarm.author not in detected:
+            detected.add(alarm.author)
+            delays.append(alarm.observation - switch)
+        elif switch is None or alarm.observation < switch:
+            false_alarms += 1
+
+    print(f"{args.events} events from {args.authors} authors in {seconds:.2f}s: {args.events / seconds:,.0f} events/s")
+    print(f"switches detected within {args.max_delay} posts: {len(detected)}/{len(switched_at)}"
+          f" (mean delay {sum(delays) / max(len(delays), 1):.1f} posts)")
+    print(f"false alarms: {false_alarms} ({1000 * false_alarms / args.events:.3f} per 1000 events)")
+
+
+if __name__ == '__main__':
+    main()
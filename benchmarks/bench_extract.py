@@ -0,0 +1,77 @@
+"""
+Measure HTML-to-text extraction speed, peak memory and output size: BeautifulSoup's
+get_text() against extract.html_to_text.
+
+By default it runs on generated pages shaped like news articles (scripts, styles,
+navigation and comments around the article). Saved pages can be passed instead.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_extract [page.html ...]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from extract import html_to_text
+
+WORDS = "the a council voted tonight to approve new transit budget city residents said plan would cost".split()
+
+
+def make_page(paragraphs: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+
+    def sentence():
+        return ' '.join(rng.choices(WORDS, k=rng.randint(8, 20))).capitalize() + '.'
+
+    script = '<script>window.__STATE__ = ' + '{"k": [1, 2, 3]}, ' * 2000 + '{};</script>'
+    style = '<style>' + '.c{color:#333;margin:0 auto} ' * 2000 + '</style>'
+    nav = '<nav><ul>' + ''.join(f'<li><a href="/s/{index}">Section {index}</a></li>' for index in range(200)) + '</ul></nav>'
+    article = ''.join(f'<p>{sentence()} <b>{sentence()}</b> {sentence()}</p>\n' for _ in range(paragraphs))
+    comments = '<aside>' + ''.join(f'<div class="comment">{sentence()}</div>' for _ in range(paragraphs)) + '</aside>'
+    return (f'<!DOCTYPE html><html><head><title>News</title>{style}{script}</head><body>{nav}<main><article>'
+            f'<h1>Council approves budget</h1>{article}</article></main>{comments}{script}<footer>(c) News</footer>'
+            f'</body></html>')
+
+
+def beautifulsoup_text(html: str) -> str:
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, 'html.parser').get_text()
+
+
+def measure(function, html: str, repeat: int = 3):
+    # Best time of a few runs, then the peak memory of one more run under tracemalloc, which slows it down
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = function(html)
+        seconds = min(seconds, time.perf_counter() - start)
+    tracemalloc.start()
+    function(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return text, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help="Saved HTML files (default: generated pages)")
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = []
+        for path in args.pages:
+            with open(path, 'r', encoding='utf-8', errors='replace') as page_file:
+                pages.append((path, page_file.read()))
+    else:
+        pages = [(f'generated, {paragraphs} paragraphs', make_page(paragraphs)) for paragraphs in (20, 200, 2000)]
+
+    for name, html in pages:
+        print(f"{name}: {len(html) / 1e6:.2f} MB of HTML")
+        for label, function in (('BeautifulSoup', beautifulsoup_text), ('html_to_text', html_to_text)):
+            text, seconds, peak = measure(function, html)
+            print(f"  {label:>13}: {seconds * 1000:8.1f} ms  peak {peak / 1e6:7.1f} MB  {len(text):9,} chars of text")
+
+
+if __name__ == '__main__':
+    main()
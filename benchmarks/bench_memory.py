@@ -0,0 +1,71 @@
+"""
+Measure resident bytes per fingerprint for Fingerprint and CompactFingerprint.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_memory [--posts 2000] [--words 20]
+"""
+import argparse
+import random
+import sys
+import numpy as np
+from compact import CompactFingerprint, Vocabulary
+from signature import Fingerprint
+from spelling import get_corrector
+
+PUNCTUATION = ['', '', '', ',', '.', '!', '?', '...']
+
+
+def make_posts(vocabulary, posts: int, words: int, seed: int = 0):
+    # Short social-media-like posts drawn from a Zipf-like word distribution
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return [' '.join(word + rng.choice(PUNCTUATION) for word in rng.choices(vocabulary, weights, k=words)).capitalize()
+            for _ in range(posts)]
+
+
+def deep_size(obj, seen=None) -> int:
+    # Bytes held by an object and everything it references, each object counted once
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif isinstance(obj, np.ndarray) and obj.base is not None:
+        size += obj.nbytes
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=20)
+    args = parser.parse_args()
+
+    words = [word for word in get_corrector('symspell').words if len(word) > 2][:5000]
+    texts = make_posts(words, args.posts, args.words)
+    fingerprints = Fingerprint.from_texts(texts)
+
+    # Each dict Fingerprint owns its keys, so it is measured on its own
+    dict_bytes = sum(deep_size(fingerprint) for fingerprint in fingerprints)
+
+    vocabulary = Vocabulary()
+    compact = [CompactFingerprint.from_fingerprint(fingerprint, vocabulary) for fingerprint in fingerprints]
+    array_bytes = sum(fingerprint.nbytes for fingerprint in compact)
+    vocabulary_bytes = deep_size(vocabulary.words) + deep_size(vocabulary.ids, {id(word) for word in vocabulary.words})
+    compact_bytes = sum(sys.getsizeof(fingerprint) + sys.getsizeof(fingerprint.buffer) for fingerprint in compact)
+
+    print(f'{args.posts} posts of {args.words} words, {len(vocabulary)} interned words')
+    print(f'       Fingerprint: {dict_bytes / args.posts:8.0f} bytes per fingerprint')
+    print(f'CompactFingerprint: {(compact_bytes + vocabulary_bytes) / args.posts:8.0f} bytes per fingerprint, '
+          f'shared vocabulary included ({array_bytes / args.posts:.0f} bytes of array data, '
+          f'{vocabulary_bytes / args.posts:.0f} bytes of vocabulary)')
+    print(f'reduction: {dict_bytes / (compact_bytes + vocabulary_bytes):.1f}x')
+
+
+if __name__ == '__main__':
+    main()
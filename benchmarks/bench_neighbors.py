@@ -0,0 +1,98 @@
+"""
+Measure recall and latency of AuthorIndex's LSH search against an exact scan of every
+author, on synthetic authors.
+
+Each author draws words from their own skewed share of a common vocabulary, with their
+own punctuation and capitalization habits. The index holds one fingerprint per author;
+queries are fresh posts by randomly chosen authors. Recall@k is the share of the exact
+top k that LSH returns.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_neighbors [--authors 100000] [--queries 500] [--k 10]
+"""
+import argparse
+import random
+import time
+from collections import Counter
+import numpy as np
+from neighbors import AuthorIndex
+from signature import FeatureTables, Fingerprint, STOPWORDS
+
+_letters = random.Random(1)
+VOCABULARY = STOPWORDS * 20 + [''.join(_letters.choices('abcdefghijklmnopqrstuvwxyz', k=_letters.randint(2, 9)))
+                               for _ in range(5000)]
+PUNCTUATION = ['.', ',', '!', '?', '...', '!!', ':)', ' lol']
+
+
+class Author:
+    def __init__(self, rng: random.Random):
+        self.words = rng.sample(VOCABULARY, 400)
+        self.weights = [1 / (rank + 1) for rank in range(len(self.words))]
+        self.punctuation = rng.choices(PUNCTUATION, k=3)
+        self.punctuation_rate = rng.uniform(0.02, 0.3)
+        self.capital_rate = rng.uniform(0.0, 0.3)
+
+    def fingerprint(self, rng: random.Random, length: int) -> Fingerprint:
+        # Raw words carry the author's habits; the normalized text drops them, as normalize_text would
+        normalized = rng.choices(self.words, self.weights, k=length)
+        raw = []
+        for word in normalized:
+            if rng.random() < self.capital_rate:
+                word = word.capitalize()
+            if rng.random() < self.punctuation_rate:
+                word += rng.choice(self.punctuation)
+            raw.append(word)
+        return Fingerprint.from_tables(FeatureTables.from_counts(Counter(' '.join(raw)), Counter(raw)),
+                                       FeatureTables.from_counts(Counter(' '.join(normalized)), Counter(normalized)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--authors', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--words', type=int, default=200, help="Words per post")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = AuthorIndex()
+    start = time.perf_counter()
+    authors = [Author(rng) for _ in range(args.authors)]
+    batch = 10_000
+    for first in range(0, args.authors, batch):
+        names = [f'author{number}' for number in range(first, min(first + batch, args.authors))]
+        index.add_many(names, [authors[number].fingerprint(rng, args.words) for number in range(first, first + len(names))])
+    print(f"Indexed {len(index):,} authors ({index.dims} dimensions) in {time.perf_counter() - start:.1f} s")
+
+    queries = [rng.randrange(args.authors) for _ in range(args.queries)]
+    vectors = [index.vector(authors[author].fingerprint(rng, args.words)) for author in queries]
+
+    def run(**options):
+        results, seconds = [], []
+        index.query_vector(vectors[0], args.k, **options)
+        for vector in vectors:
+            start = time.perf_counter()
+            results.append(index.query_vector(vector, args.k, **options))
+            seconds.append(time.perf_counter() - start)
+        return results, np.array(seconds) * 1000
+
+    exact, exact_ms = run(exact=True)
+    print(f"{'search':>28}  {'recall@' + str(args.k):>9}  {'author found':>12}  {'mean ms':>8}  {'p99 ms':>7}")
+
+    def report(label, results, milliseconds):
+        recall = np.mean([len({neighbor.author for neighbor in found} & {neighbor.author for neighbor in truth}) / args.k
+                          for found, truth in zip(results, exact)])
+        found = np.mean([f'author{author}' in {neighbor.author for neighbor in result}
+                         for author, result in zip(queries, results)])
+        print(f"{label:>28}  {recall:9.3f}  {found:12.3f}  {milliseconds.mean():8.2f}  {np.percentile(milliseconds, 99):7.2f}")
+
+    report('exact scan', exact, exact_ms)
+    for probes in (0, 4, 8):
+        for candidates in (500, 2000, 5000):
+            report(f'LSH, {probes} probes, {candidates} compared', *run(probes=probes, max_candidates=candidates))
+
+
+if __name__ == '__main__':
+    main()
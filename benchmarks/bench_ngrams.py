@@ -0,0 +1,87 @@
+"""
+Measure extraction speed and memory of hashed n-gram vectors against dict tables: the
+character and word tables of extract_features, and the same n-grams as hashed_ngrams
+counted into dicts. Memory is the traced peak while extracting a corpus and keeping every
+result. Columns is the width of the matrix stacking the corpus: the union of every key
+for dicts, fixed for hashed vectors.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ngrams [--posts 5000] [--words 30]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from collections import Counter
+from benchmarks.bench_memory import make_posts
+from ngrams import CHARACTER_ORDERS, WORD_ORDERS, hashed_ngrams, ngram_matrix
+from signature import extract_features
+
+
+def dict_tables(texts):
+    return [extract_features(text) for text in texts]
+
+
+def dict_ngrams(texts):
+    # Relative frequencies of the n-grams hashed_ngrams hashes, one dict per order
+    results = []
+    for text in texts:
+        words = text.split()
+        tables = []
+        for orders, symbols in ((CHARACTER_ORDERS, text), (WORD_ORDERS, words)):
+            for order in orders:
+                counts = Counter(tuple(symbols[start:start + order]) for start in range(len(symbols) - order + 1))
+                total = sum(counts.values())
+                tables.append({gram: count / total for gram, count in counts.items()})
+        results.append(tables)
+    return results
+
+
+def hashed_one_by_one(texts):
+    return [hashed_ngrams(text) for text in texts]
+
+
+def columns(results) -> int:
+    # Hashed vectors have a fixed width; stacking dict tables takes a column per key seen in each table
+    if hasattr(results, 'shape'):
+        return results.shape[1]
+    if hasattr(results[0], 'shape'):
+        return len(results[0])
+    keys = [set() for _ in results[0]]
+    for tables in results:
+        for seen, table in zip(keys, tables):
+            seen.update(table)
+    return sum(len(seen) for seen in keys)
+
+
+def measure(function, texts):
+    start = time.perf_counter()
+    function(texts)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    results = function(texts)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--words', type=int, default=30)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(2, 9))) for _ in range(20000)]
+    texts = make_posts(vocabulary, args.posts, args.words)
+    print(f"{args.posts:,} posts of {args.words} words")
+    print(f"{'features':>30}  {'us/post':>8}  {'peak MB':>8}  {'columns':>9}")
+    for label, function in (('dict tables (extract_features)', dict_tables), ('dict n-grams', dict_ngrams),
+                            ('hashed_ngrams, one by one', hashed_one_by_one), ('ngram_matrix', ngram_matrix)):
+        results, seconds, peak = measure(function, texts)
+        print(f"{label:>30}  {seconds / len(texts) * 1e6:8.1f}  {peak / 1e6:8.1f}  {columns(results):9,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Compare normalize_text with the TextBlob and SymSpell spelling backends.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_spelling [--documents 20] [--words 60]
+"""
+import argparse
+import random
+import time
+from signature import normalize_text
+from cache import WordCache
+from spelling import SymSpellCorrector, TextBlobCorrector
+
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    # Apply one random delete, insert, replace or transpose
+    i = rng.randrange(len(word))
+    operation = rng.randrange(4)
+    if operation == 0 and len(word) > 1:
+        return word[:i] + word[i + 1:]
+    if operation == 1:
+        return word[:i] + rng.choice(ALPHABET) + word[i:]
+    if operation == 2:
+        return word[:i] + rng.choice(ALPHABET) + word[i + 1:]
+    if i + 1 < len(word):
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word
+
+
+def make_token(vocabulary, rng: random.Random) -> str:
+    # Mostly dictionary words, with one- and two-edit typos and out-of-vocabulary
+    # tokens (names, handles, slang) that TextBlob searches two edits deep for
+    roll = rng.random()
+    if roll < 0.05:
+        return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(6, 10)))
+    word = rng.choice(vocabulary)
+    if roll < 0.10:
+        return misspell(misspell(word, rng), rng)
+    if roll < 0.25:
+        return misspell(word, rng)
+    return word
+
+
+def make_corpus(vocabulary, documents: int, words: int, seed: int = 0):
+    # A fixed corpus: the same seed always produces the same documents
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(documents):
+        tokens = [make_token(vocabulary, rng) for _ in range(words)]
+        corpus.append(' '.join(tokens).capitalize() + '.')
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documents', type=int, default=20)
+    parser.add_argument('--words', type=int, default=60)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    symspell = SymSpellCorrector.from_frequency_list()
+    print(f'symspell index loaded in {time.perf_counter() - start:.3f}s')
+
+    vocabulary = [word for word in symspell.words if len(word) > 3][:5000]
+    corpus = make_corpus(vocabulary, args.documents, args.words)
+
+    timings = {}
+    outputs = {}
+    for corrector in (TextBlobCorrector(), symspell):
+        # A fresh in-memory word cache, so earlier runs do not skew the timings
+        cache = WordCache(None)
+        start = time.perf_counter()
+        outputs[corrector.name] = [normalize_text(document, corrector, cache) for document in corpus]
+        timings[corrector.name] = time.perf_counter() - start
+        print(f'{corrector.name:>9}: {timings[corrector.name]:.3f}s '
+              f'({timings[corrector.name] / len(corpus) * 1000:.1f} ms/document)')
+
+    mismatches = sum(a != b for a, b in zip(outputs['textblob'], outputs['symspell']))
+    print(f'speedup: {timings["textblob"] / timings["symspell"]:.0f}x, '
+          f'mismatched documents: {mismatches}/{len(corpus)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure CSV ingestion throughput on a generated interaction export: the Doc-per-row loop of
+import_csv_to_docarray against iter_csv_batches with each parser.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_timeline [--rows 2000000]
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from timeline import COLUMNS, Doc, iter_csv_batches
+
+TYPES = ['retweet', 'reply', 'mention', 'quote']
+
+
+def write_export(path: str, rows: int, accounts: int = 50_000, seed: int = 0):
+    rng = random.Random(seed)
+    names = [f'user_{index}' for index in range(accounts)]
+    with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(COLUMNS)
+        for index in range(rows):
+            writer.writerow((index, rng.choice(names), rng.choice(names), 1_500_000_000_000_000_000 + index,
+                             rng.choice(TYPES)))
+
+
+def docs_per_row(path: str) -> int:
+    # The loop of import_csv_to_docarray, minus the DocArray itself
+    docs = []
+    with open(path, 'r', encoding='utf-8') as csv_file:
+        for row in csv.DictReader(csv_file):
+            doc = Doc()
+            doc.id = row['id']
+            doc.source = row['source']
+            doc.target = row['target']
+            doc.tweet_id = row['tweet_id']
+            doc.type = row['type']
+            docs.append(doc)
+    return len(docs)
+
+
+def batches(path: str, parser: str) -> int:
+    return sum(batch.num_rows for batch in iter_csv_batches(path, parser=parser))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'export.csv')
+        write_export(path, args.rows)
+        megabytes = os.path.getsize(path) / 1e6
+        runs = [('Doc per row', lambda: docs_per_row(path)), ('batches, csv', lambda: batches(path, 'csv'))]
+        try:
+            import pyarrow  # noqa: F401
+            runs.append(('batches, pyarrow', lambda: batches(path, 'pyarrow')))
+        except ImportError:
+            print("pyarrow is not installed; skipping its parser")
+
+        print(f"{args.rows} rows, {megabytes:.0f} MB")
+        for name, run in runs:
+            start = time.perf_counter()
+            rows = run()
+            seconds = time.perf_counter() - start
+            assert rows == args.rows
+            print(f"{name:>18}: {seconds:6.2f}s  {rows / seconds:12,.0f} rows/s  {megabytes / seconds:6.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
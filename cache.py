@@ -0,0 +1,234 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+import os
+import sqlite3
+import threading
+import time
+
+
+# Largest number of words kept in the on-disk table
+DISK_CACHE_SIZE = 500_000
+
+# Number of words kept in front of the table in each process
+MEMORY_CACHE_SIZE = 50_000
+
+# SQLite limits the number of parameters in a single statement
+_BATCH_SIZE = 500
+
+
+def default_cache_dir() -> str:
+    return os.environ.get('DIDIT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'didit'))
+
+
+class LRUCache:
+    """
+    A bounded mapping that evicts the least recently used entry when full.
+
+    Safe to share between threads, e.g. Streamlit sessions: every lookup reorders the
+    entries, so each access holds a lock.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def default_word_cache_path() -> Optional[str]:
+    # DIDIT_WORD_CACHE=memory keeps the cache in-process only
+    path = os.environ.get('DIDIT_WORD_CACHE', os.path.join(default_cache_dir(), 'words.sqlite'))
+    return None if path == 'memory' else path
+
+
+class WordCache:
+    """
+    A word → normalized-word cache shared by every process that opens the same file.
+
+    Lookups go through an in-process LRU first and a SQLite table second, so worker
+    pools and repeated batch jobs reuse each other's corrections and singular forms.
+    Entries are grouped by kind (e.g. 'correct:textblob' or 'singularize') so results
+    of different steps never mix. When the table outgrows max_entries, the least
+    recently used rows are evicted.
+
+    Args:
+        path (str): SQLite file to share, or None to keep the cache in memory only.
+        max_entries (int): Largest number of rows kept in the SQLite table.
+        memory_entries (int): Largest number of words kept in the in-process LRU.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = DISK_CACHE_SIZE,
+                 memory_entries: int = MEMORY_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory = LRUCache(memory_entries)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        # SQLite connections must not be shared across a fork or between threads (e.g. Streamlit
+        # sessions), so each process and thread opens its own
+        if getattr(self._local, 'connection', None) is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS words ('
+                               'kind TEXT NOT NULL, word TEXT NOT NULL, value TEXT NOT NULL, '
+                               'used REAL NOT NULL, PRIMARY KEY (kind, word))')
+            connection.execute('CREATE INDEX IF NOT EXISTS words_used ON words (used)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def get_many(self, kind: str, words: Iterable[str]) -> Dict[str, str]:
+        # Return the cached value of every word that has one
+        found = {}
+        remaining = []
+        for word in words:
+            value = self.memory.get((kind, word))
+            if value is None:
+                remaining.append(word)
+            else:
+                found[word] = value
+        self.hits += len(found)
+        from_disk = {}
+
+        connection = self._connect()
+        if connection is not None and remaining:
+            try:
+                for start in range(0, len(remaining), _BATCH_SIZE):
+                    batch = remaining[start:start + _BATCH_SIZE]
+                    rows = connection.execute(
+                        f'SELECT word, value FROM words WHERE kind = ? AND word IN ({",".join("?" * len(batch))})',
+                        [kind, *batch]
+                    ).fetchall()
+                    from_disk.update(rows)
+                if from_disk:
+                    # Mark the rows as recently used so eviction keeps them
+                    now = time.time()
+                    connection.executemany('UPDATE words SET used = ? WHERE kind = ? AND word = ?',
+                                           [(now, kind, word) for word in from_disk])
+            except sqlite3.OperationalError:
+                # A locked or busy database is treated as a miss
+                pass
+            for word, value in from_disk.items():
+                self.memory[(kind, word)] = value
+            found.update(from_disk)
+            self.disk_hits += len(from_disk)
+
+        self.misses += len(remaining) - len(from_disk)
+        return found
+
+    def put_many(self, kind: str, values: Dict[str, str]):
+        for word, value in values.items():
+            self.memory[(kind, word)] = value
+
+        connection = self._connect()
+        if connection is None or not values:
+            return
+        now = time.time()
+        try:
+            connection.execute('BEGIN')
+            connection.executemany('INSERT OR REPLACE INTO words (kind, word, value, used) VALUES (?, ?, ?, ?)',
+                                   [(kind, word, value, now) for word, value in values.items()])
+            connection.execute('COMMIT')
+        except sqlite3.OperationalError:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            return
+
+        self._writes += len(values)
+        if self._writes >= max(1, self.max_entries // 10):
+            self._writes = 0
+            self.evict()
+
+    def evict(self):
+        # Drop the least recently used rows until the table fits in max_entries
+        connection = self._connect()
+        if connection is None:
+            return
+        try:
+            (size,) = connection.execute('SELECT COUNT(*) FROM words').fetchone()
+            if size > self.max_entries:
+                connection.execute('DELETE FROM words WHERE rowid IN '
+                                   '(SELECT rowid FROM words ORDER BY used LIMIT ?)', (size - self.max_entries,))
+        except sqlite3.OperationalError:
+            pass
+
+    def lookup(self, kind: str, words: Iterable[str], compute: Callable[[List[str]], List[str]]) -> Dict[str, str]:
+        """
+        Return the value of every distinct word, computing only the ones not cached yet.
+
+        compute receives the list of missing words and returns their values in the same order.
+        """
+        words = set(words)
+        values = self.get_many(kind, words)
+        missing = [word for word in words if word not in values]
+        if missing:
+            computed = dict(zip(missing, compute(missing)))
+            self.put_many(kind, computed)
+            values.update(computed)
+        return values
+
+    def stats(self) -> Dict[str, float]:
+        # Counters for sizing the cache: hits are found in memory and disk_hits in SQLite; hit_rate counts both
+        lookups = self.hits + self.disk_hits + self.misses
+        stats = {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            'memory_entries': len(self.memory),
+        }
+        connection = self._connect()
+        if connection is not None:
+            stats['disk_entries'] = connection.execute('SELECT COUNT(*) FROM words').fetchone()[0]
+        return stats
+
+    def clear(self):
+        self.memory.clear()
+        connection = self._connect()
+        if connection is not None:
+            connection.execute('DELETE FROM words')
+        self.hits = self.disk_hits = self.misses = 0
+
+
+_word_cache = None
+
+
+def get_word_cache() -> WordCache:
+    """Return the process-wide cache used by normalize_text."""
+    global _word_cache
+    if _word_cache is None:
+        _word_cache = WordCache(default_word_cache_path())
+    return _word_cache
@@ -0,0 +1,132 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+from collections import OrderedDict
+from unittest import mock
+from cache import LRUCache, WordCache
+from signature import normalize_text
+from testing import setUpModule  # noqa: F401
+
+
+def _populate(path):
+    WordCache(path).put_many('correct:test', {'teh': 'the', 'speling': 'spelling'})
+
+
+class WordCacheTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'words.sqlite')
+        # Anything reaching for the default caches stays in memory or in the scratch directory
+        for patcher in (mock.patch.dict(os.environ, {'DIDIT_CACHE_DIR': directory.name, 'DIDIT_WORD_CACHE': 'memory'}),
+                        mock.patch('cache._word_cache', None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_counts_hits_and_misses(self):
+        cache = WordCache(self.path)
+        cache.lookup('singularize', ['cats', 'dogs'], lambda words: [word[:-1] for word in words])
+        values = cache.lookup('singularize', ['cats', 'dogs', 'cows'], lambda words: [word[:-1] for word in words])
+
+        self.assertEqual(values, {'cats': 'cat', 'dogs': 'dog', 'cows': 'cow'})
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['disk_hits'], stats['misses']), (2, 0, 3))
+        self.assertEqual(stats['disk_entries'], 3)
+
+    def test_persists_across_instances(self):
+        WordCache(self.path).put_many('singularize', {'cats': 'cat'})
+        cache = WordCache(self.path)
+
+        self.assertEqual(cache.get_many('singularize', ['cats']), {'cats': 'cat'})
+        self.assertEqual(cache.disk_hits, 1)
+        self.assertEqual(cache.get_many('correct:symspell', ['cats']), {})
+
+    def test_shared_across_processes(self):
+        worker = multiprocessing.get_context('spawn').Process(target=_populate, args=(self.path,))
+        worker.start()
+        worker.join()
+
+        cache = WordCache(self.path)
+        self.assertEqual(cache.get_many('correct:test', ['teh', 'speling']), {'teh': 'the', 'speling': 'spelling'})
+
+    def test_shared_across_threads(self):
+        cache = WordCache(self.path, memory_entries=0)
+        cache.put_many('singularize', {'cats': 'cat'})
+        results = []
+        thread = threading.Thread(target=lambda: results.append(cache.get_many('singularize', ['cats'])))
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [{'cats': 'cat'}])
+
+    def test_evicts_least_recently_used(self):
+        cache = WordCache(self.path, max_entries=2)
+        cache.put_many('singularize', {'cats': 'cat'})
+        cache.put_many('singularize', {'dogs': 'dog'})
+        cache.put_many('singularize', {'cows': 'cow'})
+        cache.evict()
+
+        self.assertEqual(cache.stats()['disk_entries'], 2)
+        self.assertEqual(WordCache(self.path).get_many('singularize', ['cats', 'dogs', 'cows']),
+                         {'dogs': 'dog', 'cows': 'cow'})
+
+    def test_memory_only(self):
+        cache = WordCache(None)
+        cache.put_many('singularize', {'cats': 'cat'})
+        self.assertEqual(cache.get_many('singularize', ['cats']), {'cats': 'cat'})
+        self.assertNotIn('disk_entries', cache.stats())
+
+    def test_normalize_text_reuses_words(self):
+        cache = WordCache(self.path)
+        normalized = normalize_text("Teh cats are runnning", cache=cache)
+        misses = cache.misses
+
+        self.assertEqual(normalize_text("Teh cats are runnning", cache=cache), normalized)
+        self.assertEqual(cache.misses, misses)
+
+
+class LRUCacheTests(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache.get('a')
+        cache['c'] = 3
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_shared_across_threads(self):
+        class YieldingEntries(OrderedDict):
+            # Gives other threads a turn between looking an entry up and reordering it
+            def move_to_end(self, key, last=True):
+                time.sleep(0)
+                super().move_to_end(key, last)
+
+        cache = LRUCache(maxsize=4)
+        cache._entries = YieldingEntries()
+        errors = []
+
+        def work(offset):
+            try:
+                for index in range(2000):
+                    key = (offset + index) % 8
+                    if cache.get(key) is None:
+                        cache[key] = index
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=work, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(cache), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import math
+from typing import Dict, Hashable, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+
+# The identity vector reduced to one number per part, in this order
+FEATURES = ('character_delta', 'word_delta', 'structural_deviation')
+
+
+def identity_features(fingerprint) -> Tuple[float, float, float]:
+    """
+    Reduce a fingerprint's identity vector to (sum of character_delta, sum of word_delta,
+    structural_deviation). Works on Fingerprint, CompactFingerprint and IncrementalFingerprint.
+    """
+    character_delta, word_delta, structural_deviation = fingerprint.identity_vector
+    return (float(sum(character_delta.values())), float(sum(word_delta.values())), float(structural_deviation))
+
+
+class ChangePoint(NamedTuple):
+    # An alarm: the author's identity features shifted at this observation
+    author: Hashable
+    observation: int
+    timestamp: object
+    feature: str
+    statistic: float
+
+
+class AuthorState:
+    """
+    Detector state of one author, a fixed handful of floats per feature.
+
+    Keeps the running mean and variance of each feature since the author's last
+    change point (Welford's method) and a two-sided CUSUM of the standardized
+    residuals against them.
+    """
+
+    __slots__ = ('observations', 'count', 'means', 'squares', 'upper', 'lower')
+
+    def __init__(self, features: int):
+        self.observations = 0
+        self.count = 0
+        self.means = [0.0] * features
+        self.squares = [0.0] * features
+        self.upper = [0.0] * features
+        self.lower = [0.0] * features
+
+    def restart(self):
+        # Start a new regime with no history
+        features = len(self.means)
+        self.count = 0
+        self.means = [0.0] * features
+        self.squares = [0.0] * features
+        self.upper = [0.0] * features
+        self.lower = [0.0] * features
+
+
+class ChangePointDetector:
+    """
+    Online change-point detection over many authors' fingerprint streams.
+
+    Every observation is standardized against the mean and standard deviation of the
+    author's observations since their last change point, and fed to a two-sided CUSUM
+    (the Page-Hinkley test in its tabular form): upper = max(0, upper + z - drift) and
+    lower = max(0, lower - z - drift). A change point is reported when either exceeds
+    threshold on any feature, after which the author's statistics start over. Each
+    observation costs O(1) time, and each author O(1) memory, whatever the length of
+    their history.
+
+    Args:
+        threshold (float): CUSUM level, in standard deviations, that raises an alarm.
+        drift (float): Shift per observation, in standard deviations, that is tolerated.
+        warmup (int): Observations in a regime before alarms can be raised.
+        min_std (float): Floor on the standard deviation, for features that barely vary.
+    """
+
+    def __init__(self, threshold: float = 8.0, drift: float = 1.0, warmup: int = 10, min_std: float = 1e-3,
+                 features: Sequence[str] = FEATURES):
+        # A standard deviation needs two observations
+        if warmup < 2:
+            raise ValueError(f"warmup must be at least 2, got {warmup}")
+        self.threshold = threshold
+        self.drift = drift
+        self.warmup = warmup
+        self.min_std = min_std
+        self.features = tuple(features)
+        self.authors: Dict[Hashable, AuthorState] = {}
+
+    def __len__(self) -> int:
+        return len(self.authors)
+
+    def observe(self, author: Hashable, fingerprint, timestamp=None) -> Optional[ChangePoint]:
+        return self.observe_values(author, identity_features(fingerprint), timestamp)
+
+    def observe_values(self, author: Hashable, values: Sequence[float], timestamp=None) -> Optional[ChangePoint]:
+        """Feed one observation of an author's features; returns a ChangePoint if it raises an alarm."""
+        if len(values) != len(self.features):
+            raise ValueError(f"Expected {len(self.features)} feature values, got {len(values)}")
+        state = self.authors.get(author)
+        if state is None:
+            state = self.authors[author] = AuthorState(len(self.features))
+        state.observations += 1
+
+        alarm = None
+        if state.count >= self.warmup:
+            variance_scale = 1.0 / (state.count - 1)
+            for index, value in enumerate(values):
+                std = max(math.sqrt(state.squares[index] * variance_scale), self.min_std)
+                z = (value - state.means[index]) / std
+                upper = max(0.0, state.upper[index] + z - self.drift)
+                lower = max(0.0, state.lower[index] - z - self.drift)
+                state.upper[index] = upper
+                state.lower[index] = lower
+                statistic = max(upper, lower)
+                if statistic > self.threshold and (alarm is None or statistic > alarm.statistic):
+                    alarm = ChangePoint(author, state.observations, timestamp, self.features[index], statistic)
+
+        if alarm is not None:
+            # The alarming observation is the first of the new regime
+            state.restart()
+        state.count += 1
+        for index, value in enumerate(values):
+            delta = value - state.means[index]
+            state.means[index] += delta / state.count
+            state.squares[index] += delta * (value - state.means[index])
+        return alarm
+
+    def run(self, events: Iterable[Tuple[Hashable, object, object]]) -> Iterator[ChangePoint]:
+        """
+        Detect change points in a stream of (author, fingerprint, timestamp) events,
+        e.g. posts in time order. A text in place of a fingerprint is fingerprinted first.
+        """
+        from signature import Fingerprint
+        for author, fingerprint, timestamp in events:
+            if isinstance(fingerprint, str):
+                fingerprint = Fingerprint.from_text(fingerprint)
+            alarm = self.observe(author, fingerprint, timestamp)
+            if alarm is not None:
+                yield alarm
+
+    def reset(self, author: Hashable):
+        self.authors.pop(author, None)
+
+
+def timeline_events(rows: Iterable[dict], author: str = 'source', text: str = 'text',
+                    timestamp: str = 'tweet_id') -> Iterator[Tuple[Hashable, str, object]]:
+    """
+    Turn timeline rows (dicts, as read by csv.DictReader) into (author, text, timestamp)
+    events for ChangePointDetector.run. Rows without text are skipped.
+    """
+    for row in rows:
+        if row.get(text):
+            yield row[author], row[text], row.get(timestamp)
@@ -0,0 +1,62 @@
+import random
+import unittest
+from changepoint import ChangePointDetector, identity_features, timeline_events
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+
+
+class ChangePointDetectorTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(0)
+
+    def values(self, means):
+        return [self.rng.gauss(mean, mean * 0.1) for mean in means]
+
+    def test_stable_author_raises_no_alarm(self):
+        detector = ChangePointDetector()
+        alarms = [detector.observe_values('alice', self.values((0.1, 0.5, 0.02))) for _ in range(500)]
+        self.assertEqual([alarm for alarm in alarms if alarm], [])
+
+    def test_detects_switch(self):
+        detector = ChangePointDetector()
+        for _ in range(50):
+            self.assertIsNone(detector.observe_values('alice', self.values((0.1, 0.5, 0.02)), timestamp='before'))
+        alarms = [detector.observe_values('alice', self.values((0.1, 0.9, 0.02)), timestamp=index) for index in range(10)]
+        alarm = next(alarm for alarm in alarms if alarm)
+        self.assertEqual(alarm.author, 'alice')
+        self.assertEqual(alarm.feature, 'word_delta')
+        self.assertLess(alarm.timestamp, 3)
+        self.assertEqual(alarm.observation, 51 + alarm.timestamp)
+
+    def test_authors_are_independent(self):
+        detector = ChangePointDetector()
+        for _ in range(50):
+            detector.observe_values('alice', self.values((0.1, 0.5, 0.02)))
+            detector.observe_values('bob', self.values((0.2, 0.1, 0.05)))
+        self.assertEqual(len(detector), 2)
+        self.assertEqual(detector.authors['alice'].observations, 50)
+        detector.reset('bob')
+        self.assertEqual(len(detector), 1)
+
+    def test_invalid_settings_and_values_are_refused(self):
+        for warmup in (0, 1):
+            with self.assertRaises(ValueError):
+                ChangePointDetector(warmup=warmup)
+        detector = ChangePointDetector()
+        for values in ((0.1, 0.5), (0.1, 0.5, 0.02, 0.3)):
+            with self.assertRaises(ValueError):
+                detector.observe_values('alice', values)
+        self.assertEqual(len(detector), 0)
+
+    def test_run_on_timeline_rows(self):
+        fingerprint = Fingerprint.from_text("The cats are running, dogs were barking!")
+        self.assertEqual(len(identity_features(fingerprint)), 3)
+        self.assertEqual(identity_features(fingerprint)[2], fingerprint.structural_deviation)
+        rows = [{'source': 'alice', 'text': "The cats are running, dogs were barking!", 'tweet_id': '1'},
+                {'source': 'alice', 'text': '', 'tweet_id': '2'}]
+        self.assertEqual(list(timeline_events(rows)), [('alice', rows[0]['text'], '1')])
+        self.assertEqual(list(ChangePointDetector().run(timeline_events(rows))), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
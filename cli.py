@@ -0,0 +1,365 @@
+"""
+Fingerprint a corpus from the command line, without the Streamlit app.
+
+Reads JSONL, CSV (e.g. a timeline export with a text column) or a directory of text
+files, fingerprints the texts on a process pool and writes the fingerprints in columnar
+parts (Parquet, or NumPy .npz) to an output directory. After every part, a checkpoint
+records how many input records are done, so an interrupted run picks up where it
+stopped when run again with the same arguments.
+
+    python -m cli posts.jsonl out/ [--format parquet] [--text-field text] [--id-field id]
+    python -m cli timeline.csv out/ --text-field text --id-field tweet_id
+    python -m cli books/ out/ --glob '*.txt'
+"""
+import argparse
+import csv
+import fnmatch
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+import numpy as np
+from batch import iter_fingerprints
+from signature import Fingerprint, content_hash
+
+
+# Bumped whenever the checkpoint or part layout changes
+CHECKPOINT_VERSION = 2
+
+CHECKPOINT_FILE = 'checkpoint.json'
+
+# Fingerprints per output part; the work lost to an interruption is at most one part
+PART_ROWS = 10_000
+
+TABLE_FIELDS = ('CHARACTER_FREQUENCY', 'NORMALIZED_CHARACTER_FREQUENCY', 'WORD_FREQUENCY',
+                'NORMALIZED_WORD_FREQUENCY', 'STOPWORD_FREQUENCY', 'NONLETTER_FREQUENCY', 'character_delta',
+                'word_delta')
+SCALAR_FIELDS = ('COSINE_SIMILARITY_CHAR', 'COSINE_SIMILARITY_WORD', 'structural_deviation')
+
+# Columns of strings, kept as Python lists: a fixed-width NumPy string array would pad every
+# entry to the longest one, so a single long token would bloat the whole part
+STRING_COLUMNS = ('id', 'content_hash') + tuple(f'{field}.keys' for field in TABLE_FIELDS)
+
+
+class Record(NamedTuple):
+    id: str
+    text: str
+
+
+def detect_format(path: str) -> str:
+    if os.path.isdir(path):
+        return 'directory'
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension in ('.csv', '.tsv'):
+        return 'csv'
+    raise ValueError(f"Cannot tell the format of {path}; pass --input-format jsonl, csv or directory")
+
+
+def read_jsonl(path: str, text_field: str = 'text', id_field: str = 'id') -> Iterator[Record]:
+    # Lines without text are skipped; records without an id are named after their line number
+    with open(path, 'r', encoding='utf-8') as jsonl_file:
+        for number, line in enumerate(jsonl_file, start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get(text_field):
+                yield Record(str(row.get(id_field, number)), row[text_field])
+
+
+def read_csv(path: str, text_field: str = 'text', id_field: str = 'id') -> Iterator[Record]:
+    # Rows without text are skipped, as in changepoint.timeline_events
+    csv.field_size_limit(sys.maxsize)
+    with open(path, 'r', encoding='utf-8', newline='') as csv_file:
+        reader = csv.DictReader(csv_file, delimiter='\t' if path.lower().endswith('.tsv') else ',')
+        if reader.fieldnames is not None and text_field not in reader.fieldnames:
+            raise ValueError(f"{path} has no {text_field!r} column; pick one with --text-field "
+                             f"(columns: {', '.join(reader.fieldnames)})")
+        for number, row in enumerate(reader, start=1):
+            if row.get(text_field):
+                yield Record(str(row.get(id_field) or number), row[text_field])
+
+
+def read_directory(path: str, pattern: str = '*.txt') -> Iterator[Record]:
+    # Files matching pattern, in sorted order so that a resumed run sees them in the same order
+    for root, directories, files in os.walk(path):
+        directories.sort()
+        for name in sorted(files):
+            if fnmatch.fnmatch(name, pattern):
+                file_path = os.path.join(root, name)
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as text_file:
+                    text = text_file.read()
+                if text:
+                    yield Record(os.path.relpath(file_path, path), text)
+
+
+def read_records(path: str, format: Optional[str] = None, text_field: str = 'text', id_field: str = 'id',
+                 pattern: str = '*.txt') -> Iterator[Record]:
+    format = format or detect_format(path)
+    if format == 'jsonl':
+        return read_jsonl(path, text_field, id_field)
+    if format == 'csv':
+        return read_csv(path, text_field, id_field)
+    if format == 'directory':
+        return read_directory(path, pattern)
+    raise ValueError(f"Unknown input format {format!r}, expected 'jsonl', 'csv' or 'directory'")
+
+
+def to_columns(ids: List[str], texts: List[str],
+               fingerprints: List[Fingerprint]) -> Dict[str, Union[np.ndarray, List[str]]]:
+    """
+    Fingerprints as flat columns: ids, content hashes, one array per scalar field, and
+    for each table its keys and values, one row after another, with the offset at which
+    each row starts. The string columns (STRING_COLUMNS) are lists.
+    """
+    columns = {'id': list(ids), 'content_hash': [content_hash(text) for text in texts]}
+    for field in SCALAR_FIELDS:
+        columns[field] = np.array([getattr(fingerprint, field) for fingerprint in fingerprints], dtype=np.float64)
+    for field in TABLE_FIELDS:
+        tables = [getattr(fingerprint, field) for fingerprint in fingerprints]
+        columns[f'{field}.offsets'] = np.cumsum([0] + [len(table) for table in tables], dtype=np.int64)
+        columns[f'{field}.keys'] = [key for table in tables for key in table]
+        columns[f'{field}.values'] = np.array([value for table in tables for value in table.values()],
+                                              dtype=np.float64)
+    return columns
+
+
+def from_columns(columns: Dict[str, Union[np.ndarray, List[str]]]) -> Iterator[Tuple[str, Fingerprint]]:
+    # (id, Fingerprint) for every row of a part, the inverse of to_columns
+    tables = {}
+    for field in TABLE_FIELDS:
+        offsets, keys, values = (columns[f'{field}.{name}'] for name in ('offsets', 'keys', 'values'))
+        values = values.tolist()
+        tables[field] = [dict(zip(keys[start:end], values[start:end]))
+                         for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    for row, record_id in enumerate(columns['id']):
+        fields = {field: float(columns[field][row]) for field in SCALAR_FIELDS}
+        fields.update({field: tables[field][row] for field in TABLE_FIELDS})
+        yield record_id, Fingerprint(**fields)
+
+
+def _pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    # Strings as one UTF-8 byte buffer and the offset at which each one starts
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.cumsum([0] + [len(data) for data in encoded], dtype=np.int64)
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(buffer: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = buffer.tobytes()
+    return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def _write_npz(columns: Dict[str, Union[np.ndarray, List[str]]], part_file):
+    arrays = {}
+    for name, column in columns.items():
+        if name in STRING_COLUMNS:
+            arrays[f'{name}.utf8'], arrays[f'{name}.utf8_offsets'] = _pack_strings(column)
+        else:
+            arrays[name] = column
+    np.savez_compressed(part_file, **arrays)
+
+
+def _read_npz(path: str) -> Dict[str, Union[np.ndarray, List[str]]]:
+    with np.load(path, allow_pickle=False) as part:
+        columns = dict(part)
+    for name in STRING_COLUMNS:
+        columns[name] = _unpack_strings(columns.pop(f'{name}.utf8'), columns.pop(f'{name}.utf8_offsets'))
+    return columns
+
+
+def _write_parquet(columns: Dict[str, Union[np.ndarray, List[str]]], part_file):
+    # Tables become map<string, double> columns, so other tools read them as they are
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Strings go to Arrow straight from the lists, with no fixed-width NumPy step
+    arrays = {name: pa.array(columns[name], pa.string()) for name in ('id', 'content_hash')}
+    for field in SCALAR_FIELDS:
+        arrays[field] = pa.array(columns[field])
+    for field in TABLE_FIELDS:
+        arrays[field] = pa.MapArray.from_arrays(pa.array(columns[f'{field}.offsets'], pa.int32()),
+                                                pa.array(columns[f'{field}.keys'], pa.string()),
+                                                pa.array(columns[f'{field}.values']))
+    pq.write_table(pa.table(arrays), part_file)
+
+
+def _read_parquet(path: str) -> Dict[str, Union[np.ndarray, List[str]]]:
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path)
+    columns = {'id': table.column('id').to_pylist(), 'content_hash': table.column('content_hash').to_pylist()}
+    for field in SCALAR_FIELDS:
+        columns[field] = table.column(field).to_numpy()
+    for field in TABLE_FIELDS:
+        maps = table.column(field).combine_chunks()
+        columns[f'{field}.offsets'] = maps.offsets.to_numpy().astype(np.int64)
+        columns[f'{field}.keys'] = maps.keys.to_pylist()
+        columns[f'{field}.values'] = maps.items.to_numpy()
+    return columns
+
+
+FORMATS = {
+    'npz': ('.npz', _write_npz, _read_npz),
+    'parquet': ('.parquet', _write_parquet, _read_parquet),
+}
+
+
+def default_format() -> str:
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return 'parquet'
+    except ImportError:
+        return 'npz'
+
+
+def part_path(output: str, part: int, format: str) -> str:
+    return os.path.join(output, f'part-{part:05d}{FORMATS[format][0]}')
+
+
+def read_output(output: str) -> Iterator[Tuple[str, Fingerprint]]:
+    # (id, Fingerprint) for every row committed to an output directory, in input order
+    checkpoint = load_checkpoint(output)
+    if checkpoint is None:
+        return
+    _, _, read = FORMATS[checkpoint['format']]
+    for part in range(checkpoint['parts']):
+        yield from from_columns(read(part_path(output, part, checkpoint['format'])))
+
+
+def load_checkpoint(output: str) -> Optional[dict]:
+    path = os.path.join(output, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} has checkpoint version {checkpoint.get('version')}, expected {CHECKPOINT_VERSION}")
+    return checkpoint
+
+
+def _replace(output: str, name: str, write):
+    # Write through a scratch file and rename it into place, so a file is either whole or absent
+    descriptor, scratch = tempfile.mkstemp(dir=output, prefix='.' + name)
+    try:
+        with os.fdopen(descriptor, 'wb') as scratch_file:
+            write(scratch_file)
+            scratch_file.flush()
+            os.fsync(scratch_file.fileno())
+        os.replace(scratch, os.path.join(output, name))
+    except BaseException:
+        if os.path.exists(scratch):
+            os.remove(scratch)
+        raise
+
+
+def fingerprint_corpus(input_path: str, output: str, format: Optional[str] = None, input_format: Optional[str] = None,
+                       text_field: str = 'text', id_field: str = 'id', pattern: str = '*.txt',
+                       part_rows: int = PART_ROWS, workers: Optional[int] = None, restart: bool = False,
+                       log=print) -> dict:
+    """
+    Fingerprint every record of input_path into parts of part_rows rows under output,
+    resuming from output's checkpoint if there is one. Returns the final checkpoint.
+
+    The checkpoint is rewritten after each part, and only then, so a part is either
+    committed or redone. Resuming skips the committed records without fingerprinting
+    them; it needs the same input and options, and refuses to continue otherwise.
+    """
+    os.makedirs(output, exist_ok=True)
+    settings = {
+        'version': CHECKPOINT_VERSION,
+        'input': os.path.abspath(input_path),
+        'format': format or default_format(),
+        'input_format': input_format or detect_format(input_path),
+        'text_field': text_field,
+        'id_field': id_field,
+        'pattern': pattern,
+    }
+    checkpoint = None if restart else load_checkpoint(output)
+    if checkpoint is None:
+        checkpoint = dict(settings, records=0, parts=0, seconds=0.0)
+    else:
+        changed = [name for name, value in settings.items() if checkpoint.get(name) != value]
+        if changed:
+            raise ValueError(f"{output} holds a run with different {', '.join(changed)}; "
+                             f"use another output directory or --restart")
+        log(f"Resuming after {checkpoint['records']:,} records in {checkpoint['parts']} parts")
+
+    extension, write, _ = FORMATS[checkpoint['format']]
+    # Parts past the checkpoint, and scratch files, come from an interrupted run or from a run being restarted
+    for name in os.listdir(output):
+        stray = name.startswith('part-') and name.endswith(extension) and int(name[5:10]) >= checkpoint['parts']
+        if stray or name.startswith(('.part-', '.' + CHECKPOINT_FILE)):
+            os.remove(os.path.join(output, name))
+
+    records = islice(read_records(input_path, checkpoint['input_format'], text_field, id_field, pattern),
+                     checkpoint['records'], None)
+    # iter_fingerprints reads texts only as far ahead as its workers need, so the ids waiting here stay few
+    waiting = deque()
+
+    def texts():
+        for record in records:
+            waiting.append(record)
+            yield record.text
+
+    start = time.perf_counter()
+    part = []
+    for fingerprint in iter_fingerprints(texts(), workers=workers):
+        part.append((waiting.popleft(), fingerprint))
+        if len(part) == part_rows:
+            checkpoint = _commit(output, checkpoint, part, write, start, log)
+            part, start = [], time.perf_counter()
+    if part:
+        checkpoint = _commit(output, checkpoint, part, write, start, log)
+    return checkpoint
+
+
+def _commit(output: str, checkpoint: dict, part: list, write, start: float, log) -> dict:
+    ids = [record.id for record, _ in part]
+    texts = [record.text for record, _ in part]
+    columns = to_columns(ids, texts, [fingerprint for _, fingerprint in part])
+    name = os.path.basename(part_path(output, checkpoint['parts'], checkpoint['format']))
+    _replace(output, name, lambda part_file: write(columns, part_file))
+
+    seconds = time.perf_counter() - start
+    checkpoint = dict(checkpoint, records=checkpoint['records'] + len(part), parts=checkpoint['parts'] + 1,
+                      seconds=checkpoint['seconds'] + seconds)
+    _replace(output, CHECKPOINT_FILE, lambda checkpoint_file: checkpoint_file.write(json.dumps(checkpoint).encode()))
+    log(f"{name}: {len(part):,} records in {seconds:.1f} s, {checkpoint['records']:,} done")
+    return checkpoint
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="JSONL or CSV file, or directory of text files")
+    parser.add_argument('output', help="Directory of the output parts and checkpoint")
+    parser.add_argument('--format', choices=sorted(FORMATS), help="Output format (default: parquet if pyarrow "
+                                                                   "is installed, else npz)")
+    parser.add_argument('--input-format', choices=('jsonl', 'csv', 'directory'),
+                        help="Input format (default: from the file extension)")
+    parser.add_argument('--text-field', default='text', help="JSONL field or CSV column holding the text")
+    parser.add_argument('--id-field', default='id', help="JSONL field or CSV column holding the record id")
+    parser.add_argument('--glob', default='*.txt', help="Files read from an input directory")
+    parser.add_argument('--part-rows', type=int, default=PART_ROWS, help="Fingerprints per output part")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    try:
+        checkpoint = fingerprint_corpus(args.input, args.output, args.format, args.input_format, args.text_field,
+                                        args.id_field, args.glob, args.part_rows, args.workers, args.restart)
+    except ValueError as error:
+        parser.exit(2, f"error: {error}\n")
+    except KeyboardInterrupt:
+        parser.exit(130, "Interrupted; run the same command again to resume\n")
+    print(f"Done: {checkpoint['records']:,} records in {checkpoint['parts']} parts, "
+          f"{checkpoint['seconds']:.1f} s of fingerprinting")
+
+
+if __name__ == '__main__':
+    main()
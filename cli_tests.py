@@ -0,0 +1,128 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from cli import fingerprint_corpus, part_path, read_output, read_records
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+
+
+TEXTS = [
+    "The council voted tonight to approve the new transit budget.",
+    "lol i cant believe the bus is late AGAIN!!! 😤 whatever",
+    "Chapter two. The rain had not stopped for three days, and the river was rising.",
+    "Über naïve café — 東京 is lovely in the spring.",
+    "Thread: why the new budget is a mistake (1/5)",
+]
+
+
+class CliTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, 'out')
+        self.jsonl = os.path.join(self.directory.name, 'posts.jsonl')
+        with open(self.jsonl, 'w', encoding='utf-8') as jsonl_file:
+            for index, text in enumerate(TEXTS):
+                jsonl_file.write(json.dumps({'id': f'post-{index}', 'text': text}) + '\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_corpus(self, path, **options):
+        options.setdefault('workers', 1)
+        return fingerprint_corpus(path, self.output, log=lambda message: None, **options)
+
+    def assertOutput(self, ids, texts):
+        rows = list(read_output(self.output))
+        self.assertEqual([record_id for record_id, _ in rows], ids)
+        for (_, fingerprint), text in zip(rows, texts):
+            self.assertEqual(fingerprint, Fingerprint.from_text(text))
+
+    def test_jsonl_round_trips_through_both_formats(self):
+        for output_format in ('npz', 'parquet'):
+            with self.subTest(output_format):
+                checkpoint = self.run_corpus(self.jsonl, format=output_format, part_rows=2, restart=True)
+
+                self.assertEqual((checkpoint['records'], checkpoint['parts']), (5, 3))
+                self.assertOutput([f'post-{index}' for index in range(5)], TEXTS)
+
+    def test_one_long_token_does_not_widen_every_key(self):
+        texts = TEXTS + ['x' * 100_000]
+        with open(self.jsonl, 'w', encoding='utf-8') as jsonl_file:
+            for index, text in enumerate(texts):
+                jsonl_file.write(json.dumps({'id': f'post-{index}', 'text': text}) + '\n')
+
+        for output_format in ('npz', 'parquet'):
+            with self.subTest(output_format):
+                self.run_corpus(self.jsonl, format=output_format, part_rows=10, restart=True)
+
+                # Fixed-width keys would take 400 kB (100 000 UCS-4 characters) for each of the many keys
+                self.assertLess(os.path.getsize(part_path(self.output, 0, output_format)), 200_000)
+                self.assertOutput([f'post-{index}' for index in range(6)], texts)
+
+    def test_csv_rows_without_text_are_skipped(self):
+        path = os.path.join(self.directory.name, 'timeline.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=['id', 'source', 'tweet_id', 'text'])
+            writer.writeheader()
+            writer.writerow({'id': 1, 'source': 'a', 'tweet_id': 't1', 'text': TEXTS[0]})
+            writer.writerow({'id': 2, 'source': 'a', 'tweet_id': 't2', 'text': ''})
+            writer.writerow({'id': 3, 'source': 'b', 'tweet_id': 't3', 'text': TEXTS[1]})
+
+        self.run_corpus(path, id_field='tweet_id', format='npz')
+
+        self.assertOutput(['t1', 't3'], TEXTS[:2])
+
+    def test_csv_without_the_text_column_is_refused(self):
+        path = os.path.join(self.directory.name, 'timeline.csv')
+        with open(path, 'w', encoding='utf-8') as csv_file:
+            csv_file.write('id,source,target,tweet_id,type\n1,a,b,t1,retweet\n')
+
+        with self.assertRaises(ValueError):
+            list(read_records(path))
+
+    def test_directory_files_are_read_in_sorted_order(self):
+        books = os.path.join(self.directory.name, 'books')
+        os.makedirs(os.path.join(books, 'b'))
+        for name, text in (('b/one.txt', TEXTS[0]), ('a.txt', TEXTS[1]), ('notes.md', TEXTS[2])):
+            with open(os.path.join(books, name), 'w', encoding='utf-8') as book:
+                book.write(text)
+
+        self.assertEqual([record.id for record in read_records(books)], ['a.txt', os.path.join('b', 'one.txt')])
+
+    def test_interrupted_run_resumes_after_the_last_part(self):
+        def interrupt(message):
+            if message.startswith('part-00001'):
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            fingerprint_corpus(self.jsonl, self.output, format='npz', part_rows=2, workers=1, log=interrupt)
+        # A part written after the checkpoint, as if the run had stopped between the two
+        open(os.path.join(self.output, 'part-00002.npz'), 'wb').close()
+
+        fingerprinted = []
+
+        def iter_fingerprints(texts, **options):
+            for text in texts:
+                fingerprinted.append(text)
+                yield Fingerprint.from_text(text)
+
+        with mock.patch('cli.iter_fingerprints', iter_fingerprints):
+            checkpoint = self.run_corpus(self.jsonl, format='npz', part_rows=2)
+
+        self.assertEqual(fingerprinted, TEXTS[4:])
+        self.assertEqual((checkpoint['records'], checkpoint['parts']), (5, 3))
+        self.assertOutput([f'post-{index}' for index in range(5)], TEXTS)
+
+    def test_resuming_with_other_settings_is_refused(self):
+        self.run_corpus(self.jsonl, format='npz')
+
+        with self.assertRaises(ValueError):
+            self.run_corpus(self.jsonl, format='npz', text_field='body')
+        self.assertEqual(self.run_corpus(self.jsonl, format='npz', text_field='body', restart=True)['records'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,255 @@
+import string
+from collections.abc import Mapping
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+from signature import Fingerprint, STOPWORDS
+
+
+# Characters stored at fixed indices; any other character goes to a sparse overflow table
+ALPHABET = string.ascii_lowercase + string.ascii_uppercase + string.digits + ' .,!?\'"-:;()\n'
+_ALPHABET_INDEX = {char: index for index, char in enumerate(ALPHABET)}
+
+CHARACTER_FIELDS = ('CHARACTER_FREQUENCY', 'NORMALIZED_CHARACTER_FREQUENCY')
+WORD_FIELDS = ('WORD_FREQUENCY', 'NORMALIZED_WORD_FREQUENCY', 'NONLETTER_FREQUENCY')
+SCALAR_FIELDS = ('COSINE_SIMILARITY_CHAR', 'COSINE_SIMILARITY_WORD', 'structural_deviation')
+
+# Deltas are not stored; they are recomputed from the table pairs they come from
+DELTA_FIELDS = {
+    'character_delta': CHARACTER_FIELDS,
+    'word_delta': WORD_FIELDS[:2],
+}
+
+# Tables stored as sorted (id, value) pairs: the characters outside ALPHABET, then the word tables
+SPARSE_FIELDS = CHARACTER_FIELDS + WORD_FIELDS
+
+# Layout of the fixed-size head of a fingerprint's buffer, in float32 slots
+_CHARACTERS = slice(0, len(CHARACTER_FIELDS) * len(ALPHABET))
+_STOPWORDS = slice(_CHARACTERS.stop, _CHARACTERS.stop + len(STOPWORDS))
+_SCALARS = slice(_STOPWORDS.stop, _STOPWORDS.stop + 2 * len(SCALAR_FIELDS))
+_OFFSETS = slice(_SCALARS.stop, _SCALARS.stop + len(SPARSE_FIELDS) + 1)
+HEAD_SIZE = _OFFSETS.stop
+
+
+class Vocabulary:
+    """Interns words (and rare characters) to integer ids shared by many fingerprints."""
+
+    def __init__(self, words: List[str] = ()):
+        self.words = []
+        self.ids = {}
+        for word in words:
+            self.id(word)
+
+    def id(self, word: str) -> int:
+        word_id = self.ids.get(word)
+        if word_id is None:
+            word_id = self.ids[word] = len(self.words)
+            self.words.append(word)
+        return word_id
+
+    def __getitem__(self, word_id: int) -> str:
+        return self.words[word_id]
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+
+# Process-wide vocabulary used unless one is given
+VOCABULARY = Vocabulary()
+
+
+class TableView(Mapping):
+    """A read-only dict view of one table of a CompactFingerprint, decoded on access."""
+
+    __slots__ = ('_dense', '_ids', '_values', '_words')
+
+    def __init__(self, dense: Optional[np.ndarray], ids: np.ndarray, values: np.ndarray, vocabulary: 'Vocabulary'):
+        self._dense = dense
+        self._ids = ids
+        self._values = values
+        self._words = vocabulary
+
+    def __getitem__(self, key: str) -> float:
+        if self._dense is not None and key in _ALPHABET_INDEX:
+            value = self._dense[_ALPHABET_INDEX[key]]
+            if np.isnan(value):
+                raise KeyError(key)
+            return float(value)
+        word_id = self._words.ids.get(key)
+        position = np.searchsorted(self._ids, word_id) if word_id is not None else len(self._ids)
+        if position == len(self._ids) or self._ids[position] != word_id:
+            raise KeyError(key)
+        return float(self._values[position])
+
+    def __iter__(self) -> Iterator[str]:
+        if self._dense is not None:
+            for index in np.flatnonzero(~np.isnan(self._dense)):
+                yield ALPHABET[index]
+        for word_id in self._ids:
+            yield self._words[word_id]
+
+    def __len__(self) -> int:
+        present = 0 if self._dense is None else int(np.count_nonzero(~np.isnan(self._dense)))
+        return present + len(self._ids)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class CompactFingerprint:
+    """
+    An array-backed Fingerprint, stored in a single float32 buffer.
+
+    The character tables take fixed indices in ALPHABET, with NaN marking an absent
+    character. Characters outside ALPHABET go to a sparse overflow table. The stopword
+    table follows STOPWORDS order. The scalars are kept as float64. Word and non-letter
+    tables are sorted (id, value) pairs whose ids point into a shared, interned
+    Vocabulary, so each distinct word is stored once per process and not once per
+    fingerprint. character_delta and word_delta are recomputed from the tables they
+    derive from, not stored.
+
+    The Fingerprint field names are exposed as lazy, read-only dict views, so code that
+    reads fingerprint.WORD_FREQUENCY and the like keeps working. Values read back are
+    rounded to float32.
+
+    benchmarks/bench_memory.py measures about 1.2 KB per 20-word post, plus that
+    post's share of the vocabulary. The share shrinks as the corpus grows; it is about
+    0.35 KB at 10,000 posts. The dict Fingerprint takes about 10.7 KB.
+    """
+
+    __slots__ = ('buffer', 'vocabulary', 'tail')
+
+    def __init__(self, buffer: np.ndarray, vocabulary: Vocabulary = VOCABULARY, tail: Optional[np.ndarray] = None):
+        # The sparse ids and values follow the head in buffer, unless they are given
+        # separately as tail (e.g. as views of a memory-mapped store)
+        self.buffer = buffer
+        self.vocabulary = vocabulary
+        self.tail = tail
+
+    @classmethod
+    def from_fingerprint(cls, fingerprint: Fingerprint, vocabulary: Vocabulary = VOCABULARY):
+        characters = np.full((len(CHARACTER_FIELDS), len(ALPHABET)), np.nan, dtype=np.float32)
+        sparse_tables = []
+        for row, field in enumerate(CHARACTER_FIELDS):
+            overflow = {}
+            for char, value in getattr(fingerprint, field).items():
+                if char in _ALPHABET_INDEX:
+                    characters[row, _ALPHABET_INDEX[char]] = value
+                else:
+                    overflow[char] = value
+            sparse_tables.append(overflow)
+        sparse_tables += [getattr(fingerprint, field) for field in WORD_FIELDS]
+
+        ids, values, offsets = [], [], [0]
+        for table in sparse_tables:
+            pairs = sorted((vocabulary.id(key), value) for key, value in table.items())
+            ids += [word_id for word_id, _ in pairs]
+            values += [value for _, value in pairs]
+            offsets.append(len(ids))
+
+        buffer = np.empty(HEAD_SIZE + 2 * len(ids), dtype=np.float32)
+        buffer[_CHARACTERS] = characters.ravel()
+        buffer[_STOPWORDS] = [fingerprint.STOPWORD_FREQUENCY.get(word, 0.0) for word in STOPWORDS]
+        buffer[_SCALARS].view(np.float64)[:] = [getattr(fingerprint, field) for field in SCALAR_FIELDS]
+        buffer[_OFFSETS].view(np.int32)[:] = offsets
+        buffer[HEAD_SIZE:HEAD_SIZE + len(ids)].view(np.int32)[:] = ids
+        buffer[HEAD_SIZE + len(ids):] = values
+        return cls(buffer, vocabulary)
+
+    @classmethod
+    def from_text(cls, text: str, vocabulary: Vocabulary = VOCABULARY):
+        return cls.from_fingerprint(Fingerprint.from_text(text), vocabulary)
+
+    @property
+    def characters(self) -> np.ndarray:
+        # (CHARACTER_FIELDS x ALPHABET) frequencies, NaN where a character is absent
+        return self.buffer[_CHARACTERS].reshape(len(CHARACTER_FIELDS), len(ALPHABET))
+
+    @property
+    def stopwords(self) -> np.ndarray:
+        return self.buffer[_STOPWORDS]
+
+    @property
+    def scalars(self) -> np.ndarray:
+        return self.buffer[_SCALARS].view(np.float64)
+
+    def sparse(self, field: str) -> Tuple[np.ndarray, np.ndarray]:
+        # The (ids, values) arrays of one sparse table
+        offsets = self.buffer[_OFFSETS].view(np.int32)
+        total = offsets[-1]
+        index = SPARSE_FIELDS.index(field)
+        tail = self.buffer[HEAD_SIZE:] if self.tail is None else self.tail
+        ids = tail[:total].view(np.int32)
+        values = tail[total:]
+        return ids[offsets[index]:offsets[index + 1]], values[offsets[index]:offsets[index + 1]]
+
+    def table(self, field: str) -> TableView:
+        if field in DELTA_FIELDS:
+            return self._delta(*DELTA_FIELDS[field])
+        dense = self.characters[CHARACTER_FIELDS.index(field)] if field in CHARACTER_FIELDS else None
+        return TableView(dense, *self.sparse(field), self.vocabulary)
+
+    def _delta(self, field: str, normalized_field: str) -> TableView:
+        # abs(freq - normed_freq) for keys present in both tables, as in Fingerprint.from_text
+        dense = None
+        if field in CHARACTER_FIELDS:
+            dense = np.abs(self.characters[0] - self.characters[1])
+        ids, values = self.sparse(field)
+        normalized_ids, normalized_values = self.sparse(normalized_field)
+        shared, positions, normalized_positions = np.intersect1d(ids, normalized_ids, assume_unique=True,
+                                                                  return_indices=True)
+        delta = np.abs(values[positions] - normalized_values[normalized_positions])
+        return TableView(dense, shared, delta, self.vocabulary)
+
+    def to_fingerprint(self) -> Fingerprint:
+        # A dict-backed Fingerprint, with values rounded to float32
+        tables = {field: dict(self.table(field))
+                  for field in CHARACTER_FIELDS + WORD_FIELDS + tuple(DELTA_FIELDS)}
+        scalars = {field: float(value) for field, value in zip(SCALAR_FIELDS, self.scalars)}
+        return Fingerprint(STOPWORD_FREQUENCY=self.STOPWORD_FREQUENCY, **tables, **scalars)
+
+    @property
+    def head(self) -> np.ndarray:
+        # The fixed-size part: character tables, stopwords, scalars and sparse offsets
+        return self.buffer[:HEAD_SIZE]
+
+    @property
+    def sparse_part(self) -> np.ndarray:
+        # The variable-size part: every sparse id, then every sparse value
+        return self.buffer[HEAD_SIZE:] if self.tail is None else self.tail
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.nbytes + (0 if self.tail is None else self.tail.nbytes)
+
+    @property
+    def STOPWORD_FREQUENCY(self):
+        return {word: float(value) for word, value in zip(STOPWORDS, self.stopwords)}
+
+    @property
+    def identity_vector(self):
+        return (self.character_delta, self.word_delta, self.structural_deviation)
+
+    def __reduce__(self):
+        # Vocabulary ids are local to a process, so pickles carry the decoded tables
+        return (_from_fingerprint, (self.to_fingerprint(),))
+
+    def __repr__(self) -> str:
+        return f'CompactFingerprint({self.identity_vector!r})'
+
+
+def _from_fingerprint(fingerprint: Fingerprint) -> CompactFingerprint:
+    return CompactFingerprint.from_fingerprint(fingerprint)
+
+
+def _table_property(field: str):
+    return property(lambda self: self.table(field))
+
+
+def _scalar_property(index: int):
+    return property(lambda self: float(self.scalars[index]))
+
+
+for _field in SPARSE_FIELDS + tuple(DELTA_FIELDS):
+    setattr(CompactFingerprint, _field, _table_property(_field))
+for _index, _field in enumerate(SCALAR_FIELDS):
+    setattr(CompactFingerprint, _field, _scalar_property(_index))
@@ -0,0 +1,64 @@
+import pickle
+import unittest
+import numpy as np
+from compact import CompactFingerprint, Vocabulary
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+
+
+class CompactFingerprintTests(unittest.TestCase):
+    def setUp(self):
+        self.text = "Les élèves étaient très fatigués!! #exam @prof — teh cats are runnning, dogs were barking."
+        self.fingerprint = Fingerprint.from_text(self.text)
+        self.compact = CompactFingerprint.from_fingerprint(self.fingerprint, Vocabulary())
+
+    def assert_tables_close(self, view, table):
+        self.assertEqual(set(view), set(table))
+        self.assertEqual(len(view), len(table))
+        for key, value in table.items():
+            self.assertAlmostEqual(view[key], value, places=6)
+
+    def test_dict_views(self):
+        for field in ('CHARACTER_FREQUENCY', 'NORMALIZED_CHARACTER_FREQUENCY', 'WORD_FREQUENCY',
+                      'NORMALIZED_WORD_FREQUENCY', 'NONLETTER_FREQUENCY', 'STOPWORD_FREQUENCY'):
+            self.assert_tables_close(getattr(self.compact, field), getattr(self.fingerprint, field))
+
+    def test_deltas_are_recomputed(self):
+        self.assert_tables_close(self.compact.character_delta, self.fingerprint.character_delta)
+        self.assert_tables_close(self.compact.word_delta, self.fingerprint.word_delta)
+
+    def test_scalars_are_exact(self):
+        self.assertEqual(self.compact.COSINE_SIMILARITY_CHAR, self.fingerprint.COSINE_SIMILARITY_CHAR)
+        self.assertEqual(self.compact.COSINE_SIMILARITY_WORD, self.fingerprint.COSINE_SIMILARITY_WORD)
+        self.assertEqual(self.compact.structural_deviation, self.fingerprint.structural_deviation)
+
+    def test_missing_keys(self):
+        self.assertNotIn('z', self.compact.CHARACTER_FREQUENCY)
+        self.assertNotIn('unseen', self.compact.WORD_FREQUENCY)
+        with self.assertRaises(KeyError):
+            self.compact.WORD_FREQUENCY['unseen']
+
+    def test_round_trip(self):
+        fingerprint = self.compact.to_fingerprint()
+        self.assertIsInstance(fingerprint, Fingerprint)
+        self.assert_tables_close(fingerprint.WORD_FREQUENCY, self.fingerprint.WORD_FREQUENCY)
+
+    def test_pickle(self):
+        restored = pickle.loads(pickle.dumps(self.compact))
+        self.assertEqual(dict(restored.WORD_FREQUENCY), dict(self.compact.WORD_FREQUENCY))
+
+    def test_is_one_buffer_with_slots(self):
+        self.assertFalse(hasattr(self.compact, '__dict__'))
+        self.assertEqual(self.compact.buffer.dtype, np.float32)
+        self.assertEqual(self.compact.nbytes, self.compact.buffer.nbytes)
+
+    def test_shared_vocabulary(self):
+        vocabulary = Vocabulary()
+        CompactFingerprint.from_text("cats and dogs", vocabulary)
+        size = len(vocabulary)
+        CompactFingerprint.from_text("dogs and cats", vocabulary)
+        self.assertEqual(len(vocabulary), size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from signature import Fingerprint, content_hash
+
+
+# Largest prime below 2**32; MinHash values are (a * shingle + b) mod PRIME, so they fit in uint32
+PRIME = 4294967291
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 5
+
+
+class DedupStats(NamedTuple):
+    # How much fingerprinting work deduplication saved
+    texts: int
+    exact_duplicates: int
+    near_duplicates: int
+    characters: int
+    characters_skipped: int
+
+    @property
+    def unique(self) -> int:
+        return self.texts - self.exact_duplicates - self.near_duplicates
+
+    @property
+    def skipped_fraction(self) -> float:
+        # Share of texts that reuse another text's fingerprint
+        return (self.exact_duplicates + self.near_duplicates) / self.texts if self.texts else 0.0
+
+
+def shingles(text: str, size: int = DEFAULT_SHINGLE_SIZE) -> np.ndarray:
+    # CRC32 of every character size-gram, after lowercasing and collapsing whitespace
+    text = ' '.join(text.lower().split())
+    if len(text) <= size:
+        return np.array([zlib.crc32(text.encode('utf-8'))], dtype=np.uint64)
+    return np.unique(np.fromiter((zlib.crc32(text[start:start + size].encode('utf-8'))
+                                  for start in range(len(text) - size + 1)), dtype=np.uint64))
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    The (bands, rows) split of num_perm MinHash values whose LSH collision curve,
+    1 - (1 - s**rows)**bands, crosses 1/2 closest to threshold.
+    """
+    splits = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(splits, key=lambda split: abs((1 - 0.5 ** (1 / split[0])) ** (1 / split[1]) - threshold))
+
+
+class Deduplicator:
+    """
+    Collapses exact and near-duplicate texts onto the first text seen of each group.
+
+    Exact duplicates are found by content hash. Near-duplicates are texts whose
+    character shingles have an estimated Jaccard similarity of at least threshold.
+    The estimate comes from MinHash signatures of num_perm values, and candidates come
+    from an LSH index over bands of the signatures, so each new text is compared with
+    a handful of candidates and not with everything seen so far.
+
+    Args:
+        threshold (float): Smallest estimated Jaccard similarity counted as a duplicate.
+        num_perm (int): MinHash values per signature.
+        shingle_size (int): Characters per shingle.
+        seed (int): Seed of the MinHash permutations.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = DEFAULT_NUM_PERM,
+                 shingle_size: int = DEFAULT_SHINGLE_SIZE, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, PRIME, num_perm, dtype=np.uint64)
+
+        self.canonical: Dict[str, int] = {}
+        self.signatures: List[np.ndarray] = []
+        self.buckets = [{} for _ in range(self.bands)]
+        self.stats = DedupStats(0, 0, 0, 0, 0)
+
+    def signature(self, text: str) -> np.ndarray:
+        values = shingles(text, self.shingle_size)
+        # (a * x + b) stays below 2**64 because a, b and x are all below 2**32
+        return (((values[:, None] * self._a + self._b) % PRIME).min(axis=0)).astype(np.uint32)
+
+    def add(self, text: str) -> Tuple[int, bool]:
+        """
+        Add a text; returns the index of its group's canonical text, and whether the
+        text is a duplicate of it. Indices count the canonical texts added so far.
+        """
+        texts, exact, near, characters, skipped = self.stats
+        key = content_hash(text)
+        index = self.canonical.get(key)
+        if index is not None:
+            self.stats = DedupStats(texts + 1, exact + 1, near, characters + len(text), skipped + len(text))
+            return index, True
+
+        signature = self.signature(text)
+        index = self._nearest(signature)
+        if index is not None:
+            self.canonical[key] = index
+            self.stats = DedupStats(texts + 1, exact, near + 1, characters + len(text), skipped + len(text))
+            return index, True
+
+        index = self.canonical[key] = len(self.signatures)
+        self.signatures.append(signature)
+        for band, bucket in enumerate(self.buckets):
+            bucket.setdefault(signature[band * self.rows:(band + 1) * self.rows].tobytes(), []).append(index)
+        self.stats = DedupStats(texts + 1, exact, near, characters + len(text), skipped)
+        return index, False
+
+    def _nearest(self, signature: np.ndarray) -> Optional[int]:
+        # The most similar canonical text sharing a band with signature, if it is similar enough
+        candidates = set()
+        for band, bucket in enumerate(self.buckets):
+            candidates.update(bucket.get(signature[band * self.rows:(band + 1) * self.rows].tobytes(), ()))
+        best, best_similarity = None, self.threshold
+        for candidate in sorted(candidates):
+            similarity = np.count_nonzero(self.signatures[candidate] == signature) / self.num_perm
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+                if similarity == 1.0:
+                    break
+        return best
+
+
+def deduplicate(texts: Iterable[str], **options) -> Tuple[List[str], List[int], DedupStats]:
+    """
+    Returns the canonical texts, the index of each input's canonical text, and the stats.
+    Options are passed on to Deduplicator.
+    """
+    deduplicator = Deduplicator(**options)
+    canonical_texts, groups = [], []
+    for text in texts:
+        index, duplicate = deduplicator.add(text)
+        if not duplicate:
+            canonical_texts.append(text)
+        groups.append(index)
+    return canonical_texts, groups, deduplicator.stats
+
+
+def fingerprint_deduplicated(texts: Iterable[str], workers: Optional[int] = None, threshold: float = DEFAULT_THRESHOLD,
+                             **options) -> Tuple[List[Fingerprint], DedupStats]:
+    """
+    Fingerprint texts, computing one fingerprint per group of near-duplicates and
+    sharing it across the group. Returns the fingerprints in input order and the stats.
+    Other options are passed on to Fingerprint.from_texts.
+    """
+    canonical_texts, groups, stats = deduplicate(texts, threshold=threshold)
+    fingerprints = Fingerprint.from_texts(canonical_texts, workers=workers, **options)
+    return [fingerprints[index] for index in groups], stats
@@ -0,0 +1,46 @@
+import unittest
+from unittest import mock
+import dedup
+from dedup import Deduplicator, deduplicate, fingerprint_deduplicated, optimal_bands
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+
+
+class DeduplicatorTests(unittest.TestCase):
+    def setUp(self):
+        self.text = "Breaking: the city council voted tonight to approve the new transit budget for next year."
+        self.other = "Completely different text about cats and dogs playing in the park."
+
+    def test_exact_and_near_duplicates(self):
+        deduplicator = Deduplicator(threshold=0.7)
+        self.assertEqual(deduplicator.add(self.text), (0, False))
+        self.assertEqual(deduplicator.add(self.text), (0, True))
+        self.assertEqual(deduplicator.add("RT @news: " + self.text), (0, True))
+        self.assertEqual(deduplicator.add(self.text.replace("tonight", "today")), (0, True))
+        self.assertEqual(deduplicator.add(self.other), (1, False))
+        stats = deduplicator.stats
+        self.assertEqual((stats.texts, stats.exact_duplicates, stats.near_duplicates, stats.unique), (5, 1, 2, 2))
+        self.assertAlmostEqual(stats.skipped_fraction, 0.6)
+
+    def test_threshold(self):
+        canonical_texts, groups, _ = deduplicate([self.text, "RT @news: " + self.text], threshold=0.99)
+        self.assertEqual(groups, [0, 1])
+        self.assertEqual(len(canonical_texts), 2)
+
+    def test_optimal_bands(self):
+        bands, rows = optimal_bands(0.8, 128)
+        self.assertEqual(bands * rows, 128)
+        self.assertLess(optimal_bands(0.5, 128)[1], rows)
+
+    def test_fingerprints_are_shared(self):
+        texts = [self.text, self.other, self.text]
+        with mock.patch.object(dedup.Fingerprint, 'from_texts', wraps=Fingerprint.from_texts) as from_texts:
+            fingerprints, stats = fingerprint_deduplicated(texts, workers=1)
+        self.assertEqual(from_texts.call_args[0][0], [self.text, self.other])
+        self.assertIs(fingerprints[0], fingerprints[2])
+        self.assertEqual(fingerprints[1], Fingerprint.from_text(self.other))
+        self.assertEqual(stats.characters_skipped, len(self.text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+import os
+import pickle
+import random
+import tempfile
+import threading
+import time
+from typing import List, Optional, Sequence
+import numpy as np
+from graph import CHARACTER_TABLES, WORD_TABLES, create_corpus_adjacency
+from signature import Fingerprint
+
+
+# Bumped whenever the pickled layout of an AuthorMap changes
+MODEL_VERSION = 1
+
+# Words kept as features, the ones used by the most fingerprints of the reference corpus
+MAX_WORDS = 5000
+
+# Fingerprints kept for refitting; past this, a uniform sample of everything added is kept
+MAX_REFERENCE = 20_000
+
+# A refit is due once this share of new fingerprints has arrived since the last fit, or after REFIT_SECONDS
+REFIT_FRACTION = 0.2
+REFIT_SECONDS = 24 * 60 * 60
+
+
+class AuthorMap:
+    """
+    A UMAP projection of fingerprints, fitted once on a reference corpus and reused.
+
+    fit() fixes the feature vocabulary (all characters, and the max_words most widely
+    used words) and fits UMAP, the expensive step. transform() lays new fingerprints out
+    on the same vocabulary and places them on the existing map without refitting, in
+    milliseconds once UMAP's code is compiled. save() and load() persist the fitted map.
+
+    Fingerprints passed to add() join the reference corpus (a uniform sample of at most
+    max_reference). refit_due() reports when enough of them have arrived, or enough time
+    has passed, and maybe_refit() then refits, optionally on a background thread while
+    transform() keeps using the old model.
+
+    Args:
+        n_components (int): Dimensions of the map.
+        max_words (int): Words kept as features.
+        max_reference (int): Fingerprints kept for refitting.
+        random_state (int): Seed for UMAP and for sampling the reference corpus.
+        options: Passed on to umap.UMAP.
+    """
+
+    def __init__(self, n_components: int = 2, max_words: int = MAX_WORDS, max_reference: int = MAX_REFERENCE,
+                 random_state: Optional[int] = None, **options):
+        self.n_components = n_components
+        self.max_words = max_words
+        self.max_reference = max_reference
+        self.random_state = random_state
+        self.options = options
+
+        self.model = None
+        self.characters: List[str] = []
+        self.words: List[str] = []
+        self.embedding: Optional[np.ndarray] = None
+        self.reference: List[Fingerprint] = []
+        self.seen = 0
+        self.added_since_fit = 0
+        self.fitted_at = None
+        self._rng = random.Random(random_state)
+        self._lock = threading.Lock()
+        # Held while deciding to refit, so concurrent callers start one refit between them
+        self._refit_lock = threading.Lock()
+        self._refit_thread = None
+
+    @property
+    def tables(self):
+        return CHARACTER_TABLES + WORD_TABLES
+
+    def _features(self, fingerprints: Sequence[Fingerprint], characters: List[str], words: List[str]):
+        from matrix import FingerprintMatrix
+
+        matrix = FingerprintMatrix.from_fingerprints(fingerprints, characters=characters, words=words)
+        return create_corpus_adjacency(fingerprints, self.tables, matrix=matrix).adjacency
+
+    def _vocabulary(self, fingerprints: Sequence[Fingerprint]):
+        from matrix import FingerprintMatrix
+
+        matrix = FingerprintMatrix.from_fingerprints(fingerprints)
+        # Words by the number of fingerprints using them, in either word table
+        usage = sum((matrix.table(table) != 0).astype(np.int64) for table in WORD_TABLES)
+        counts = np.asarray(usage.sum(axis=0)).ravel()
+        top = np.argsort(-counts, kind='stable')[:self.max_words]
+        return list(matrix.characters), [matrix.words[column] for column in sorted(top)]
+
+    def _fit(self, fingerprints: Sequence[Fingerprint]):
+        # Returns everything a fit replaces, so it can be swapped in at once
+        from umap import UMAP
+
+        characters, words = self._vocabulary(fingerprints)
+        features = self._features(fingerprints, characters, words)
+        options = dict(self.options)
+        options.setdefault('metric', 'cosine')
+        options.setdefault('n_neighbors', max(2, min(15, len(fingerprints) - 1)))
+        model = UMAP(n_components=self.n_components, random_state=self.random_state, **options)
+        embedding = model.fit_transform(features)
+        return model, characters, words, embedding
+
+    def fit(self, fingerprints: Sequence[Fingerprint]) -> 'AuthorMap':
+        fingerprints = list(fingerprints)
+        fitted = self._fit(fingerprints)
+        with self._lock:
+            self.model, self.characters, self.words, self.embedding = fitted
+            self.reference = []
+            self.seen = 0
+            self._sample(fingerprints)
+            self.added_since_fit = 0
+            self.fitted_at = time.time()
+        return self
+
+    def transform(self, fingerprints: Sequence[Fingerprint]) -> np.ndarray:
+        # Coordinates of new fingerprints on the fitted map
+        with self._lock:
+            if self.model is None:
+                raise RuntimeError("AuthorMap has not been fitted")
+            model, characters, words = self.model, self.characters, self.words
+        return model.transform(self._features(list(fingerprints), characters, words))
+
+    def _sample(self, fingerprints: Sequence[Fingerprint]):
+        # Reservoir sampling keeps a uniform sample of everything ever added
+        for fingerprint in fingerprints:
+            self.seen += 1
+            if len(self.reference) < self.max_reference:
+                self.reference.append(fingerprint)
+            else:
+                slot = self._rng.randrange(self.seen)
+                if slot < self.max_reference:
+                    self.reference[slot] = fingerprint
+
+    def add(self, fingerprints: Sequence[Fingerprint]):
+        # New fingerprints for the next refit; they do not move the current map
+        with self._lock:
+            fingerprints = list(fingerprints)
+            self._sample(fingerprints)
+            self.added_since_fit += len(fingerprints)
+
+    def refit_due(self, fraction: float = REFIT_FRACTION, seconds: float = REFIT_SECONDS) -> bool:
+        if self.model is None or not self.added_since_fit:
+            return False
+        return (self.added_since_fit >= fraction * max(self.seen - self.added_since_fit, 1) or
+                time.time() - self.fitted_at >= seconds)
+
+    def refit(self):
+        with self._lock:
+            reference, added = list(self.reference), self.added_since_fit
+        fitted = self._fit(reference)
+        with self._lock:
+            self.model, self.characters, self.words, self.embedding = fitted
+            # Fingerprints added during the fit count towards the next one
+            self.added_since_fit -= added
+            self.fitted_at = time.time()
+
+    def maybe_refit(self, background: bool = False, **due) -> bool:
+        """
+        Refit if refit_due(**due); with background=True, on a thread while transform()
+        keeps using the current model. Returns whether a refit was started.
+        """
+        with self._refit_lock:
+            if not self.refit_due(**due) or (self._refit_thread is not None and self._refit_thread.is_alive()):
+                return False
+            if background:
+                self._refit_thread = threading.Thread(target=self.refit, daemon=True)
+                self._refit_thread.start()
+            else:
+                self.refit()
+        return True
+
+    def save(self, path: str):
+        # Write to a scratch file and rename it, so readers never load half a model
+        with self._lock:
+            state = {key: value for key, value in self.__dict__.items() if key not in ('_lock', '_refit_lock', '_refit_thread')}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        descriptor, scratch = tempfile.mkstemp(dir=directory)
+        with os.fdopen(descriptor, 'wb') as model_file:
+            pickle.dump((MODEL_VERSION, state), model_file)
+        os.replace(scratch, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'AuthorMap':
+        with open(path, 'rb') as model_file:
+            version, state = pickle.load(model_file)
+        if version != MODEL_VERSION:
+            raise ValueError(f"{path} holds an AuthorMap of version {version}, expected {MODEL_VERSION}")
+        author_map = cls.__new__(cls)
+        author_map.__dict__.update(state)
+        author_map._lock = threading.Lock()
+        author_map._refit_lock = threading.Lock()
+        author_map._refit_thread = None
+        return author_map
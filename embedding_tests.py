@@ -0,0 +1,107 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+import numpy as np
+from embedding import AuthorMap, MODEL_VERSION
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+
+
+def make_texts(count, offset=0):
+    texts = []
+    for index in range(offset, offset + count):
+        if index % 2:
+            texts.append(f"Post number {index}: the cats are running, dogs were barking at {index * 7} birds!")
+        else:
+            texts.append(f"i am so tired of exams lol {index} cant wait for summer")
+    return texts
+
+
+class AuthorMapTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fingerprints = Fingerprint.from_texts(make_texts(24))
+        cls.new_fingerprints = Fingerprint.from_texts(make_texts(4, offset=100))
+        cls.author_map = AuthorMap(random_state=0, max_words=50).fit(cls.fingerprints)
+
+    def test_fit_and_transform(self):
+        self.assertEqual(self.author_map.embedding.shape, (24, 2))
+        self.assertLessEqual(len(self.author_map.words), 50)
+
+        coordinates = self.author_map.transform(self.new_fingerprints)
+        self.assertEqual(coordinates.shape, (4, 2))
+        self.assertTrue(np.isfinite(coordinates).all())
+
+    def test_transform_before_fit(self):
+        with self.assertRaises(RuntimeError):
+            AuthorMap().transform(self.new_fingerprints)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'map.pkl')
+            self.author_map.save(path)
+            loaded = AuthorMap.load(path)
+
+            self.assertEqual(loaded.words, self.author_map.words)
+            np.testing.assert_allclose(loaded.transform(self.new_fingerprints),
+                                       self.author_map.transform(self.new_fingerprints), atol=1e-4)
+
+            with open(path, 'wb') as model_file:
+                pickle.dump((MODEL_VERSION + 1, {}), model_file)
+            with self.assertRaises(ValueError):
+                AuthorMap.load(path)
+
+    def test_add_and_refit(self):
+        author_map = AuthorMap(random_state=0, max_reference=30).fit(self.fingerprints)
+        self.assertFalse(author_map.refit_due())
+
+        author_map.add(Fingerprint.from_texts(make_texts(2, offset=200)))
+        self.assertFalse(author_map.refit_due())
+        self.assertTrue(author_map.refit_due(seconds=0))
+
+        author_map.add(Fingerprint.from_texts(make_texts(10, offset=300)))
+        self.assertEqual(len(author_map.reference), 30)
+        self.assertEqual(author_map.seen, 36)
+        self.assertTrue(author_map.refit_due())
+
+        self.assertTrue(author_map.maybe_refit(background=True))
+        author_map._refit_thread.join()
+        self.assertEqual(author_map.added_since_fit, 0)
+        self.assertEqual(author_map.embedding.shape, (30, 2))
+        self.assertFalse(author_map.maybe_refit())
+
+    def test_concurrent_callers_start_one_refit(self):
+        author_map = AuthorMap(random_state=0).fit(self.fingerprints)
+        author_map.add(self.new_fingerprints)
+        barrier = threading.Barrier(8)
+        refits, results = [], []
+
+        class SlowStart(threading.Thread):
+            # Widens the gap between checking for a running refit and starting one
+            def start(self):
+                time.sleep(0.05)
+                super().start()
+
+        def call():
+            barrier.wait()
+            results.append(author_map.maybe_refit(background=True, seconds=0))
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        with mock.patch('embedding.threading', SimpleNamespace(Thread=SlowStart)), \
+                mock.patch.object(author_map, 'refit', lambda: refits.append(time.sleep(1))):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            author_map._refit_thread.join()
+
+        self.assertEqual(sorted(results), [False] * 7 + [True])
+        self.assertEqual(len(refits), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import re
+from html.parser import HTMLParser
+from typing import Iterable, Union
+
+
+# Elements whose text is never page content. Forms are kept: many pages wrap their whole body in one
+SKIPPED_TAGS = frozenset(['script', 'style', 'noscript', 'template', 'svg', 'math', 'canvas', 'iframe',
+                          'object', 'nav', 'header', 'footer', 'aside', 'button', 'select'])
+
+# Elements allowed in <head>; any other start tag begins the body, as in browsers, since
+# </head> is optional and often missing
+HEAD_TAGS = frozenset(['head', 'title', 'meta', 'link', 'base', 'style', 'script', 'noscript', 'template'])
+
+# Elements that start a new line of text
+BLOCK_TAGS = frozenset(['p', 'div', 'br', 'hr', 'li', 'ul', 'ol', 'dl', 'dt', 'dd', 'tr', 'td', 'th', 'table',
+                        'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'pre', 'blockquote', 'section', 'article', 'main',
+                        'figcaption', 'address'])
+
+# Longest text extracted from a page, in characters
+MAX_CHARS = 200_000
+
+# Characters of HTML fed to the parser at a time
+FEED_SIZE = 64 * 1024
+
+_SPACES = re.compile(r'[^\S\n]+')
+_LINES = re.compile(r' *\n\s*')
+
+
+class TextExtractor(HTMLParser):
+    """
+    Collects the visible text of an HTML document as it is fed, skipping scripts,
+    styles, navigation and other non-content elements.
+
+    Text is gathered one block at a time with whitespace collapsed, and parsing stops
+    as soon as max_chars characters are collected. Memory is bounded by max_chars plus
+    one unparsed tag, however large the document.
+    """
+
+    def __init__(self, max_chars: int = MAX_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.skip_depth = 0
+        self.in_head = False
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        self._track_head(tag)
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_startendtag(self, tag, attrs):
+        self._track_head(tag)
+        if tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.in_head = False
+        elif tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_data(self, data):
+        if self.skip_depth or self.in_head or self.done:
+            return
+        data = _SPACES.sub(' ', data)
+        if not data.strip() and (not self.parts or self.parts[-1].endswith((' ', '\n'))):
+            return
+        self.parts.append(data)
+        self.length += len(data)
+        if self.length >= self.max_chars:
+            self.done = True
+
+    def _track_head(self, tag):
+        if tag == 'head':
+            self.in_head = True
+        elif tag not in HEAD_TAGS:
+            self.in_head = False
+
+    def _newline(self):
+        if self.parts and not self.parts[-1].endswith('\n'):
+            self.parts.append('\n')
+            self.length += 1
+
+    def text(self) -> str:
+        text = _LINES.sub('\n', ''.join(self.parts)).strip()
+        return text[:self.max_chars]
+
+
+def html_to_text(html: Union[str, Iterable[str]], max_chars: int = MAX_CHARS) -> str:
+    """
+    Extract the visible text of an HTML page, from a string or an iterable of chunks
+    (e.g. a streamed response), reading no further than needed for max_chars.
+    """
+    chunks = (html[start:start + FEED_SIZE] for start in range(0, len(html), FEED_SIZE)) if isinstance(html, str) else html
+    extractor = TextExtractor(max_chars)
+    for chunk in chunks:
+        extractor.feed(chunk)
+        if extractor.done:
+            break
+    else:
+        extractor.close()
+    return extractor.text()
@@ -0,0 +1,57 @@
+import unittest
+from extract import TextExtractor, html_to_text
+from testing import setUpModule  # noqa: F401
+
+
+class HtmlToTextTests(unittest.TestCase):
+    def test_drops_non_content(self):
+        html = ('<html><head><title>T</title><style>p {color: red}</style><script>var x = "<p>no</p>";</script></head>'
+                '<body><nav><a href="/">Home</a></nav><p>First   paragraph &amp; more.</p>'
+                '<p>Second<br>line <b>bold</b></p><footer>(c) 2024</footer></body></html>')
+        self.assertEqual(html_to_text(html), "First paragraph & more.\nSecond\nline bold")
+
+    def test_keeps_a_body_wrapped_in_a_form(self):
+        # As ASP.NET WebForms pages are
+        html = ('<html><head><title>T</title></head><body><form method="post" action="./article.aspx">'
+                '<input type="hidden" name="__VIEWSTATE" value="abc"><h1>Headline</h1><p>Story text.</p>'
+                '<button>Subscribe</button></form></body></html>')
+        self.assertEqual(html_to_text(html), "Headline\nStory text.")
+
+    def test_body_starts_without_a_closing_head(self):
+        pages = ('<html><head><title>T</title><meta charset="utf-8"><body><p>Story text.</p></body></html>',
+                 '<html><head><title>T</title><link rel="stylesheet" href="a.css">\n<p>Story text.</p>',
+                 '<head><title>T</title><br/>Story text.')
+        for html in pages:
+            with self.subTest(html):
+                self.assertEqual(html_to_text(html), "Story text.")
+
+    def test_max_chars(self):
+        html = '<p>' + 'word ' * 10_000 + '</p>'
+        self.assertEqual(len(html_to_text(html, max_chars=100)), 100)
+
+    def test_chunked_feed(self):
+        html = '<div>Hello <i>wor</i>ld</div><script>skip()</script><p>Bye</p>'
+        chunks = [html[start:start + 3] for start in range(0, len(html), 3)]
+        self.assertEqual(html_to_text(chunks), html_to_text(html))
+        self.assertEqual(html_to_text(chunks), "Hello world\nBye")
+
+    def test_stops_reading_when_full(self):
+        fed = []
+
+        def chunks():
+            for index in range(1000):
+                fed.append(index)
+                yield '<p>' + 'x' * 100 + '</p>'
+
+        html_to_text(chunks(), max_chars=250)
+        self.assertLess(len(fed), 5)
+
+    def test_unclosed_void_tags(self):
+        extractor = TextExtractor()
+        extractor.feed('<p>A<img src="a.png"><input>B</p><p>C')
+        extractor.close()
+        self.assertEqual(extractor.text(), "AB\nC")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+from cache import default_cache_dir
+
+
+# (connect, read) timeouts in seconds for every request
+DEFAULT_TIMEOUT = (5.0, 15.0)
+
+# Largest response body read, in bytes; longer pages are cut off
+MAX_BYTES = 5 * 1024 * 1024
+
+# Seconds a fetch may take in all, however steadily a slow server keeps sending
+DEADLINE = 60.0
+
+# URLs fetched at once, and connections kept open per host
+MAX_WORKERS = 8
+
+# Largest total size of the bodies kept in the HTTP cache
+HTTP_CACHE_SIZE = 256 * 1024 * 1024
+
+USER_AGENT = 'DIDit/1.0 (+https://github.com/soundofnothing/DIDit)'
+
+
+class FetchResult(NamedTuple):
+    url: str
+    text: Optional[str]
+    status: Optional[int] = None
+    from_cache: bool = False
+    truncated: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def default_http_cache_path() -> Optional[str]:
+    # DIDIT_HTTP_CACHE=off turns the cache off
+    path = os.environ.get('DIDIT_HTTP_CACHE', os.path.join(default_cache_dir(), 'http'))
+    return None if path == 'off' else path
+
+
+class HttpCache:
+    """
+    An on-disk cache of fetched pages, revalidated with ETag and Last-Modified.
+
+    Only responses carrying a validator are stored. A cached page is not trusted
+    blindly: every fetch asks the server whether it changed (If-None-Match /
+    If-Modified-Since). A 304 reply costs a round trip but no body, and the cached
+    text is reused. Each entry is a .json file of headers next to a .body file. When
+    the bodies outgrow max_bytes, the least recently used entries are removed.
+
+    Args:
+        path (str): Directory of the cache; created if missing.
+        max_bytes (int): Largest total size of the cached bodies.
+    """
+
+    def __init__(self, path: str, max_bytes: int = HTTP_CACHE_SIZE):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+    def _files(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, key + '.json'), os.path.join(self.path, key + '.body')
+
+    def get(self, url: str) -> Optional[Tuple[dict, bytes]]:
+        meta_path, body_path = self._files(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            with open(body_path, 'rb') as body_file:
+                body = body_file.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url:
+            return None
+        os.utime(meta_path)
+        return meta, body
+
+    def validators(self, url: str, max_bytes: Optional[int] = None) -> dict:
+        # Conditional request headers for a cached URL; none for a body cut off below max_bytes
+        entry = self.get(url)
+        if entry is None:
+            return {}
+        meta, _ = entry
+        if max_bytes is not None and meta.get('truncated') and meta.get('max_bytes', 0) < max_bytes:
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def put(self, url: str, meta: dict, body: bytes):
+        meta_path, body_path = self._files(url)
+        # Write each file under a temporary name first, so readers never see half an entry
+        for path, data in ((body_path, body), (meta_path, json.dumps(dict(meta, url=url)).encode('utf-8'))):
+            descriptor, scratch = tempfile.mkstemp(dir=self.path)
+            with os.fdopen(descriptor, 'wb') as scratch_file:
+                scratch_file.write(data)
+            os.replace(scratch, path)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith('.json'):
+                meta_path = os.path.join(self.path, name)
+                body_path = meta_path[:-len('.json')] + '.body'
+                try:
+                    entries.append((os.path.getmtime(meta_path), os.path.getsize(body_path), meta_path, body_path))
+                except OSError:
+                    continue
+        total = sum(size for _, size, _, _ in entries)
+        for _, size, meta_path, body_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in (meta_path, body_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.path):
+            os.remove(os.path.join(self.path, name))
+
+
+_session = None
+_session_lock = threading.Lock()
+_http_cache = None
+
+
+def get_session():
+    """
+    The process-wide requests.Session, with a connection pool large enough for
+    MAX_WORKERS concurrent fetches.
+    """
+    global _session
+    with _session_lock:
+        if _session is None or _session.pid != os.getpid():
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            session.pid = os.getpid()
+            _session = session
+    return _session
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    global _http_cache
+    if _http_cache is None:
+        path = default_http_cache_path()
+        if path is None:
+            return None
+        _http_cache = HttpCache(path)
+    return _http_cache
+
+
+def _decode(body: bytes, encoding: Optional[str]) -> str:
+    # A charset Python does not know is read as UTF-8
+    try:
+        return body.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+def fetch_text(url: str, timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT, max_bytes: int = MAX_BYTES,
+               cache: Union[HttpCache, None, bool] = True, session=None, deadline: float = DEADLINE) -> FetchResult:
+    """
+    Fetch a page as text. Never raises on network errors; they are returned in FetchResult.error.
+
+    Args:
+        url (str): Page to fetch.
+        timeout (float or tuple): Seconds to wait for the connection and for each read.
+        max_bytes (int): Largest body read; the rest of a longer page is dropped.
+        cache (HttpCache): Cache to revalidate against; True for get_http_cache(), None or False for none.
+        session: requests.Session to use (default get_session()).
+        deadline (float): Seconds after which the fetch gives up, checked between reads, so
+            it returns within deadline plus one read timeout.
+    """
+    import requests
+    import urllib3
+
+    give_up = time.monotonic() + deadline
+    cache = get_http_cache() if cache is True else (cache or None)
+    session = session or get_session()
+    headers = cache.validators(url, max_bytes) if cache is not None else {}
+    try:
+        with session.get(url, timeout=timeout, stream=True, headers=headers) as response:
+            if response.status_code == 304 and headers:
+                entry = cache.get(url)
+                if entry is not None:
+                    meta, body = entry
+                    truncated = meta.get('truncated', False) or len(body) > max_bytes
+                    return FetchResult(url, _decode(body[:max_bytes], meta.get('encoding')), 304, from_cache=True,
+                                       truncated=truncated)
+            response.raise_for_status()
+
+            # read1 returns what has arrived instead of waiting for a full chunk, so the deadline is
+            # checked at least once per read timeout
+            chunks, size, truncated = [], 0, False
+            while True:
+                if time.monotonic() > give_up:
+                    return FetchResult(url, None, response.status_code,
+                                       error=f"Gave up after {deadline:g} s reading {url}")
+                chunk = response.raw.read1(64 * 1024, decode_content=True)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    # A body ending exactly at the cap is only whole if nothing follows
+                    truncated = size > max_bytes or bool(response.raw.read1(1, decode_content=True))
+                    break
+            body = b''.join(chunks)[:max_bytes]
+            # Without a declared charset, requests falls back to ISO-8859-1 for text/*; web pages are mostly UTF-8
+            encoding = response.encoding if 'charset' in response.headers.get('Content-Type', '') else None
+
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            if cache is not None and (etag or last_modified) and 'no-store' not in response.headers.get('Cache-Control', ''):
+                cache.put(url, {'etag': etag, 'last_modified': last_modified, 'encoding': encoding,
+                                'truncated': truncated, 'max_bytes': max_bytes}, body)
+            return FetchResult(url, _decode(body, encoding), response.status_code, truncated=truncated)
+    except (requests.RequestException, urllib3.exceptions.HTTPError) as error:
+        # The body is read from the urllib3 response, whose errors requests does not wrap
+        return FetchResult(url, None, getattr(getattr(error, 'response', None), 'status_code', None), error=str(error))
+
+
+def fetch_all(urls: Iterable[str], max_workers: int = MAX_WORKERS, **options) -> List[FetchResult]:
+    """
+    Fetch many pages at once on a thread pool, returning the results in input order.
+    A slow or failing page only costs its own timeout. Options are passed on to fetch_text.
+    """
+    urls = list(urls)
+    if len(urls) <= 1:
+        return [fetch_text(url, **options) for url in urls]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        return list(executor.map(lambda url: fetch_text(url, **options), urls))
@@ -0,0 +1,181 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fetch import HttpCache, fetch_all, fetch_text
+from testing import setUpModule  # noqa: F401
+
+PAGE = '<html><body><p>Héllo wörld</p></body></html>'.encode('utf-8')
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        Handler.requests.append((self.path, dict(self.headers)))
+        if self.path == '/page':
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.reply(PAGE, ETag='"v1"')
+        elif self.path == '/dated':
+            if self.headers.get('If-Modified-Since') == 'Mon, 01 Jan 2024 00:00:00 GMT':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.reply(PAGE, **{'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+        elif self.path == '/big':
+            self.reply(b'x' * 100_000)
+        elif self.path == '/trickle':
+            # A byte at a time, each well within the read timeout
+            self.send_response(200)
+            self.send_header('Content-Length', '1000')
+            self.end_headers()
+            for _ in range(1000):
+                self.wfile.write(b'x')
+                self.wfile.flush()
+                time.sleep(0.05)
+        elif self.path in ('/stalled', '/cut-short'):
+            self.send_response(200)
+            self.send_header('Content-Length', '1000')
+            self.end_headers()
+            self.wfile.write(b'x' * 10)
+            self.wfile.flush()
+            if self.path == '/stalled':
+                time.sleep(1)
+            self.close_connection = True
+        elif self.path == '/bogus-charset':
+            self.reply(PAGE, **{'Content-Type': 'text/html; charset=bogus'})
+        elif self.path == '/exactly-1000':
+            # The first read ends exactly at the cap, and more follows
+            self.send_response(200)
+            self.send_header('Content-Length', '2000')
+            self.end_headers()
+            self.wfile.write(b'x' * 1000)
+            self.wfile.flush()
+            time.sleep(0.1)
+            self.wfile.write(b'y' * 1000)
+        elif self.path == '/versioned-big':
+            if self.headers.get('If-None-Match') == '"big"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.reply(b'x' * 100_000, ETag='"big"')
+        elif self.path == '/slow':
+            time.sleep(1)
+            self.reply(PAGE)
+        else:
+            self.send_error(404)
+
+    def reply(self, body, **headers):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FetchTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Handler.requests.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_etag_revalidation(self):
+        first = fetch_text(self.base + '/page', cache=self.cache)
+        self.assertEqual((first.text, first.status, first.from_cache), (PAGE.decode('utf-8'), 200, False))
+        second = fetch_text(self.base + '/page', cache=self.cache)
+        self.assertEqual((second.text, second.status, second.from_cache), (first.text, 304, True))
+        self.assertEqual(Handler.requests[1][1].get('If-None-Match'), '"v1"')
+
+    def test_last_modified_revalidation(self):
+        fetch_text(self.base + '/dated', cache=self.cache)
+        self.assertTrue(fetch_text(self.base + '/dated', cache=self.cache).from_cache)
+
+    def test_size_cap(self):
+        result = fetch_text(self.base + '/big', max_bytes=1000, cache=None)
+        self.assertEqual(len(result.text), 1000)
+        self.assertTrue(result.truncated)
+
+    def test_deadline_stops_a_trickling_server(self):
+        start = time.perf_counter()
+        result = fetch_text(self.base + '/trickle', timeout=1.0, deadline=0.5, cache=None)
+        self.assertLess(time.perf_counter() - start, 1.5)
+        self.assertFalse(result.ok)
+        self.assertIn('Gave up', result.error)
+
+    def test_body_cut_off_below_a_larger_cap_is_refetched(self):
+        url = self.base + '/versioned-big'
+        self.assertTrue(fetch_text(url, max_bytes=1000, cache=self.cache).truncated)
+        smaller = fetch_text(url, max_bytes=500, cache=self.cache)
+        self.assertEqual((len(smaller.text), smaller.truncated, smaller.from_cache), (500, True, True))
+
+        larger = fetch_text(url, max_bytes=200_000, cache=self.cache)
+        self.assertEqual((len(larger.text), larger.truncated, larger.from_cache), (100_000, False, False))
+        self.assertNotIn('If-None-Match', Handler.requests[-1][1])
+
+    def test_broken_bodies_are_returned_as_errors(self):
+        stalled = fetch_text(self.base + '/stalled', timeout=0.3, cache=None)
+        self.assertFalse(stalled.ok)
+        cut_short = fetch_text(self.base + '/cut-short', cache=None)
+        self.assertFalse(cut_short.ok)
+
+    def test_unknown_charset_is_read_as_utf8(self):
+        result = fetch_text(self.base + '/bogus-charset', cache=None)
+        self.assertEqual(result.text, PAGE.decode('utf-8'))
+
+    def test_body_reaching_the_cap_exactly_is_truncated(self):
+        result = fetch_text(self.base + '/exactly-1000', max_bytes=1000, cache=None)
+        self.assertEqual(result.text, 'x' * 1000)
+        self.assertTrue(result.truncated)
+
+    def test_errors_are_returned(self):
+        result = fetch_text(self.base + '/missing', cache=None)
+        self.assertFalse(result.ok)
+        self.assertEqual(result.status, 404)
+
+    def test_concurrent_fetches_with_timeout(self):
+        urls = [self.base + '/slow'] + [self.base + '/page'] * 4
+        start = time.perf_counter()
+        results = fetch_all(urls, timeout=0.3, cache=None)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertFalse(results[0].ok)
+        self.assertTrue(all(result.ok for result in results[1:]))
+        self.assertEqual([result.url for result in results], urls)
+
+    def test_cache_eviction(self):
+        cache = HttpCache(self.directory.name, max_bytes=len(PAGE))
+        cache.put('http://a', {'etag': 'a'}, PAGE)
+        # Make the first entry the least recently used
+        for name in os.listdir(self.directory.name):
+            os.utime(os.path.join(self.directory.name, name), (0, 0))
+        cache.put('http://b', {'etag': 'b'}, PAGE)
+        self.assertIsNone(cache.get('http://a'))
+        self.assertIsNotNone(cache.get('http://b'))
+
+
+if __name__ == '__main__':
+    unittest.main()
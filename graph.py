@@ -1,43 +1,88 @@
-import networkx as nx
-import numpy as np
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from signature import Fingerprint
-from typing import Dict
-from umap import UMAP
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union, TYPE_CHECKING
 
+# networkx, numpy, scipy and umap are imported where they are used, so that importing
+# this module stays cheap for callers that never build a graph
+if TYPE_CHECKING:
+    import networkx as nx
+
+    import numpy as np
+    from scipy import sparse
+
+CHARACTER_TABLES = ('CHARACTER_FREQUENCY', 'NORMALIZED_CHARACTER_FREQUENCY')
+WORD_TABLES = ('WORD_FREQUENCY', 'NORMALIZED_WORD_FREQUENCY')
+
+
+class GraphEmbedding(NamedTuple):
+    # A weighted graph as a sparse, symmetric adjacency matrix, and the name of each node
+    adjacency: 'sparse.csr_matrix'
+    nodes: List[str]
+
+    def to_networkx(self) -> 'nx.Graph':
+        import networkx as nx
+
+        graph = nx.from_scipy_sparse_array(self.adjacency)
+        return nx.relabel_nodes(graph, dict(enumerate(self.nodes)))
+
+
+def _as_fingerprint(fingerprint: Union[Fingerprint, str]) -> Fingerprint:
+    # Text is still accepted, but fingerprinting it here repeats work the caller has usually done
+    return Fingerprint.from_text(fingerprint) if isinstance(fingerprint, str) else fingerprint
+
+
+def create_frequency_graph(frequencies: Dict[str, int]) -> 'nx.DiGraph':
+    import networkx as nx
 
-def create_frequency_graph(frequencies: Dict[str, int]) -> nx.DiGraph:
     graph = nx.DiGraph()
-    for datapoint, frequency in frequencies.items():
+    for datapoint, frequency in dict(frequencies).items():
         graph.add_node(datapoint, frequency=frequency)
     return graph
 
-def create_char_graph_embedding(text: str) -> nx.DiGraph:
-    fingerprint = Fingerprint.from_text(text)
-    char_graph = nx.DiGraph()
-    normed_char_graph = nx.DiGraph()
-    
-    # Add nodes to the graph
-    normed_char_graph = create_frequency_graph(fingerprint.NORMALIZED_CHARACTER_FREQUENCY.items())
-    char_graph = create_frequency_graph(fingerprint.CHARACTER_FREQUENCY.items())
-    
-    return nx.tensor_product(normed_char_graph, nx.union(normed_char_graph, char_graph))
-
-
-def create_word_graph_embedding(text: str) -> nx.DiGraph:
-    fingerprint = Fingerprint.from_text(text)
-    word_graph = nx.DiGraph()
-    normed_word_graph = nx.DiGraph()
-    
-    # Add nodes to the graph
-    normed_word_graph = create_frequency_graph(fingerprint.NORMALIZED_WORD_FREQUENCY.items())
-    word_graph = create_frequency_graph(fingerprint.WORD_FREQUENCY.items())
-    
-    return nx.tensor_product(normed_word_graph, nx.union(normed_word_graph, word_graph))
-
-
-def create_stopword_nonletter_graph(text: str) -> nx.DiGraph:
-    fingerprint = Fingerprint.from_text(text)
+
+def create_table_graph_embedding(fingerprint: Fingerprint, tables: Sequence[str],
+                                 vocabulary: Optional[List[str]] = None) -> GraphEmbedding:
+    """
+    The bipartite graph joining each table of a fingerprint to the keys it counts.
+
+    Nodes are the table names, then the keys: the union of the tables' keys, or a fixed
+    vocabulary shared by many fingerprints. Each table is linked to every key it holds,
+    weighted by the key's frequency, so the adjacency holds two entries per table key,
+    and not the product of the vocabulary sizes.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    if vocabulary is None:
+        vocabulary = list(dict.fromkeys(key for table in tables for key in getattr(fingerprint, table)))
+    index = {key: position for position, key in enumerate(vocabulary, start=len(tables))}
+
+    rows, columns, weights = [], [], []
+    for row, table in enumerate(tables):
+        for key, frequency in getattr(fingerprint, table).items():
+            column = index.get(key)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+                weights.append(frequency)
+    size = len(tables) + len(vocabulary)
+    upper = sparse.csr_matrix((np.asarray(weights, dtype=np.float64), (rows, columns)), shape=(size, size))
+    return GraphEmbedding((upper + upper.T).tocsr(), list(tables) + list(vocabulary))
+
+
+def create_char_graph_embedding(fingerprint: Fingerprint, vocabulary: Optional[List[str]] = None) -> GraphEmbedding:
+    # The character and normalized character tables, joined to their characters
+    return create_table_graph_embedding(_as_fingerprint(fingerprint), CHARACTER_TABLES, vocabulary)
+
+
+def create_word_graph_embedding(fingerprint: Fingerprint, vocabulary: Optional[List[str]] = None) -> GraphEmbedding:
+    # The word and normalized word tables, joined to their words
+    return create_table_graph_embedding(_as_fingerprint(fingerprint), WORD_TABLES, vocabulary)
+
+
+def create_stopword_nonletter_graph(fingerprint: Fingerprint) -> 'nx.DiGraph':
+    import networkx as nx
+
+    fingerprint = _as_fingerprint(fingerprint)
     stopword_nonletter_graph = nx.DiGraph()
 
     # Add nodes for stopwords and non-letter characters
@@ -50,8 +95,40 @@ def create_stopword_nonletter_graph(text: str) -> nx.DiGraph:
     return stopword_nonletter_graph
 
 
-def convert_numpy_to_umap(graph: nx.DiGraph) -> np.ndarray:
-    #TODO calculate adjacency matrix from graph
-    umap_embedding = UMAP(n_components=2, metric='precomputed').fit_transform(adjacency_matrix)
-    return umap_embedding
+def create_corpus_adjacency(fingerprints: Sequence[Fingerprint], tables: Sequence[str] = CHARACTER_TABLES + WORD_TABLES,
+                            matrix=None) -> GraphEmbedding:
+    """
+    The fingerprints × (table, key) biadjacency of a corpus: row i holds fingerprint i's
+    tables side by side on the corpus vocabulary. It is the per-fingerprint graphs above
+    stacked on one vocabulary, and the input convert_numpy_to_umap maps authors from.
+    """
+    from scipy import sparse
+    from matrix import FingerprintMatrix
+
+    matrix = matrix or FingerprintMatrix.from_fingerprints(fingerprints)
+    nodes = []
+    for table in tables:
+        keys = matrix.characters if table in FingerprintMatrix.CHARACTER_TABLES else matrix.words
+        nodes += [f'{table}:{key}' for key in keys]
+    return GraphEmbedding(sparse.hstack([matrix.table(table) for table in tables]).tocsr(), nodes)
 
+
+def convert_numpy_to_umap(adjacency: Union[GraphEmbedding, 'sparse.spmatrix', 'np.ndarray'], n_components: int = 2,
+                          metric: str = 'cosine', random_state: Optional[int] = None, **options) -> 'np.ndarray':
+    """
+    Project the rows of an adjacency (e.g. create_corpus_adjacency, or a graph embedding's
+    nodes) to n_components dimensions with UMAP. Sparse matrices are passed to UMAP as they
+    are, without densifying. Options are passed on to umap.UMAP.
+    """
+    from umap import UMAP
+
+    if isinstance(adjacency, GraphEmbedding):
+        adjacency = adjacency.adjacency
+    rows = adjacency.shape[0]
+    # UMAP needs more rows than neighbours; its spectral initialisation needs a few more than components
+    options.setdefault('n_neighbors', max(2, min(15, rows - 1)))
+    if rows <= n_components + 2:
+        options.setdefault('init', 'random')
+    umap_embedding = UMAP(n_components=n_components, metric=metric, random_state=random_state,
+                          **options).fit_transform(adjacency)
+    return umap_embedding
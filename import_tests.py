@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+import unittest
+from testing import setUpModule  # noqa: F401
+
+# Cold-start budget for importing a module, in milliseconds
+IMPORT_BUDGET_MS = float(os.environ.get('DIDIT_IMPORT_BUDGET_MS', 500))
+
+# Dependencies that must only load when a feature needs them
+HEAVY_MODULES = {'textblob', 'nltk', 'umap', 'sklearn', 'networkx', 'matplotlib', 'seaborn', 'plotly', 'pandas'}
+
+
+def measure_import(module: str):
+    """
+    Import a module in a fresh interpreter under `python -X importtime`.
+
+    Returns the cumulative import time of the module in milliseconds and the
+    set of top-level packages that were imported along with it.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+
+    cumulative_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imported.add(name.strip().split('.')[0])
+        if name.strip() == module:
+            cumulative_us = int(cumulative)
+    return cumulative_us / 1000, imported
+
+
+class ImportTimeTests(unittest.TestCase):
+    def assert_cheap_import(self, module: str):
+        milliseconds, imported = measure_import(module)
+        self.assertFalse(imported & HEAVY_MODULES, f'{module} imports {sorted(imported & HEAVY_MODULES)}')
+        self.assertLess(milliseconds, IMPORT_BUDGET_MS, f'importing {module} took {milliseconds:.0f} ms')
+
+    def test_signature(self):
+        self.assert_cheap_import('signature')
+
+    def test_graph(self):
+        self.assert_cheap_import('graph')
+
+    def test_visualize(self):
+        self.assert_cheap_import('visualize')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+import math
+from collections import Counter, deque
+from typing import Dict, Iterable, Iterator, NamedTuple, Union
+from signature import (STOPWORDS, FeatureTables, Fingerprint, TextAnalysis, _nonletter_frequencies,
+                       _relative_frequencies, _stopword_frequencies)
+
+
+_STOPWORD_SET = frozenset(STOPWORDS)
+
+
+class ChunkCounts(NamedTuple):
+    # Character and word counts of one chunk of text, before and after normalization
+    characters: Counter
+    words: Counter
+    normalized_characters: Counter
+    normalized_words: Counter
+
+    @classmethod
+    def from_text(cls, text: str):
+        analysis = TextAnalysis.from_text(text)
+        return cls(
+            characters=Counter(analysis.text),
+            words=Counter(analysis.words),
+            normalized_characters=Counter(analysis.normalized_text),
+            normalized_words=Counter(analysis.normalized_words)
+        )
+
+
+class _RunningPair:
+    """
+    Running counts of a table and its normalized counterpart.
+
+    Besides the counts, it keeps their totals, the dot product of the two count
+    vectors and their squared norms, so the cosine similarity of the pair is read
+    without a pass over the tables. Counts are integers, so these stay exact however
+    many chunks are added and removed.
+    """
+
+    def __init__(self):
+        self.raw = Counter()
+        self.normalized = Counter()
+        self.raw_total = 0
+        self.normalized_total = 0
+        self.dot = 0
+        self.raw_norm = 0
+        self.normalized_norm = 0
+
+    def check(self, raw: Counter, normalized: Counter, sign: int):
+        # Raises before anything changes if the update would leave a count below zero
+        for counts, table in ((raw, self.raw), (normalized, self.normalized)):
+            for key, count in counts.items():
+                if table.get(key, 0) + sign * count < 0:
+                    raise ValueError(f"{key!r} removed more often than it was added")
+
+    def update(self, raw: Counter, normalized: Counter, sign: int):
+        self.check(raw, normalized, sign)
+        for key, count in raw.items():
+            old = self.raw[key]
+            new = old + sign * count
+            self.dot += (new - old) * self.normalized.get(key, 0)
+            self.raw_norm += new * new - old * old
+            _set_count(self.raw, key, new)
+            self.raw_total += new - old
+        for key, count in normalized.items():
+            old = self.normalized[key]
+            new = old + sign * count
+            self.dot += (new - old) * self.raw.get(key, 0)
+            self.normalized_norm += new * new - old * old
+            _set_count(self.normalized, key, new)
+            self.normalized_total += new - old
+
+    def cosine_similarity(self) -> float:
+        # Cosine similarity is scale-free, so the counts give the same value as the relative frequencies
+        if self.raw_norm == 0 or self.normalized_norm == 0:
+            return 0.0
+        return self.dot / math.sqrt(self.raw_norm * self.normalized_norm)
+
+    def delta(self) -> Dict[str, float]:
+        # abs(freq - normed_freq) for keys present in both tables, as in Fingerprint.from_text
+        return {key: abs(count / self.raw_total - self.normalized[key] / self.normalized_total)
+                for key, count in self.raw.items() if key in self.normalized}
+
+    def delta_sum(self) -> float:
+        smaller, larger = sorted((self.raw, self.normalized), key=len)
+        return sum(abs(self.raw[key] / self.raw_total - self.normalized[key] / self.normalized_total)
+                   for key in smaller if key in larger)
+
+
+def _set_count(counts: Counter, key: str, count: int):
+    # Drop keys whose count reaches zero, so the tables only hold what is in the window
+    if count:
+        counts[key] = count
+    else:
+        del counts[key]
+
+
+class IncrementalFingerprint:
+    """
+    A fingerprint of a changing body of text, updated chunk by chunk.
+
+    add() and remove() take time proportional to the chunk, not to everything added
+    so far. COSINE_SIMILARITY_CHAR and COSINE_SIMILARITY_WORD are kept up to date on
+    every update. The Fingerprint tables and structural_deviation are read under the
+    same names, in time proportional to the number of distinct characters and words,
+    and fingerprint() builds the full Fingerprint.
+
+    The chunks are counted as if they were one text, so that a single chunk gives
+    exactly Fingerprint.from_text, and chunks that each end in whitespace give the
+    fingerprint of their concatenation, up to the separators normalization puts
+    between chunks.
+    """
+
+    def __init__(self, texts: Iterable[str] = ()):
+        self.characters = _RunningPair()
+        self.words = _RunningPair()
+        self.stopwords = 0
+        self.nonletters = 0
+        self.chunks = 0
+        for text in texts:
+            self.add(text)
+
+    def add(self, chunk: Union[str, ChunkCounts]) -> ChunkCounts:
+        # Returns the counts of the chunk, which remove() takes without normalizing the text again
+        counts = chunk if isinstance(chunk, ChunkCounts) else ChunkCounts.from_text(chunk)
+        self._update(counts, 1)
+        return counts
+
+    def remove(self, chunk: Union[str, ChunkCounts]) -> ChunkCounts:
+        counts = chunk if isinstance(chunk, ChunkCounts) else ChunkCounts.from_text(chunk)
+        self._update(counts, -1)
+        return counts
+
+    def _update(self, counts: ChunkCounts, sign: int):
+        # Both tables are checked first, so a failed removal leaves the fingerprint as it was
+        self.characters.check(counts.characters, counts.normalized_characters, sign)
+        self.words.check(counts.words, counts.normalized_words, sign)
+        self.characters.update(counts.characters, counts.normalized_characters, sign)
+        self.words.update(counts.words, counts.normalized_words, sign)
+        for word, count in counts.words.items():
+            if word in _STOPWORD_SET:
+                self.stopwords += sign * count
+            if not word.isalpha():
+                self.nonletters += sign * count
+        self.chunks += sign
+
+    def __len__(self) -> int:
+        return self.chunks
+
+    @property
+    def COSINE_SIMILARITY_CHAR(self) -> float:
+        return self.characters.cosine_similarity()
+
+    @property
+    def COSINE_SIMILARITY_WORD(self) -> float:
+        return self.words.cosine_similarity()
+
+    @property
+    def CHARACTER_FREQUENCY(self) -> Dict[str, float]:
+        return _relative_frequencies(self.characters.raw)
+
+    @property
+    def NORMALIZED_CHARACTER_FREQUENCY(self) -> Dict[str, float]:
+        return _relative_frequencies(self.characters.normalized)
+
+    @property
+    def WORD_FREQUENCY(self) -> Dict[str, float]:
+        return _relative_frequencies(self.words.raw)
+
+    @property
+    def NORMALIZED_WORD_FREQUENCY(self) -> Dict[str, float]:
+        return _relative_frequencies(self.words.normalized)
+
+    @property
+    def STOPWORD_FREQUENCY(self) -> Dict[str, float]:
+        return _stopword_frequencies(self.words.raw)
+
+    @property
+    def NONLETTER_FREQUENCY(self) -> Dict[str, float]:
+        return _nonletter_frequencies(self.words.raw)
+
+    @property
+    def character_delta(self) -> Dict[str, float]:
+        return self.characters.delta()
+
+    @property
+    def word_delta(self) -> Dict[str, float]:
+        return self.words.delta()
+
+    @property
+    def structural_deviation(self) -> float:
+        # The stopword and non-letter frequencies each sum to 1, or to 0 when there are none
+        character_delta = self.characters.delta_sum() if self.nonletters else 0.0
+        word_delta = self.words.delta_sum() if self.stopwords else 0.0
+        return (self.COSINE_SIMILARITY_CHAR * character_delta * (1.0 if self.nonletters else 0.0) +
+                self.COSINE_SIMILARITY_WORD * word_delta * (1.0 if self.stopwords else 0.0))
+
+    def tables(self):
+        # Relative frequency tables of the raw and the normalized text
+        return (FeatureTables.from_counts(self.characters.raw, self.words.raw),
+                FeatureTables.from_counts(self.characters.normalized, self.words.normalized))
+
+    def fingerprint(self) -> Fingerprint:
+        # Text that normalizes to nothing, e.g. '!!!', still has a fingerprint, as from Fingerprint.from_text
+        if not self.characters.raw_total:
+            raise ValueError("IncrementalFingerprint has no text to fingerprint")
+        return Fingerprint.from_tables(*self.tables())
+
+
+def sliding_fingerprints(texts: Iterable[str], window: int, step: int = 1) -> Iterator[Fingerprint]:
+    """
+    Fingerprint every window of consecutive texts, e.g. an author's posts in order.
+
+    Each step adds the texts entering the window and removes those leaving it, so the
+    cost per step depends on the new texts rather than on the window size. Windows
+    are yielded every step texts once the first window is full.
+
+    Args:
+        texts (iterable): Texts in order; may be a generator.
+        window (int): Number of texts per window.
+        step (int): Number of texts the window moves forward between fingerprints.
+    """
+    if window < 1 or step < 1:
+        raise ValueError("window and step must be positive")
+    incremental = IncrementalFingerprint()
+    in_window = deque()
+    for position, text in enumerate(texts, start=1):
+        in_window.append(incremental.add(text))
+        if len(in_window) > window:
+            incremental.remove(in_window.popleft())
+        if position >= window and (position - window) % step == 0:
+            yield incremental.fingerprint()
@@ -0,0 +1,78 @@
+import unittest
+from incremental import IncrementalFingerprint, sliding_fingerprints
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+
+
+class IncrementalFingerprintTests(unittest.TestCase):
+    def setUp(self):
+        self.posts = ["The cats are running, dogs were barking!\n", "I am so tired of teh exams...\n",
+                      "Is it 5 o'clock yet? #friday\n", "The weather was lovely today.\n"]
+
+    def assert_fingerprints_close(self, fingerprint, expected):
+        for field in ('CHARACTER_FREQUENCY', 'NORMALIZED_CHARACTER_FREQUENCY', 'WORD_FREQUENCY',
+                      'NORMALIZED_WORD_FREQUENCY', 'STOPWORD_FREQUENCY', 'NONLETTER_FREQUENCY',
+                      'character_delta', 'word_delta'):
+            table, expected_table = getattr(fingerprint, field), getattr(expected, field)
+            self.assertEqual(set(table), set(expected_table), field)
+            for key, value in expected_table.items():
+                self.assertAlmostEqual(table[key], value, places=12)
+        for field in ('COSINE_SIMILARITY_CHAR', 'COSINE_SIMILARITY_WORD', 'structural_deviation'):
+            self.assertAlmostEqual(getattr(fingerprint, field), getattr(expected, field), places=12)
+
+    def test_single_chunk_matches_from_text(self):
+        incremental = IncrementalFingerprint([self.posts[0]])
+        self.assertEqual(incremental.fingerprint(), Fingerprint.from_text(self.posts[0]))
+        self.assert_fingerprints_close(incremental, Fingerprint.from_text(self.posts[0]))
+
+    def test_remove_undoes_add(self):
+        incremental = IncrementalFingerprint(self.posts[:2])
+        counts = incremental.add(self.posts[2])
+        incremental.remove(self.posts[0])
+        incremental.remove(counts)
+        self.assertEqual(len(incremental), 1)
+        # Same tables, though in a different key order and so with sums rounded differently
+        self.assert_fingerprints_close(incremental.fingerprint(), Fingerprint.from_text(self.posts[1]))
+
+    def test_removing_unseen_text_fails(self):
+        incremental = IncrementalFingerprint(self.posts[:1])
+        with self.assertRaises(ValueError):
+            incremental.remove("Zebras!")
+
+    def test_text_that_normalizes_to_nothing(self):
+        for text in ("!!!", "😤 😤", "the and of"):
+            self.assertEqual(IncrementalFingerprint([text]).fingerprint(), Fingerprint.from_text(text))
+        windows = list(sliding_fingerprints(["hello world", "!!!", "ok then"], window=1))
+        self.assertEqual(windows, [Fingerprint.from_text(text) for text in ("hello world", "!!!", "ok then")])
+        with self.assertRaises(ValueError):
+            IncrementalFingerprint().fingerprint()
+
+    def test_failed_removal_changes_nothing(self):
+        incremental = IncrementalFingerprint(["The cat sat.\n"])
+        before = (vars(incremental.characters).copy(), vars(incremental.words).copy(), incremental.stopwords,
+                  incremental.nonletters, len(incremental))
+        # Every character was added, so only the word table catches this one
+        with self.assertRaises(ValueError):
+            incremental.remove("The act sat.\n")
+
+        after = (vars(incremental.characters), vars(incremental.words), incremental.stopwords,
+                 incremental.nonletters, len(incremental))
+        self.assertEqual(after, before)
+        self.assertEqual(incremental.fingerprint(), Fingerprint.from_text("The cat sat.\n"))
+
+    def test_running_values_match_fingerprint(self):
+        incremental = IncrementalFingerprint(self.posts)
+        incremental.remove(self.posts[1])
+        self.assert_fingerprints_close(incremental, incremental.fingerprint())
+
+    def test_sliding_windows(self):
+        windows = list(sliding_fingerprints(self.posts, window=2))
+        self.assertEqual(len(windows), 3)
+        for start, fingerprint in enumerate(windows):
+            expected = IncrementalFingerprint(self.posts[start:start + 2]).fingerprint()
+            self.assert_fingerprints_close(fingerprint, expected)
+        self.assertEqual(len(list(sliding_fingerprints(self.posts, window=2, step=2))), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
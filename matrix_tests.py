@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from matrix import FingerprintMatrix
+from ngrams import ngram_matrix, ngram_similarities
+from signature import Fingerprint, calculate_cosine_similarity
+from testing import setUpModule  # noqa: F401
+
+
+class FingerprintMatrixTests(unittest.TestCase):
+    def setUp(self):
+        self.texts = [
+            "This is a tset of the speling. Cats are running, dogs were barking!",
+            "The quick brown fox jumps over the lazy dog. It was a dark and stormy night.",
+            "I can't believe it's not butter!! Wow... #amazing @friend 100% recomend",
+            "no punctuation here at all just words",
+        ]
+        self.fingerprints = Fingerprint.from_texts(self.texts)
+        self.matrix = FingerprintMatrix.from_fingerprints(self.fingerprints)
+
+    def test_all_pairs_cosine_similarity(self):
+        for name in ('CHARACTER_FREQUENCY', 'WORD_FREQUENCY', 'character_delta', 'STOPWORD_FREQUENCY'):
+            similarity = self.matrix.cosine_similarity(name)
+            expected = [[calculate_cosine_similarity(getattr(a, name), getattr(b, name)) for b in self.fingerprints]
+                        for a in self.fingerprints]
+            np.testing.assert_allclose(similarity, expected, atol=1e-12)
+
+    def test_self_similarities(self):
+        np.testing.assert_allclose(self.matrix.cosine_similarity_char(),
+                                   [fp.COSINE_SIMILARITY_CHAR for fp in self.fingerprints], atol=1e-12)
+        np.testing.assert_allclose(self.matrix.cosine_similarity_word(),
+                                   [fp.COSINE_SIMILARITY_WORD for fp in self.fingerprints], atol=1e-12)
+
+    def test_deltas(self):
+        character_delta = self.matrix.character_delta()
+        word_delta = self.matrix.word_delta()
+        for row, fingerprint in enumerate(self.fingerprints):
+            for char, delta in fingerprint.character_delta.items():
+                self.assertAlmostEqual(character_delta[row, self.matrix.characters.index(char)], delta)
+            for word, delta in fingerprint.word_delta.items():
+                self.assertAlmostEqual(word_delta[row, self.matrix.words.index(word)], delta)
+
+    def test_structural_deviation(self):
+        np.testing.assert_allclose(self.matrix.structural_deviation(),
+                                   [fp.structural_deviation for fp in self.fingerprints], atol=1e-12)
+
+    def test_fixed_vocabulary(self):
+        projected = FingerprintMatrix.from_fingerprints(self.fingerprints[:1], self.matrix.characters, self.matrix.words)
+        np.testing.assert_allclose(self.matrix.cosine_similarity(other=projected)[:, 0],
+                                   self.matrix.cosine_similarity()[:, 0])
+
+    def test_hashed_ngram_table(self):
+        with self.assertRaises(ValueError):
+            self.matrix.cosine_similarity(FingerprintMatrix.NGRAM_TABLE)
+        matrix = FingerprintMatrix.from_fingerprints(self.fingerprints, texts=self.texts)
+
+        similarity = matrix.cosine_similarity(FingerprintMatrix.NGRAM_TABLE)
+
+        np.testing.assert_allclose(similarity, ngram_similarities(ngram_matrix(self.texts)), atol=1e-6)
+        np.testing.assert_allclose(matrix.cosine_similarity(), self.matrix.cosine_similarity())
+
+
+if __name__ == '__main__':
+    unittest.main()
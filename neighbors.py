@@ -0,0 +1,297 @@
+import json
+import os
+import tempfile
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from signature import Fingerprint, STOPWORDS
+
+
+# Hashed dimensions given to each character table and each word table of a fingerprint
+CHARACTER_DIMS = 64
+WORD_DIMS = 256
+
+# Random-projection LSH: hash tables, and sign bits per table
+NUM_TABLES = 32
+NUM_BITS = 8
+
+# Extra buckets probed per table, flipping the bits whose projections were closest to zero
+NUM_PROBES = 4
+
+# Candidates compared exactly per query, those sharing a bucket with it in the most tables
+MAX_CANDIDATES = 2000
+
+# Share of rehashed authors, relative to the sorted tables, past which the tables are sorted again
+MERGE_FRACTION = 0.1
+
+# Authors added before the LSH tables are built; until then queries scan every author
+CENTER_SAMPLE = 1000
+
+# Bumped whenever the saved layout of an AuthorIndex changes
+INDEX_VERSION = 1
+
+
+class Neighbor(NamedTuple):
+    author: str
+    similarity: float
+
+
+@lru_cache(maxsize=1 << 16)
+def _hash(key: str) -> Tuple[int, float]:
+    # A key's hashed column (before the modulo), and its sign, so that collisions cancel out on average
+    value = zlib.crc32(key.encode('utf-8'))
+    return value >> 1, 1.0 if value & 1 else -1.0
+
+
+def _hashed(table: Dict[str, float], dims: int) -> np.ndarray:
+    block = np.zeros(dims, dtype=np.float64)
+    for key, value in table.items():
+        column, sign = _hash(key)
+        block[column % dims] += sign * value
+    return block
+
+
+def author_vector(fingerprint: Fingerprint, character_dims: int = CHARACTER_DIMS,
+                  word_dims: int = WORD_DIMS) -> np.ndarray:
+    """
+    A fixed-dimension, unit-length float32 vector of a fingerprint.
+
+    It joins the identity vector (character_delta, word_delta and structural_deviation,
+    with the two cosine similarities) and the character, word, stopword and non-letter
+    frequency tables. Tables are feature-hashed to character_dims or word_dims columns,
+    so any vocabulary fits, and every block is scaled to unit length before the whole is,
+    so the dot product of two vectors averages the cosine similarities of their blocks.
+    """
+    blocks = [
+        _hashed(fingerprint.character_delta, character_dims),
+        _hashed(fingerprint.word_delta, word_dims),
+        np.array([fingerprint.COSINE_SIMILARITY_CHAR, fingerprint.COSINE_SIMILARITY_WORD,
+                  fingerprint.structural_deviation], dtype=np.float64),
+        _hashed(fingerprint.CHARACTER_FREQUENCY, character_dims),
+        _hashed(fingerprint.WORD_FREQUENCY, word_dims),
+        np.array([fingerprint.STOPWORD_FREQUENCY.get(word, 0.0) for word in STOPWORDS], dtype=np.float64),
+        _hashed(fingerprint.NONLETTER_FREQUENCY, word_dims),
+    ]
+    for block in blocks:
+        norm = np.linalg.norm(block)
+        if norm:
+            block /= norm
+    vector = np.concatenate(blocks)
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).astype(np.float32)
+
+
+class AuthorIndex:
+    """
+    Top-k cosine search over author vectors, in sublinear time.
+
+    An author's vector is the normalized sum of the author_vector of every fingerprint
+    added for them, so adding a text to a known author refines their vector in place.
+    Candidates come from random-projection LSH: NUM_TABLES hash tables keyed by the
+    signs of NUM_BITS projections of the vector, with multi-probing of the nearest
+    buckets. They are then ranked by exact cosine similarity, so results differ from a
+    full scan only by the neighbours no probed bucket holds.
+
+    Projections are taken around the mean vector of the first CENTER_SAMPLE authors;
+    author vectors share a large common part (every author writes mostly the same
+    characters), and hashing them around the origin would put most of them in the same
+    buckets. Until then, queries scan every author.
+
+    Args:
+        character_dims (int): Hashed columns per character table.
+        word_dims (int): Hashed columns per word table.
+        num_tables (int): LSH hash tables; more raise recall and memory.
+        num_bits (int): Projections per table, at most 31; more make buckets smaller and recall lower.
+        seed (int): Seed of the projections.
+    """
+
+    def __init__(self, character_dims: int = CHARACTER_DIMS, word_dims: int = WORD_DIMS,
+                 num_tables: int = NUM_TABLES, num_bits: int = NUM_BITS, seed: int = 0):
+        self.character_dims = character_dims
+        self.word_dims = word_dims
+        self.num_tables = num_tables
+        self.num_bits = num_bits
+        self.seed = seed
+        self.dims = 2 * character_dims + 3 * word_dims + 3 + len(STOPWORDS)
+        self.planes = np.random.default_rng(seed).standard_normal((num_tables * num_bits, self.dims)).astype(np.float32)
+
+        self.authors: List[str] = []
+        self.rows: Dict[str, int] = {}
+        # Unnormalized sums of each author's vectors, their norms and how many vectors went in
+        self.sums = np.zeros((0, self.dims), dtype=np.float32)
+        self.norms = np.zeros(0, dtype=np.float32)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.center: Optional[np.ndarray] = None
+        self.codes = np.zeros((0, num_tables), dtype=np.int32)
+        self._sort_buckets()
+
+    def __len__(self) -> int:
+        return len(self.authors)
+
+    def __contains__(self, author: str) -> bool:
+        return author in self.rows
+
+    def vector(self, fingerprint: Fingerprint) -> np.ndarray:
+        return author_vector(fingerprint, self.character_dims, self.word_dims)
+
+    def add(self, author: str, fingerprint: Fingerprint):
+        self.add_vectors([author], self.vector(fingerprint)[None, :])
+
+    def add_many(self, authors: Sequence[str], fingerprints: Iterable[Fingerprint]):
+        vectors = np.array([self.vector(fingerprint) for fingerprint in fingerprints], dtype=np.float32)
+        self.add_vectors(authors, vectors.reshape(len(authors), self.dims))
+
+    def add_vectors(self, authors: Sequence[str], vectors: np.ndarray):
+        # Adds each vector to its author's sum, then rehashes only the authors that changed
+        new = [author for author in dict.fromkeys(authors) if author not in self.rows]
+        if new:
+            self._grow(len(new))
+            for author in new:
+                self.rows[author] = len(self.authors)
+                self.authors.append(author)
+        rows = np.fromiter((self.rows[author] for author in authors), dtype=np.int64, count=len(authors))
+        np.add.at(self.sums, rows, vectors)
+        np.add.at(self.counts, rows, 1)
+        changed = np.unique(rows)
+        self.norms[changed] = np.linalg.norm(self.sums[changed], axis=1)
+
+        if self.center is None:
+            if len(self) >= CENTER_SAMPLE:
+                self.rebuild()
+            return
+        self.codes[changed] = self._codes(self.sums[changed] / self.norms[changed, None])
+        for row, codes in zip(changed.tolist(), self.codes[changed].tolist()):
+            for bucket, code in zip(self._pending, codes):
+                bucket.setdefault(code, []).append(row)
+        self._pending_rows += len(changed)
+        if self._pending_rows > max(CENTER_SAMPLE, MERGE_FRACTION * self._order.shape[1]):
+            self._sort_buckets()
+
+    def _grow(self, count: int):
+        # Amortized doubling of the row arrays; rows past len(self) are unused capacity
+        needed = len(self) + count
+        if needed <= self.sums.shape[0]:
+            return
+        capacity = max(needed, 2 * self.sums.shape[0], 64)
+        for name in ('sums', 'norms', 'counts', 'codes'):
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:old.shape[0]] = old
+            setattr(self, name, grown)
+
+    def _projections(self, vectors: np.ndarray) -> np.ndarray:
+        return ((vectors - self.center) @ self.planes.T).reshape(len(vectors), self.num_tables, self.num_bits)
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        weights = 1 << np.arange(self.num_bits, dtype=np.int32)
+        return ((self._projections(vectors) > 0) * weights).sum(axis=2, dtype=np.int32)
+
+    def rebuild(self):
+        """
+        Recenter the projections on the mean of every author, and rehash everyone. Worth
+        calling if the authors added since the tables were built write differently.
+        """
+        vectors = self.sums[:len(self)] / np.maximum(self.norms[:len(self), None], 1e-12)
+        self.center = vectors.mean(axis=0).astype(np.float32)
+        self.codes[:len(self)] = self._codes(vectors)
+        self._sort_buckets()
+
+    def _sort_buckets(self):
+        # Each table is its rows sorted by code, so a bucket is the slice found by binary search.
+        # Rows hashed since are kept in small dicts until there are enough of them to sort again;
+        # a rehashed row stays under its old code until then, which only adds a candidate.
+        codes = self.codes[:len(self)].T
+        self._order = np.argsort(codes, axis=1, kind='stable').astype(np.int32)
+        self._sorted_codes = np.take_along_axis(codes, self._order, axis=1)
+        self._pending = [{} for _ in range(self.num_tables)]
+        self._pending_rows = 0
+
+    def _candidates(self, vector: np.ndarray, probes: int, max_candidates: int) -> np.ndarray:
+        projections = self._projections(vector[None, :])[0]
+        weights = 1 << np.arange(self.num_bits, dtype=np.int32)
+        codes = ((projections > 0) * weights).sum(axis=1, dtype=np.int32)
+        # The bits most likely to differ for a near neighbour are those the query barely set
+        flips = np.argsort(np.abs(projections), axis=1)[:, :probes]
+        probed = np.concatenate([codes[:, None], codes[:, None] ^ (1 << flips)], axis=1).astype(np.int32)
+
+        pieces = []
+        for table in range(self.num_tables):
+            sorted_codes, order, pending = self._sorted_codes[table], self._order[table], self._pending[table]
+            starts = np.searchsorted(sorted_codes, probed[table], 'left').tolist()
+            stops = np.searchsorted(sorted_codes, probed[table], 'right').tolist()
+            for code, start, stop in zip(probed[table].tolist(), starts, stops):
+                if start < stop:
+                    pieces.append(order[start:stop])
+                if code in pending:
+                    pieces.append(np.asarray(pending[code], dtype=np.int32))
+        if not pieces:
+            return np.zeros(0, dtype=np.int64)
+        # Rows sharing a bucket with the query in more tables are more likely to be close to it
+        collisions = np.bincount(np.concatenate(pieces), minlength=len(self))
+        rows = np.flatnonzero(collisions)
+        if len(rows) > max_candidates:
+            # Sorted again, so that reading their vectors walks memory in order
+            rows = np.sort(rows[np.argpartition(-collisions[rows], max_candidates)[:max_candidates]])
+        return rows
+
+    def query_vector(self, vector: np.ndarray, k: int = 10, probes: int = NUM_PROBES,
+                     max_candidates: int = MAX_CANDIDATES, exact: bool = False) -> List[Neighbor]:
+        if not len(self):
+            return []
+        if exact or self.center is None:
+            rows = np.arange(len(self))
+            similarities = (self.sums[:len(self)] @ vector) / np.maximum(self.norms[:len(self)], 1e-12)
+        else:
+            rows = self._candidates(vector, probes, max_candidates)
+            similarities = (self.sums[rows] @ vector) / np.maximum(self.norms[rows], 1e-12)
+        if len(rows) > k:
+            top = np.argpartition(-similarities, k)[:k]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-similarities[top], kind='stable')]
+        return [Neighbor(self.authors[rows[position]], float(similarities[position])) for position in top]
+
+    def query(self, fingerprint: Fingerprint, k: int = 10, probes: int = NUM_PROBES,
+              max_candidates: int = MAX_CANDIDATES, exact: bool = False) -> List[Neighbor]:
+        """
+        The k authors most similar to a fingerprint, most similar first. Of the authors
+        sharing a probed bucket with it, the max_candidates sharing the most are compared
+        exactly. exact=True scans every author instead.
+        """
+        return self.query_vector(self.vector(fingerprint), k, probes, max_candidates, exact)
+
+    def save(self, path: str):
+        # Buckets are rebuilt from the codes on load; the file is written aside and renamed into place
+        settings = dict(version=INDEX_VERSION, character_dims=self.character_dims, word_dims=self.word_dims,
+                        num_tables=self.num_tables, num_bits=self.num_bits, seed=self.seed)
+        rows = len(self)
+        arrays = dict(sums=self.sums[:rows], norms=self.norms[:rows], counts=self.counts[:rows],
+                      codes=self.codes[:rows], settings=np.array(json.dumps(settings)),
+                      authors=np.array(json.dumps(self.authors)))
+        if self.center is not None:
+            arrays['center'] = self.center
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        descriptor, scratch = tempfile.mkstemp(dir=directory, suffix='.npz')
+        with os.fdopen(descriptor, 'wb') as index_file:
+            np.savez(index_file, **arrays)
+        os.replace(scratch, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'AuthorIndex':
+        with np.load(path, allow_pickle=False) as arrays:
+            settings = json.loads(str(arrays['settings']))
+            version = settings.pop('version')
+            if version != INDEX_VERSION:
+                raise ValueError(f"{path} holds an AuthorIndex of version {version}, expected {INDEX_VERSION}")
+            index = cls(**settings)
+            index.authors = json.loads(str(arrays['authors']))
+            index.rows = {author: row for row, author in enumerate(index.authors)}
+            index.sums = arrays['sums']
+            index.norms = arrays['norms']
+            index.counts = arrays['counts']
+            index.codes = arrays['codes']
+            index.center = arrays['center'] if 'center' in arrays else None
+        index._sort_buckets()
+        return index
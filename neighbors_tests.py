@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from neighbors import AuthorIndex, author_vector, CENTER_SAMPLE
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+
+
+def clustered_vectors(count, dims, seed=0):
+    # Unit vectors around a shared mean, as author vectors are, and a noisy copy of each as its query
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dims)) + 3.0
+    queries = vectors + 0.3 * rng.standard_normal((count, dims))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+
+class AuthorVectorTests(unittest.TestCase):
+    def test_fixed_dimension_unit_vector(self):
+        short = author_vector(Fingerprint.from_text("Hi there!"))
+        long = author_vector(Fingerprint.from_text("The council voted tonight, and residents said the plan would cost more."))
+
+        self.assertEqual(short.shape, long.shape)
+        self.assertEqual(short.shape, (AuthorIndex().dims,))
+        self.assertAlmostEqual(float(np.linalg.norm(long)), 1.0, places=5)
+        self.assertGreater(float(long @ long), float(long @ short))
+
+
+class AuthorIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.texts = {
+            'formal': "The committee has reviewed the proposal. Its conclusions are attached, and they are final.",
+            'casual': "lol i am so done with this week!!! cant wait 4 the weekend :)",
+            'shouty': "WHY is NOBODY talking about THIS?! It is a SCANDAL!!",
+        }
+
+    def test_small_index_scans_every_author(self):
+        index = AuthorIndex()
+        index.add_many(list(self.texts), Fingerprint.from_texts(list(self.texts.values())))
+
+        neighbors = index.query(Fingerprint.from_text("so done with exams lol!!! weekend pls :)"), k=2)
+        self.assertEqual(len(neighbors), 2)
+        self.assertEqual(neighbors[0].author, 'casual')
+        self.assertGreaterEqual(neighbors[0].similarity, neighbors[1].similarity)
+        self.assertIsNone(index.center)
+
+    def test_adding_to_an_author_updates_their_vector(self):
+        index = AuthorIndex()
+        index.add('formal', Fingerprint.from_text(self.texts['formal']))
+        index.add('formal', Fingerprint.from_text(self.texts['shouty']))
+
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.counts[0], 2)
+        expected = index.vector(Fingerprint.from_text(self.texts['formal'])) + \
+            index.vector(Fingerprint.from_text(self.texts['shouty']))
+        np.testing.assert_allclose(index.sums[0], expected, rtol=1e-5)
+
+    def test_lsh_finds_the_exact_neighbours(self):
+        index = AuthorIndex(character_dims=8, word_dims=16)
+        vectors, queries = clustered_vectors(2 * CENTER_SAMPLE, index.dims)
+        index.add_vectors([f'author{row}' for row in range(len(vectors))], vectors)
+        self.assertIsNotNone(index.center)
+
+        recall = []
+        for row, query in enumerate(queries[:100]):
+            found = index.query_vector(query, k=5)
+            exact = index.query_vector(query, k=5, exact=True)
+            self.assertEqual(exact[0].author, f'author{row}')
+            recall.append(len({neighbor.author for neighbor in found} & {neighbor.author for neighbor in exact}) / 5)
+        self.assertGreater(np.mean(recall), 0.8)
+
+    def test_inserts_after_the_tables_are_built(self):
+        index = AuthorIndex(character_dims=8, word_dims=16)
+        vectors, queries = clustered_vectors(CENTER_SAMPLE + 10, index.dims, seed=1)
+        index.add_vectors([f'author{row}' for row in range(CENTER_SAMPLE)], vectors[:CENTER_SAMPLE])
+        for row in range(CENTER_SAMPLE, CENTER_SAMPLE + 10):
+            index.add_vectors([f'author{row}'], vectors[row:row + 1])
+
+        self.assertEqual(len(index), CENTER_SAMPLE + 10)
+        for row in range(CENTER_SAMPLE, CENTER_SAMPLE + 10):
+            self.assertEqual(index.query_vector(queries[row], k=1)[0].author, f'author{row}')
+
+    def test_save_and_load(self):
+        index = AuthorIndex(character_dims=8, word_dims=16)
+        vectors, queries = clustered_vectors(CENTER_SAMPLE + 5, index.dims, seed=2)
+        index.add_vectors([f'author{row}' for row in range(len(vectors))], vectors)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'authors.npz')
+            index.save(path)
+            loaded = AuthorIndex.load(path)
+
+            self.assertEqual(loaded.authors, index.authors)
+            np.testing.assert_array_equal(loaded.center, index.center)
+            for query in queries[:20]:
+                self.assertEqual(loaded.query_vector(query), index.query_vector(query))
+
+            with np.load(path) as arrays:
+                saved = dict(arrays)
+            saved['settings'] = np.array(json.dumps(dict(json.loads(str(saved['settings'])), version=0)))
+            with open(path, 'wb') as index_file:
+                np.savez(index_file, **saved)
+            with self.assertRaises(ValueError):
+                AuthorIndex.load(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
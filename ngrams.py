@@ -0,0 +1,121 @@
+from typing import Iterable, List, Sequence
+import numpy as np
+
+
+# Columns of the character and word halves of an n-gram vector
+CHARACTER_DIMS = 2048
+WORD_DIMS = 2048
+
+CHARACTER_ORDERS = (2, 3, 4)
+WORD_ORDERS = (1, 2)
+
+# Texts hashed together by ngram_matrix; its scratch memory grows with their total length
+BATCH_TEXTS = 256
+
+# Polynomial base of the rolling hash, and the odd constant that spreads hashes over the columns.
+# Arithmetic wraps modulo 2**64, where an odd base has an inverse, used to hash words in place.
+_BASE = np.uint64(1099511628211)
+_BASE_INVERSE = np.uint64(pow(1099511628211, -1, 2 ** 64))
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+# Whether each code point is one str.split() splits on, up to the last such code point,
+# followed by a False that every higher code point is looked up as
+_WHITESPACE = np.array([chr(character).isspace() for character in range(0x3001)] + [False])
+
+
+def _rolling_hashes(symbols: np.ndarray, orders: Sequence[int]):
+    # Hashes of every n-gram of the symbols, each order extending the previous one by a symbol
+    hashes = symbols
+    for order in range(1, max(orders, default=0) + 1):
+        if order > 1:
+            hashes = hashes[:-1] * _BASE + symbols[order - 1:]
+        if order in orders:
+            yield order, hashes
+
+
+def _word_hashes(codes: np.ndarray):
+    """
+    The start of every whitespace-separated word, and its hash, equal to the rolling hash
+    of its code points: a prefix sum of codes scaled by inverse powers of the base gives
+    each word's hash from its two ends, with no loop over the words.
+    """
+    letters = ~_WHITESPACE[np.minimum(codes, len(_WHITESPACE) - 1).astype(np.intp)]
+    edges = np.diff(np.concatenate([[False], letters, [False]]).astype(np.int8))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    if not len(starts):
+        return starts, np.zeros(0, dtype=np.uint64)
+    powers = np.cumprod(np.full(len(codes), _BASE, dtype=np.uint64)) * _BASE_INVERSE
+    inverse_powers = np.cumprod(np.full(len(codes), _BASE_INVERSE, dtype=np.uint64)) * _BASE
+    prefix = np.concatenate([[np.uint64(0)], np.cumsum(codes * inverse_powers, dtype=np.uint64)])
+    return starts, (prefix[ends] - prefix[starts]) * powers[ends - 1]
+
+
+def _ngram_cells(symbols: np.ndarray, owners: np.ndarray, orders: Sequence[int], dims: int, offset: int,
+                 width: int, texts: int, cells: List[np.ndarray], weights: List[np.ndarray]):
+    """
+    Appends the flattened (text, column) cell of every n-gram of each order that lies
+    within one text, weighted so that each text's frequencies of an order sum to one.
+    owners holds the text of each symbol, or -1 for separators.
+    """
+    for order, hashes in _rolling_hashes(symbols, orders):
+        first = owners[:len(hashes)]
+        inside = (first == owners[order - 1:]) & (first >= 0)
+        text, hashes = first[inside], hashes[inside]
+        if len(hashes):
+            columns = ((hashes + np.uint64(order)) * _MIX >> np.uint64(32)) % np.uint64(dims)
+            cells.append(text * width + offset + columns.astype(np.int64))
+            weights.append(1 / np.bincount(text, minlength=texts)[text])
+
+
+def _hash_batch(texts: Sequence[str], character_dims: int, word_dims: int, character_orders: Sequence[int],
+                word_orders: Sequence[int]) -> np.ndarray:
+    # The texts are hashed as one array, joined by spaces that belong to no text
+    width = character_dims + word_dims
+    codes = np.frombuffer(' '.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    lengths = np.array([len(text) + 1 for text in texts], dtype=np.int64)
+    owners = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)[:len(codes)]
+    owners[np.cumsum(lengths)[:-1] - 1] = -1
+
+    cells, weights = [], []
+    _ngram_cells(codes, owners, character_orders, character_dims, 0, width, len(texts), cells, weights)
+    starts, words = _word_hashes(codes)
+    _ngram_cells(words, owners[starts], word_orders, word_dims, character_dims, width, len(texts), cells, weights)
+    if not cells:
+        return np.zeros((len(texts), width), dtype=np.float32)
+    counts = np.bincount(np.concatenate(cells), np.concatenate(weights), minlength=len(texts) * width)
+    return counts.reshape(len(texts), width).astype(np.float32)
+
+
+def hashed_ngrams(text: str, character_dims: int = CHARACTER_DIMS, word_dims: int = WORD_DIMS,
+                  character_orders: Sequence[int] = CHARACTER_ORDERS,
+                  word_orders: Sequence[int] = WORD_ORDERS) -> np.ndarray:
+    """
+    Character and word n-gram frequencies of a text, hashed into a fixed-length float32 array.
+
+    The first character_dims columns hold the relative frequencies of each character
+    n-gram order, summed; the last word_dims hold those of the word n-grams, words being
+    split as str.split() does. Unlike the dict tables, the size depends neither on the
+    text nor on the corpus, so vectors of different texts stack into a matrix as they are.
+    Hashes are polynomial rolling hashes computed with array operations; distinct n-grams
+    sharing a column are counted together.
+    """
+    return _hash_batch([text], character_dims, word_dims, character_orders, word_orders)[0]
+
+
+def ngram_matrix(texts: Iterable[str], character_dims: int = CHARACTER_DIMS, word_dims: int = WORD_DIMS,
+                 character_orders: Sequence[int] = CHARACTER_ORDERS,
+                 word_orders: Sequence[int] = WORD_ORDERS) -> np.ndarray:
+    # One hashed_ngrams row per text, hashing BATCH_TEXTS texts at a time into the result
+    texts = list(texts)
+    matrix = np.empty((len(texts), character_dims + word_dims), dtype=np.float32)
+    for start in range(0, len(texts), BATCH_TEXTS):
+        batch = texts[start:start + BATCH_TEXTS]
+        matrix[start:start + len(batch)] = _hash_batch(batch, character_dims, word_dims, character_orders, word_orders)
+    return matrix
+
+
+def ngram_similarities(matrix: np.ndarray) -> np.ndarray:
+    # Cosine similarity of every pair of rows; rows of empty texts are similar to nothing
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    unit = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+    return unit @ unit.T
@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+from ngrams import (CHARACTER_DIMS, WORD_DIMS, _rolling_hashes, _word_hashes, hashed_ngrams, ngram_matrix,
+                    ngram_similarities)
+from testing import setUpModule  # noqa: F401
+
+
+def code_points(text):
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+
+class NgramTests(unittest.TestCase):
+    def test_word_hashes_are_rolling_hashes(self):
+        text = "Hello  wörld,\tthis is 😀 a test!\nHello again"
+        starts, hashes = _word_hashes(code_points(text))
+
+        words = text.split()
+        self.assertEqual(len(hashes), len(words))
+        for word, word_hash in zip(words, hashes):
+            symbols = code_points(word)
+            self.assertEqual(word_hash, dict(_rolling_hashes(symbols, [len(symbols)]))[len(symbols)][0])
+        self.assertEqual(hashes[0], hashes[-2])
+
+    def test_fixed_size_relative_frequencies(self):
+        vector = hashed_ngrams("The cat sat on the mat.")
+
+        self.assertEqual(vector.shape, (CHARACTER_DIMS + WORD_DIMS,))
+        self.assertEqual(vector.dtype, np.float32)
+        # One for each character order (2, 3, 4) and each word order (1, 2)
+        self.assertAlmostEqual(float(vector[:CHARACTER_DIMS].sum()), 3.0, places=5)
+        self.assertAlmostEqual(float(vector[CHARACTER_DIMS:].sum()), 2.0, places=5)
+        self.assertEqual(hashed_ngrams("").sum(), 0)
+        self.assertEqual(hashed_ngrams("x", character_dims=16, word_dims=16).shape, (32,))
+
+    def test_matrix_rows_match_single_texts(self):
+        texts = ["First post!", "", "a", "second post, with more words", "third 😀 post"]
+        matrix = ngram_matrix(texts)
+
+        self.assertEqual(matrix.shape, (len(texts), CHARACTER_DIMS + WORD_DIMS))
+        for row, text in zip(matrix, texts):
+            np.testing.assert_allclose(row, hashed_ngrams(text), rtol=1e-6)
+        self.assertEqual(ngram_matrix([]).shape, (0, CHARACTER_DIMS + WORD_DIMS))
+
+    def test_similarities(self):
+        similarities = ngram_similarities(ngram_matrix([
+            "honestly i cant even with this weather lol",
+            "honestly i cant even with this traffic lol",
+            "The quarterly report is attached for your review.",
+            "",
+        ]))
+
+        self.assertAlmostEqual(float(similarities[0, 0]), 1.0, places=5)
+        self.assertGreater(similarities[0, 1], similarities[0, 2])
+        self.assertEqual(similarities[3, 0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
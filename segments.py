@@ -0,0 +1,143 @@
+import mmap
+import os
+import re
+from collections import Counter, deque
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+from batch import process_pool
+from incremental import ChunkCounts, IncrementalFingerprint
+from signature import FeatureTables, Fingerprint, normalize_text
+
+
+# Bytes of a file per segment; segments are cut at whitespace, so most run a little longer
+SEGMENT_BYTES = 256 * 1024
+
+# How far past a segment's nominal end to look for a line break, then for any whitespace
+BOUNDARY_SEARCH_BYTES = 16 * 1024
+
+_NEWLINE = re.compile(rb'\n')
+_WHITESPACE = re.compile(rb'\s')
+
+
+class Segment(NamedTuple):
+    # One segment of a file: its position, its counts and its fingerprint
+    index: int
+    start: int
+    end: int
+    counts: ChunkCounts
+    fingerprint: Fingerprint
+
+
+def _boundary(data: mmap.mmap, offset: int) -> int:
+    """
+    The end of a segment nominally ending at offset: just past the next line break, or
+    else the next whitespace, so that no word is split between segments. Whitespace
+    bytes never occur inside a multi-byte UTF-8 character. Failing both, the cut moves
+    back to the start of a character.
+    """
+    if offset >= len(data):
+        return len(data)
+    limit = min(offset + BOUNDARY_SEARCH_BYTES, len(data))
+    for pattern in (_NEWLINE, _WHITESPACE):
+        match = pattern.search(data, offset, limit)
+        if match:
+            return match.end()
+    while offset > 0 and data[offset] & 0xC0 == 0x80:
+        offset -= 1
+    return offset
+
+
+def segment_bounds(path: str, segment_bytes: int = SEGMENT_BYTES) -> List[Tuple[int, int]]:
+    # Byte ranges of the segments of a file; only the bytes around each cut are read
+    if segment_bytes < 1:
+        raise ValueError("segment_bytes must be positive")
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            bounds, start = [], 0
+            while start < len(data):
+                end = _boundary(data, start + segment_bytes)
+                if end <= start:
+                    end = min(start + segment_bytes, len(data))
+                bounds.append((start, end))
+                start = end
+    return bounds
+
+
+def segment_counts(text: str) -> ChunkCounts:
+    # Like ChunkCounts.from_text, without keeping the normalized segment in the normalization cache
+    normalized = normalize_text(text)
+    return ChunkCounts(Counter(text), Counter(text.split()), Counter(normalized), Counter(normalized.split()))
+
+
+def fingerprint_segment(path: str, start: int, end: int) -> Tuple[ChunkCounts, Fingerprint]:
+    # Runs in a worker process, which maps the file itself, so only offsets and results cross processes
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        text = data[start:end].decode('utf-8', errors='replace')
+    counts = segment_counts(text)
+    fingerprint = Fingerprint.from_tables(FeatureTables.from_counts(counts.characters, counts.words),
+                                          FeatureTables.from_counts(counts.normalized_characters,
+                                                                    counts.normalized_words))
+    return counts, fingerprint
+
+
+def iter_segments(path: str, segment_bytes: int = SEGMENT_BYTES, workers: Optional[int] = None,
+                  max_pending: Optional[int] = None) -> Iterator[Segment]:
+    """
+    Fingerprint a file segment by segment across a process pool, yielding the segments in
+    file order.
+
+    Each worker memory-maps the file and decodes only its own segment, and at most
+    max_pending segments (default: twice the number of workers) are in flight, so peak
+    memory depends on the segment size and the number of workers, not on the file size.
+    Files of a single segment, or workers=1, are fingerprinted in-process.
+
+    Args:
+        path (str): A UTF-8 text file.
+        segment_bytes (int): Nominal bytes per segment.
+        workers (int): Number of worker processes (default is the number of CPUs).
+        max_pending (int): Largest number of segments submitted but not yet consumed.
+    """
+    bounds = segment_bounds(path, segment_bytes)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(bounds) <= 1:
+        for index, (start, end) in enumerate(bounds):
+            yield Segment(index, start, end, *fingerprint_segment(path, start, end))
+        return
+
+    max_pending = max_pending or 2 * workers
+    executor = process_pool(min(workers, len(bounds)))
+    pending = deque()
+    try:
+        for index, (start, end) in enumerate(bounds):
+            pending.append((index, start, end, executor.submit(fingerprint_segment, path, start, end)))
+            if len(pending) >= max_pending:
+                index, start, end, future = pending.popleft()
+                yield Segment(index, start, end, *future.result())
+        while pending:
+            index, start, end, future = pending.popleft()
+            yield Segment(index, start, end, *future.result())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def fingerprint_file(path: str, segment_bytes: int = SEGMENT_BYTES, workers: Optional[int] = None,
+                     on_segment: Optional[Callable[[Segment], None]] = None) -> Fingerprint:
+    """
+    The fingerprint of a whole file, merged from the counts of its segments.
+
+    Segments end in whitespace, so the result matches Fingerprint.from_text on the whole
+    text up to the separators normalization puts between segments. on_segment is called
+    with every Segment as it is merged, e.g. to keep the per-segment fingerprints and
+    follow shifts inside the document. Memory holds the counts of the distinct characters
+    and words of the file, not its text. An empty file has no fingerprint and raises
+    ValueError; a file of only punctuation or stopwords is fingerprinted as from_text does.
+    """
+    document = IncrementalFingerprint()
+    for segment in iter_segments(path, segment_bytes, workers):
+        document.add(segment.counts)
+        if on_segment:
+            on_segment(segment)
+    if not len(document):
+        raise ValueError(f"{path} is empty")
+    return document.fingerprint()
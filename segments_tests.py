@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from incremental import IncrementalFingerprint
+from segments import fingerprint_file, iter_segments, segment_bounds
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+
+
+PARAGRAPHS = [
+    "The council voted tonight to approve the new transit budget. Residents said the plan would cost too much.",
+    "lol i cant believe the bus is late AGAIN!!! 😤 whatever, walking to the café instead",
+    "Chapter two. The rain had not stopped for three days, and the river was rising.",
+]
+
+
+class SegmentTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'book.txt')
+        self.text = '\n'.join(PARAGRAPHS[index % 3] for index in range(12)) + '\n'
+        with open(self.path, 'w', encoding='utf-8') as book:
+            book.write(self.text)
+        self.data = self.text.encode('utf-8')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_bounds_cover_the_file_at_whitespace(self):
+        bounds = segment_bounds(self.path, segment_bytes=150)
+
+        self.assertGreater(len(bounds), 4)
+        self.assertEqual(bounds[0][0], 0)
+        self.assertEqual(bounds[-1][1], len(self.data))
+        for (_, end), (start, _) in zip(bounds, bounds[1:]):
+            self.assertEqual(end, start)
+            self.assertTrue(self.data[end - 1:end].isspace())
+
+    def test_cuts_never_split_a_character(self):
+        path = os.path.join(self.directory.name, 'emoji.txt')
+        with open(path, 'w', encoding='utf-8') as emoji:
+            emoji.write('😤' * 100)
+
+        for start, end in segment_bounds(path, segment_bytes=10):
+            self.assertNotIn('�', open(path, 'rb').read()[start:end].decode('utf-8', errors='replace'))
+
+    def test_segment_fingerprints(self):
+        segments = list(iter_segments(self.path, segment_bytes=300, workers=1))
+
+        self.assertEqual([segment.index for segment in segments], list(range(len(segments))))
+        for segment in segments[:2]:
+            expected = Fingerprint.from_text(self.data[segment.start:segment.end].decode('utf-8'))
+            self.assertEqual(segment.fingerprint.CHARACTER_FREQUENCY, expected.CHARACTER_FREQUENCY)
+            self.assertEqual(segment.fingerprint.NORMALIZED_WORD_FREQUENCY, expected.NORMALIZED_WORD_FREQUENCY)
+            self.assertAlmostEqual(segment.fingerprint.structural_deviation, expected.structural_deviation)
+
+    def test_merged_document_fingerprint(self):
+        seen = []
+        document = fingerprint_file(self.path, segment_bytes=300, workers=2, on_segment=seen.append)
+        whole = Fingerprint.from_text(self.text)
+
+        self.assertEqual(len(seen), len(segment_bounds(self.path, segment_bytes=300)))
+        expected = IncrementalFingerprint()
+        for segment in seen:
+            expected.add(segment.counts)
+        self.assertEqual(document.NORMALIZED_WORD_FREQUENCY, expected.fingerprint().NORMALIZED_WORD_FREQUENCY)
+        # The raw text is the same however it is cut; only normalization sees the segments separately
+        for table in ('CHARACTER_FREQUENCY', 'WORD_FREQUENCY', 'STOPWORD_FREQUENCY', 'NONLETTER_FREQUENCY'):
+            self.assertEqual(set(getattr(document, table)), set(getattr(whole, table)))
+            for key, value in getattr(whole, table).items():
+                self.assertAlmostEqual(getattr(document, table)[key], value)
+
+    def test_empty_file(self):
+        path = os.path.join(self.directory.name, 'empty.txt')
+        open(path, 'w').close()
+
+        self.assertEqual(segment_bounds(path), [])
+        self.assertEqual(list(iter_segments(path)), [])
+        with self.assertRaisesRegex(ValueError, 'is empty'):
+            fingerprint_file(path)
+
+    def test_file_that_normalizes_to_nothing(self):
+        for name, text in (('punctuation.txt', "!!! ... ?!\n"), ('stopwords.txt', "the and of it\n")):
+            path = os.path.join(self.directory.name, name)
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(text)
+
+            self.assertEqual(fingerprint_file(path), Fingerprint.from_text(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,360 @@
+"""
+A long-running local fingerprinting service with an HTTP/JSON front end.
+
+Callers POST texts and get fingerprints back, without importing the NLP stack
+themselves. Run it with:
+
+    python -m service [--host 127.0.0.1] [--port 8765] [--workers 4]
+
+Endpoints:
+    POST /fingerprint  {"text": "..."} or {"texts": ["...", ...]}, returns {"fingerprints": [...]}
+    GET  /stats        queue depth, batch sizes, cache hits and latency percentiles
+    GET  /health       {"status": "ok"}
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from typing import Dict, List, Optional
+from batch import fingerprint_chunk, process_pool
+from cache import LRUCache
+from signature import Fingerprint, content_hash
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Texts fingerprinted per batch, and how long the first text of a batch waits for others to join it
+MAX_BATCH = 64
+BATCH_WAIT = 0.005
+
+# Texts waiting or being fingerprinted, past which new texts are refused with 503
+MAX_QUEUE = 4096
+
+# Fingerprints kept for repeated texts
+CACHE_SIZE = 8192
+
+# Largest request body, in bytes
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+# Latencies kept for the percentiles in /stats
+LATENCY_WINDOW = 2048
+
+
+class Overloaded(Exception):
+    # Raised when the queue is full; the HTTP front end answers 503 with Retry-After
+    pass
+
+
+class TooManyTexts(Exception):
+    # Raised when one request alone has more new texts than the queue holds, so retrying it
+    # would never succeed; the HTTP front end answers 413
+    pass
+
+
+def _percentile(values: List[float], share: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+class FingerprintService:
+    """
+    Fingerprints texts submitted concurrently, in micro-batches run on a worker pool.
+
+    Each text waits up to batch_wait seconds for others to join its batch, up to
+    max_batch texts, and each batch goes to a worker as one task, so many small
+    requests cost one round trip to the pool between them. At most one batch per worker
+    is in flight. Repeated texts are answered from an LRU cache keyed by content hash,
+    and identical texts already queued share one result. Once max_queue texts are
+    waiting or in flight, new ones are refused with Overloaded, rather than queueing
+    without bound. A request with more than max_queue new texts is refused with
+    TooManyTexts.
+
+    Args:
+        workers (int): Worker processes (default is the number of CPUs); 1 fingerprints on a
+            thread of this process.
+        max_batch (int): Largest number of texts per batch.
+        batch_wait (float): Seconds a batch waits to fill.
+        max_queue (int): Largest number of texts queued or in flight.
+        cache_size (int): Fingerprints kept for repeated texts.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_batch: int = MAX_BATCH, batch_wait: float = BATCH_WAIT,
+                 max_queue: int = MAX_QUEUE, cache_size: int = CACHE_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait
+        self.max_queue = max_queue
+        self.cache = LRUCache(cache_size)
+
+        self._executor = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._batches = set()
+
+        self.requests = 0
+        self.texts = 0
+        self.cache_hits = 0
+        self.rejected = 0
+        self.errors = 0
+        self.restarts = 0
+        self.batches = 0
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def _new_executor(self):
+        return process_pool(self.workers) if self.workers > 1 else ThreadPoolExecutor(max_workers=1)
+
+    async def start(self):
+        self._executor = self._new_executor()
+        # Warm the workers up, so the first requests do not pay for importing and loading the NLP stack
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, fingerprint_chunk, ["Warming up."])
+                               for _ in range(self.workers)))
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.create_task(self._collect_batches())
+
+    async def stop(self):
+        if self._batcher:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, *self._batches, return_exceptions=True)
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def queue_depth(self) -> int:
+        # Distinct texts waiting for a batch or being fingerprinted
+        return len(self._pending)
+
+    async def fingerprint(self, texts: List[str]) -> List[Fingerprint]:
+        start = time.perf_counter()
+        self.requests += 1
+        self.texts += len(texts)
+        keys = [content_hash(text) for text in texts]
+        cached, waiting, new = {}, {}, {}
+        for key, text in zip(keys, texts):
+            if key in cached or key in waiting or key in new:
+                continue
+            fingerprint = self.cache.get(key)
+            if fingerprint is not None:
+                cached[key] = fingerprint
+            elif key in self._pending:
+                waiting[key] = self._pending[key]
+            else:
+                new[key] = text
+        if len(new) > self.max_queue:
+            raise TooManyTexts(f"{len(new)} new texts in one request, at most {self.max_queue}")
+        if new and len(self._pending) + len(new) > self.max_queue:
+            self.rejected += 1
+            raise Overloaded(f"{len(self._pending)} texts queued, at most {self.max_queue}")
+
+        loop = asyncio.get_running_loop()
+        for key, text in new.items():
+            waiting[key] = self._pending[key] = loop.create_future()
+            self._queue.put_nowait((key, text))
+        results = []
+        for key in keys:
+            if key in cached:
+                self.cache_hits += 1
+                results.append(cached[key])
+            else:
+                # Shielded, so a client going away does not cancel a result other requests share
+                results.append(await asyncio.shield(waiting[key]))
+        self.latencies.append(time.perf_counter() - start)
+        return results
+
+    async def _collect_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.max_batch:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch):
+        keys, texts = zip(*batch)
+        executor = self._executor
+        try:
+            fingerprints, _ = await asyncio.get_running_loop().run_in_executor(executor, fingerprint_chunk,
+                                                                               list(texts))
+        except Exception as error:
+            # A worker died and took the pool with it; later batches go to a new pool
+            if isinstance(error, BrokenProcessPool) and executor is self._executor:
+                self._executor = self._new_executor()
+                self.restarts += 1
+                executor.shutdown(wait=False, cancel_futures=True)
+            for key in keys:
+                future = self._pending.pop(key)
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            self.batches += 1
+            self.batch_sizes.append(len(batch))
+            for key, fingerprint in zip(keys, fingerprints):
+                self.cache[key] = fingerprint
+                future = self._pending.pop(key)
+                if not future.done():
+                    future.set_result(fingerprint)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        latencies = list(self.latencies)
+        return {
+            'queue_depth': self.queue_depth,
+            'batches_in_flight': len(self._batches),
+            'workers': self.workers,
+            'requests': self.requests,
+            'texts': self.texts,
+            'cache_hits': self.cache_hits,
+            'cache_entries': len(self.cache),
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'pool_restarts': self.restarts,
+            'batches': self.batches,
+            'mean_batch_size': sum(self.batch_sizes) / len(self.batch_sizes) if self.batch_sizes else None,
+            'latency_ms': {name: None if value is None else round(value * 1000, 3)
+                           for name, value in (('p50', _percentile(latencies, 0.5)),
+                                               ('p90', _percentile(latencies, 0.9)),
+                                               ('p99', _percentile(latencies, 0.99)))},
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # HTTP/1.1 with keep-alive: requests on one connection are answered in turn
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(f"negative Content-Length {length}")
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': "malformed request"}, close=True)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {'error': f"body is larger than {MAX_BODY_BYTES} bytes"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                close = headers.get('connection', '').lower() == 'close'
+                try:
+                    status, payload, extra = await self._route(method, path.split('?', 1)[0], body)
+                except Exception as error:
+                    self.errors += 1
+                    status, payload, extra = (HTTPStatus.INTERNAL_SERVER_ERROR,
+                                              {'error': f"{type(error).__name__}: {error}"}, {})
+                await self._respond(writer, status, payload, close, extra)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes):
+        if path == '/health':
+            return HTTPStatus.OK, {'status': 'ok'}, {}
+        if path == '/stats':
+            return HTTPStatus.OK, self.stats(), {}
+        if path != '/fingerprint':
+            return HTTPStatus.NOT_FOUND, {'error': f"no such endpoint: {path}"}, {}
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "use POST"}, {'Allow': 'POST'}
+        try:
+            request = json.loads(body)
+            texts = [request['text']] if 'text' in request else request['texts']
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            return HTTPStatus.BAD_REQUEST, {'error': 'expected {"text": str} or {"texts": [str, ...]}'}, {}
+        try:
+            fingerprints = await self.fingerprint(texts)
+        except Overloaded as error:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': f"overloaded: {error}"}, {'Retry-After': '1'}
+        except TooManyTexts as error:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': f"too many texts: {error}"}, {}
+        return HTTPStatus.OK, {'fingerprints': [fingerprint._asdict() for fingerprint in fingerprints]}, {}
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict, close: bool = False,
+                       headers: Optional[dict] = None):
+        body = json.dumps(payload).encode('utf-8')
+        lines = [f'HTTP/1.1 {status.value} {status.phrase}', 'Content-Type: application/json',
+                 f'Content-Length: {len(body)}', f"Connection: {'close' if close else 'keep-alive'}"]
+        lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        # Starts the workers and the server; port=0 picks a free port, read from server.sockets
+        await self.start()
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def fingerprints_from_response(payload: dict) -> List[Fingerprint]:
+    # Fingerprints from the JSON of a /fingerprint response
+    return [Fingerprint(**fields) for fields in payload['fingerprints']]
+
+
+async def _main(args):
+    service = FingerprintService(workers=args.workers, max_batch=args.max_batch, max_queue=args.max_queue)
+    server = await service.serve(args.host, args.port)
+    print(f"Fingerprinting on http://{args.host}:{server.sockets[0].getsockname()[1]} with {service.workers} workers")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--max-queue', type=int, default=MAX_QUEUE)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+import asyncio
+import http.client
+import json
+import os
+import signal
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from service import FingerprintService, Overloaded, TooManyTexts, fingerprints_from_response
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+
+
+class ServiceThread:
+    # Runs a FingerprintService on localhost, on an event loop in a background thread
+    def __init__(self, **options):
+        self.service = FingerprintService(**options)
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.server = self.loop.run_until_complete(self.service.serve('127.0.0.1', 0))
+            self.port = self.server.sockets[0].getsockname()[1]
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        ready.wait(10)
+
+    def request(self, method, path, payload=None, body=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        try:
+            if payload is not None:
+                body = json.dumps(payload)
+            connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), json.loads(response.read())
+        finally:
+            connection.close()
+
+    def close(self):
+        async def shutdown():
+            self.server.close()
+            await self.server.wait_closed()
+            await self.service.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(30)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10)
+        self.loop.close()
+
+
+class ServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ServiceThread(workers=1, batch_wait=0.05)
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_fingerprint_and_cache(self):
+        text = "The cats were running in the park!"
+        status, _, payload = self.server.request('POST', '/fingerprint', {'text': text})
+
+        self.assertEqual(status, 200)
+        fingerprint, = fingerprints_from_response(payload)
+        expected = Fingerprint.from_text(text)
+        self.assertEqual(fingerprint.WORD_FREQUENCY, expected.WORD_FREQUENCY)
+        self.assertAlmostEqual(fingerprint.structural_deviation, expected.structural_deviation)
+
+        status, _, payload = self.server.request('POST', '/fingerprint', {'texts': [text, "Another post."]})
+        self.assertEqual(len(payload['fingerprints']), 2)
+        _, _, stats = self.server.request('GET', '/stats')
+        self.assertEqual(stats['cache_hits'], 1)
+        self.assertEqual(stats['texts'], 3)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertIsNotNone(stats['latency_ms']['p99'])
+
+    def test_concurrent_requests_are_batched(self):
+        texts = [f"Post number {index} about the game last night" for index in range(24)]
+        with ThreadPoolExecutor(max_workers=24) as executor:
+            responses = list(executor.map(lambda text: self.server.request('POST', '/fingerprint', {'text': text}),
+                                          texts))
+
+        self.assertTrue(all(status == 200 for status, _, _ in responses))
+        _, _, stats = self.server.request('GET', '/stats')
+        self.assertEqual(stats['requests'], 24)
+        self.assertLess(stats['batches'], 24)
+        self.assertGreater(stats['mean_batch_size'], 1)
+
+    def test_errors(self):
+        self.assertEqual(self.server.request('POST', '/fingerprint', body='not json')[0], 400)
+        self.assertEqual(self.server.request('POST', '/fingerprint', {'texts': [1, 2]})[0], 400)
+        self.assertEqual(self.server.request('GET', '/fingerprint')[0], 405)
+        self.assertEqual(self.server.request('GET', '/nowhere')[0], 404)
+        self.assertEqual(self.server.request('GET', '/health')[2], {'status': 'ok'})
+
+    def test_negative_content_length_is_refused(self):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.port, timeout=30)
+        try:
+            connection.putrequest('POST', '/fingerprint')
+            connection.putheader('Content-Length', '-1')
+            connection.endheaders()
+            response = connection.getresponse()
+            self.assertEqual((response.status, json.loads(response.read())), (400, {'error': "malformed request"}))
+        finally:
+            connection.close()
+
+
+class BackpressureTests(unittest.TestCase):
+    def test_full_queue_is_refused(self):
+        async def run():
+            service = FingerprintService(workers=1, max_queue=2)
+            await service.start()
+            try:
+                first = asyncio.create_task(service.fingerprint(["one", "two"]))
+                await asyncio.sleep(0)
+                with self.assertRaises(Overloaded):
+                    await service.fingerprint(["three"])
+                # Texts already queued are shared, not queued again
+                await service.fingerprint(["one"])
+                await first
+                fingerprints = await service.fingerprint(["one", "two", "one"])
+                return service, fingerprints
+            finally:
+                await service.stop()
+
+        service, fingerprints = asyncio.run(run())
+        self.assertEqual(len(fingerprints), 3)
+        self.assertEqual(service.rejected, 1)
+        self.assertEqual(service.stats()['queue_depth'], 0)
+
+    def test_more_texts_than_the_queue_holds_are_refused(self):
+        async def run():
+            service = FingerprintService(workers=1, max_queue=2)
+            await service.start()
+            try:
+                with self.assertRaises(TooManyTexts):
+                    await service.fingerprint(["one", "two", "three"])
+                return service
+            finally:
+                await service.stop()
+
+        service = asyncio.run(run())
+        self.assertEqual(service.rejected, 0)
+        self.assertEqual(service.stats()['queue_depth'], 0)
+
+    def test_http_answers_503(self):
+        server = ServiceThread(workers=1, max_queue=1)
+        try:
+            # A text of another request, still waiting for its fingerprint
+            server.service._pending['queued'] = server.loop.create_future()
+            status, headers, payload = server.request('POST', '/fingerprint', {'texts': ["one"]})
+        finally:
+            server.close()
+        self.assertEqual(status, 503)
+        self.assertEqual(headers['Retry-After'], '1')
+        self.assertIn('overloaded', payload['error'])
+
+    def test_http_answers_413_for_too_many_texts(self):
+        server = ServiceThread(workers=1, max_queue=1)
+        try:
+            status, headers, payload = server.request('POST', '/fingerprint', {'texts': ["one", "two"]})
+        finally:
+            server.close()
+        self.assertEqual(status, 413)
+        self.assertNotIn('Retry-After', headers)
+        self.assertIn('too many texts', payload['error'])
+
+    def test_failures_answer_500(self):
+        server = ServiceThread(workers=1)
+        try:
+            with mock.patch('service.fingerprint_chunk', side_effect=RuntimeError("worker failed")):
+                status, _, payload = server.request('POST', '/fingerprint', {'text': "Some new post."})
+            self.assertEqual(status, 500)
+            self.assertIn("worker failed", payload['error'])
+
+            status, _, _ = server.request('POST', '/fingerprint', {'text': "Some new post."})
+            self.assertEqual(status, 200)
+            self.assertEqual(server.service.stats()['errors'], 1)
+        finally:
+            server.close()
+
+    def test_broken_pool_is_replaced(self):
+        server = ServiceThread(workers=2)
+        try:
+            for process in list(server.service._executor._processes.values()):
+                os.kill(process.pid, signal.SIGKILL)
+                process.join(10)
+            status, _, payload = server.request('POST', '/fingerprint', {'text': "A post after the crash."})
+            self.assertEqual(status, 500)
+            self.assertIn('BrokenProcessPool', payload['error'])
+
+            status, _, _ = server.request('POST', '/fingerprint', {'text': "A post after the crash."})
+            self.assertEqual(status, 200)
+            self.assertEqual(server.service.stats()['pool_restarts'], 1)
+        finally:
+            server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,98 +1,193 @@
 from collections import Counter
 from typing import List, Dict, NamedTuple
+import hashlib
 import math
-from textblob import TextBlob, Word, WordList
-import nltk
-
-# Check if the 'punkt' corpus has been downloaded, and if not, download it.
-nltk.download('punkt')
+import os
+from cache import LRUCache, get_word_cache
+from spelling import correct_text
 
 
 STOPWORDS = ['a', 'an', 'the', 'is', 'are', 'am', 'was', 'were']
 
+# Number of normalized documents kept in memory, keyed by content hash
+NORMALIZED_TEXT_CACHE_SIZE = 1024
+
+
+def content_hash(text: str) -> str:
+    # Stable key for a document's content, independent of where it came from
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+_normalized_text_cache = LRUCache(NORMALIZED_TEXT_CACHE_SIZE)
+
+# A store.FingerprintStore that Fingerprint.from_text consults first; set with store.use_store
+_fingerprint_store = None
+
+# NLTK data TextBlob's word tokenizer needs; newer NLTK releases read punkt_tab instead of punkt
+NLTK_RESOURCES = [('tokenizers/punkt_tab', 'punkt_tab'), ('tokenizers/punkt', 'punkt')]
+
+_nltk_resources_checked = False
+
+
+def ensure_nltk_resources():
+    """
+    Make sure the NLTK tokenizer data is available, the first time it is needed.
+
+    Installed data is found without touching the network. Missing data is downloaded
+    unless DIDIT_OFFLINE is set, in which case a LookupError explains what to install.
+    """
+    global _nltk_resources_checked
+    if _nltk_resources_checked:
+        return
+    import nltk
+
+    def installed(path):
+        try:
+            nltk.data.find(path)
+            return True
+        except LookupError:
+            return False
+
+    if not any(installed(path) for path, _ in NLTK_RESOURCES):
+        if not os.environ.get('DIDIT_OFFLINE'):
+            for path, package in NLTK_RESOURCES:
+                if nltk.download(package, quiet=True, raise_on_error=False) and installed(path):
+                    break
+        if not any(installed(path) for path, _ in NLTK_RESOURCES):
+            packages = ' or '.join(package for _, package in NLTK_RESOURCES)
+            raise LookupError(f"NLTK tokenizer data is missing; install it with: python -m nltk.downloader {packages}")
+    _nltk_resources_checked = True
+
+
+def singularize_words(words: List[str], cache=None) -> List[str]:
+    # Each distinct word is singularized once, then reused from the shared word cache
+    from textblob import Word
+    cache = cache or get_word_cache()
+    singular = cache.lookup('singularize', words, lambda missing: [str(Word(word).singularize()) for word in missing])
+    return [singular[word] for word in words]
+
 
-def normalize_text(text: str) -> str:
-    text = TextBlob(text)
+def normalize_text(text: str, corrector=None, cache=None) -> str:
+    from textblob import TextBlob
+    ensure_nltk_resources()
     # remove whitespace, covert to lowercase, attempt to correct spelling
-    text = text.strip().lower().correct()
+    # (with the spelling backend selected in spelling.py unless one is given)
+    text = TextBlob(correct_text(text.strip().lower(), corrector, cache))
     # convert every word in a sentence to singular form
-    words = [word.singularize() for word in text.words]
+    words = singularize_words(text.words, cache)
     # remove stopwords
     filtered_words = [word for word in words if word not in STOPWORDS]
     # join the filtered words back into a single string
     return ' '.join(filtered_words)
 
 
+def cached_normalize_text(text: str) -> str:
+    # Reposts and re-fetched pages skip the normalization pipeline entirely
+    key = content_hash(text)
+    normalized = _normalized_text_cache.get(key)
+    if normalized is None:
+        normalized = normalize_text(text)
+        _normalized_text_cache[key] = normalized
+    return normalized
+
+
+class TextAnalysis(NamedTuple):
+    # A document tokenized and normalized once, shared by every frequency table
+    text: str
+    normalized_text: str
+    words: List[str]
+    normalized_words: List[str]
+
+    @classmethod
+    def from_text(cls, text: str):
+        normalized_text = cached_normalize_text(text)
+        return cls(
+            text=text,
+            normalized_text=normalized_text,
+            words=text.split(),
+            normalized_words=normalized_text.split()
+        )
+
+
+def _relative_frequencies(counts: Counter) -> Dict[str, float]:
+    # Divide each count by the total number of tokens
+    total_tokens = sum(counts.values())
+    return {token: count / total_tokens for token, count in counts.items()}
+
+
+def _stopword_frequencies(word_counts: Counter) -> Dict[str, float]:
+    # Share of each stopword among all stopwords in the text
+    total_stopwords = sum(word_counts[word] for word in STOPWORDS)
+    if total_stopwords == 0:
+        return {word: 0.0 for word in STOPWORDS}
+    return {word: word_counts[word] / total_stopwords for word in STOPWORDS}
+
+
+def _nonletter_frequencies(word_counts: Counter) -> Dict[str, float]:
+    # Share of each word containing a non-letter among all such words, in order of first appearance
+    nonletter_counts = {word: count for word, count in word_counts.items() if not word.isalpha()}
+    total_nonletters = sum(nonletter_counts.values())
+    if total_nonletters == 0:
+        return {}
+    return {word: count / total_nonletters for word, count in nonletter_counts.items()}
+
+
+class FeatureTables(NamedTuple):
+    # Relative character, word, stopword and non-letter frequencies of one text
+    character: Dict[str, float]
+    word: Dict[str, float]
+    stopword: Dict[str, float]
+    nonletter: Dict[str, float]
+
+    @classmethod
+    def from_counts(cls, character_counts: Counter, word_counts: Counter):
+        return cls(
+            character=_relative_frequencies(character_counts),
+            word=_relative_frequencies(word_counts),
+            stopword=_stopword_frequencies(word_counts),
+            nonletter=_nonletter_frequencies(word_counts)
+        )
+
+
+def extract_features(text: str, words: List[str] = None) -> FeatureTables:
+    """
+    Build every frequency table of a text from a single count of its characters and words.
+
+    The tables are identical, key order included, to calculate_relative_character_frequencies,
+    calculate_relative_word_frequencies, calculate_stopword_frequencies and
+    calculate_nonletter_frequencies, which each scan the text on their own.
+    """
+    if words is None:
+        words = text.split()
+    return FeatureTables.from_counts(Counter(text), Counter(words))
+
+
 def calculate_relative_character_frequencies(text: str) -> Dict[str, float]:
-    # Calculate the total number of characters in the text
-    total_characters = len(text)
-    
     # Calculate character frequencies and divide by the total number of characters
-    character_counts = Counter(text)
-    character_frequencies = {char: count / total_characters for char, count in character_counts.items()}
-    
-    return character_frequencies
+    return _relative_frequencies(Counter(text))
 
 
 def calculate_normalized_character_frequencies(text: str) -> Dict[str, int]:
-    return calculate_relative_character_frequencies(normalize_text(text))
+    return calculate_relative_character_frequencies(cached_normalize_text(text))
 
 
 def calculate_relative_word_frequencies(text: str) -> Dict[str, float]:
-    # Split the text into words
-    words = text.split()
-    
-    # Calculate the total number of words in the text
-    total_words = len(words)
-    
-    # Calculate word frequencies and divide by the total number of words
-    word_counts = Counter(words)
-    word_frequencies = {word: count / total_words for word, count in word_counts.items()}
-    
-    return word_frequencies
+    # Split the text into words, then divide word counts by the total number of words
+    return _relative_frequencies(Counter(text.split()))
 
 
 def calculate_normalized_word_frequencies(text: str) -> Dict[str, int]:
-    return calculate_relative_word_frequencies(normalize_text(text))
+    return calculate_relative_word_frequencies(cached_normalize_text(text))
 
 
 def calculate_stopword_frequencies(text: str) -> Dict[str, float]:
-    # Split the text into words
-    words = text.split()
-    
-    # Define the stopwords list
-    stopwords = ['a', 'an', 'the', 'is', 'are', 'am', 'was', 'were']
-    
-    # Calculate the total number of stopwords
-    total_stopwords = sum(1 for word in words if word in STOPWORDS)
-    
-    # Check if total_stopwords is zero to avoid division by zero
-    if total_stopwords == 0:
-        return {word: 0.0 for word in stopwords}
-    
-    # Calculate the stopwords counts and divide by the total number of stopwords
-    stopwords_frequencies = {
-        word: words.count(word) / total_stopwords
-        for word in stopwords
-    }
-    
-    return stopwords_frequencies
+    # Count every word once, then divide the stopword counts by the total number of stopwords
+    return _stopword_frequencies(Counter(text.split()))
 
 
 def calculate_nonletter_frequencies(text: str) -> Dict[str, float]:
-    # Split the text into words
-    words = text.split()
-    
-    # Calculate the total number of non-alphanumeric characters
-    total_nonletters = sum(1 for char in words if not char.isalpha())
-    
-    # Calculate the nonletter counts and divide by the total number of non-alphanumeric characters
-    nonletter_frequencies = {
-        char: words.count(char) / total_nonletters
-        for char in words if not char.isalpha()
-    }
-    
-    return nonletter_frequencies
+    # Count every word once, then divide the counts of words containing non-letters by their total
+    return _nonletter_frequencies(Counter(text.split()))
 
 
 def calculate_cosine_similarity(vector1: Dict[str, int], vector2: Dict[str, int]) -> float:
@@ -158,15 +253,39 @@ class Fingerprint(NamedTuple):
         
     @classmethod
     def from_text(cls, text: str):
-        # Calculate the required frequencies and similarities
-        character_frequency = calculate_relative_character_frequencies(text)
-        normalized_character_frequency = calculate_normalized_character_frequencies(text)
-        word_frequency = calculate_relative_word_frequencies(text)
-        normalized_word_frequency = calculate_normalized_word_frequencies(text)
-        cosine_similarity_char = calculate_cosine_similarity_char(text)
-        cosine_similarity_word = calculate_cosine_similarity_word(text)
-        stopword_frequency = calculate_stopword_frequencies(text)
-        nonletter_frequency = calculate_nonletter_frequencies(text)
+        if _fingerprint_store is not None:
+            return _fingerprint_store.fingerprint(text)
+        return cls.from_analysis(TextAnalysis.from_text(text))
+
+    @classmethod
+    def from_texts(cls, texts, workers: int = None, **options) -> List['Fingerprint']:
+        """
+        Fingerprint many texts in parallel, returning the fingerprints in input order.
+
+        See batch.iter_fingerprints for the options (chunksize, max_pending,
+        min_parallel, on_batch), and for streaming results instead of collecting them.
+        """
+        from batch import iter_fingerprints
+        return list(iter_fingerprints(texts, workers=workers, **options))
+
+    @classmethod
+    def from_analysis(cls, analysis: TextAnalysis):
+        # Every table reads from the same tokenized and normalized document,
+        # with one counting pass over the raw text and one over the normalized text
+        raw = extract_features(analysis.text, analysis.words)
+        normalized = extract_features(analysis.normalized_text, analysis.normalized_words)
+        return cls.from_tables(raw, normalized)
+
+    @classmethod
+    def from_tables(cls, raw: FeatureTables, normalized: FeatureTables):
+        character_frequency = raw.character
+        normalized_character_frequency = normalized.character
+        word_frequency = raw.word
+        normalized_word_frequency = normalized.word
+        cosine_similarity_char = calculate_cosine_similarity(character_frequency, normalized_character_frequency)
+        cosine_similarity_word = calculate_cosine_similarity(word_frequency, normalized_word_frequency)
+        stopword_frequency = raw.stopword
+        nonletter_frequency = raw.nonletter
 
         # Calculate character_delta and word_delta as specified
         character_delta = {}
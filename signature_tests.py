@@ -0,0 +1,90 @@
+import unittest
+from unittest import mock
+import signature
+from signature import (Fingerprint, TextAnalysis, content_hash, normalize_text, extract_features, STOPWORDS,
+                       calculate_relative_character_frequencies, calculate_relative_word_frequencies,
+                       calculate_stopword_frequencies, calculate_nonletter_frequencies,
+                       calculate_cosine_similarity)
+from testing import setUpModule  # noqa: F401
+
+
+def reference_stopword_frequencies(text):
+    # The original per-stopword words.count() implementation
+    words = text.split()
+    total_stopwords = sum(1 for word in words if word in STOPWORDS)
+    if total_stopwords == 0:
+        return {word: 0.0 for word in STOPWORDS}
+    return {word: words.count(word) / total_stopwords for word in STOPWORDS}
+
+
+def reference_nonletter_frequencies(text):
+    # The original quadratic words.count() implementation
+    words = text.split()
+    total_nonletters = sum(1 for char in words if not char.isalpha())
+    return {char: words.count(char) / total_nonletters for char in words if not char.isalpha()}
+
+
+class AnalysisTests(unittest.TestCase):
+    def setUp(self):
+        self.text = "This is a tset of the speling. Cats are running, dogs were barking!"
+        signature._normalized_text_cache.clear()
+
+    def test_from_text_matches_per_table_pipeline(self):
+        fingerprint = Fingerprint.from_text(self.text)
+        normalized = normalize_text(self.text)
+
+        self.assertEqual(fingerprint.NORMALIZED_CHARACTER_FREQUENCY, calculate_relative_character_frequencies(normalized))
+        self.assertEqual(fingerprint.NORMALIZED_WORD_FREQUENCY, calculate_relative_word_frequencies(normalized))
+        self.assertEqual(fingerprint.COSINE_SIMILARITY_CHAR, calculate_cosine_similarity(
+            calculate_relative_character_frequencies(self.text), calculate_relative_character_frequencies(normalized)))
+        self.assertEqual(fingerprint.COSINE_SIMILARITY_WORD, calculate_cosine_similarity(
+            calculate_relative_word_frequencies(self.text), calculate_relative_word_frequencies(normalized)))
+
+    def test_normalizes_once_per_document(self):
+        with mock.patch('signature.normalize_text', wraps=normalize_text) as normalize:
+            Fingerprint.from_text(self.text)
+            Fingerprint.from_text(self.text)
+        self.assertEqual(normalize.call_count, 1)
+
+    def test_analysis_tokens(self):
+        analysis = TextAnalysis.from_text(self.text)
+        self.assertEqual(analysis.words, self.text.split())
+        self.assertEqual(analysis.normalized_words, analysis.normalized_text.split())
+
+    def test_content_hash_is_stable(self):
+        self.assertEqual(content_hash(self.text), content_hash(str(self.text)))
+        self.assertNotEqual(content_hash(self.text), content_hash(self.text + ' '))
+
+
+class FeatureExtractionTests(unittest.TestCase):
+    texts = [
+        "This is a tset of the speling. Cats are running, dogs were barking!",
+        "I can't believe it's not butter!! Wow... #amazing @friend 100% recomend",
+        "no punctuation here at all just words",
+        "a an the is are am was were the the a",
+        "",
+    ]
+
+    def test_matches_per_table_functions(self):
+        for text in self.texts:
+            tables = extract_features(text)
+            # Compare item lists so that key order, and therefore summation order, matches too
+            self.assertEqual(list(tables.character.items()), list(calculate_relative_character_frequencies(text).items()))
+            self.assertEqual(list(tables.word.items()), list(calculate_relative_word_frequencies(text).items()))
+            self.assertEqual(list(tables.stopword.items()), list(reference_stopword_frequencies(text).items()))
+            self.assertEqual(list(tables.nonletter.items()), list(reference_nonletter_frequencies(text).items()))
+            self.assertEqual(calculate_stopword_frequencies(text), reference_stopword_frequencies(text))
+            self.assertEqual(calculate_nonletter_frequencies(text), reference_nonletter_frequencies(text))
+
+    def test_no_nonletters(self):
+        self.assertEqual(extract_features("just plain words").nonletter, {})
+
+    def test_long_punctuation_heavy_text(self):
+        text = ' '.join(f'{i}!' for i in range(50000))
+        tables = extract_features(text)
+        self.assertEqual(len(tables.nonletter), 50000)
+        self.assertEqual(tables.nonletter['7!'], 1 / 50000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,331 @@
+import hashlib
+import json
+import os
+import re
+import string
+import tempfile
+from importlib.util import find_spec
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from cache import default_cache_dir, get_word_cache
+
+
+# Matches a word, a single punctuation character or a single whitespace character,
+# the same tokens TextBlob.correct() corrects one by one
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s")
+
+# Tokens that TextBlob's spelling corrector always returns unchanged
+PUNCTUATION = ".,;:!?()[]{}`''\"@#$^&*+-|=~_"
+
+MAX_EDIT_DISTANCE = 2
+
+# Bumped whenever the on-disk index layout changes
+INDEX_VERSION = 1
+
+DEFAULT_BACKEND = os.environ.get('DIDIT_SPELLING', 'symspell')
+
+
+def default_frequency_list() -> str:
+    # The word-frequency list TextBlob's own corrector is trained on,
+    # located without importing TextBlob itself
+    package_dir = find_spec('textblob').submodule_search_locations[0]
+    return os.path.join(package_dir, 'en', 'en-spelling.txt')
+
+
+def read_frequency_list(path: str) -> Dict[str, int]:
+    # Lines are "word count"; lines starting with ';;;' are comments
+    counts = {}
+    with open(path, 'r', encoding='utf-8') as frequency_file:
+        for line in frequency_file:
+            line = line.strip()
+            if not line or line.startswith(';;;'):
+                continue
+            word, count = line.split()[:2]
+            counts[word] = int(count)
+    return counts
+
+
+def is_passthrough(word: str) -> bool:
+    # Single characters, punctuation, whitespace and numbers are never corrected
+    return (len(word) == 1 or word in PUNCTUATION or word in string.whitespace
+            or word.replace('.', '').isdigit())
+
+
+def _hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _deletes(word: str, max_distance: int) -> set:
+    # Every string obtained by deleting up to max_distance characters, including the word itself
+    deletes = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {candidate[:i] + candidate[i + 1:] for candidate in frontier for i in range(len(candidate))}
+        deletes |= frontier
+    return deletes
+
+
+def within_one_edit(source: str, target: str) -> bool:
+    # Whether a single delete, insert, replace or adjacent transposition turns source into target
+    if source == target or abs(len(source) - len(target)) > 1:
+        return False
+    prefix = 0
+    shortest = min(len(source), len(target))
+    while prefix < shortest and source[prefix] == target[prefix]:
+        prefix += 1
+    if len(source) != len(target):
+        # The rest must match once the extra character is skipped
+        return source[prefix + (len(source) > len(target)):] == target[prefix + (len(target) > len(source)):]
+    if source[prefix + 1:] == target[prefix + 1:]:
+        return True
+    return (prefix + 1 < len(source) and source[prefix] == target[prefix + 1]
+            and source[prefix + 1] == target[prefix] and source[prefix + 2:] == target[prefix + 2:])
+
+
+def edit_distance(source: str, target: str, max_distance: int = MAX_EDIT_DISTANCE) -> int:
+    """
+    Unrestricted Damerau-Levenshtein distance between two strings.
+
+    This is the number of deletes, inserts, replacements and adjacent transpositions
+    applied one after another, which is exactly what chaining TextBlob's edit1 generates.
+    Returns max_distance + 1 when the distance is larger than max_distance.
+    """
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+
+    # Lowrance-Wagner algorithm
+    infinity = len(source) + len(target)
+    last_row = {}
+    matrix = [[infinity] * (len(target) + 2)]
+    matrix += [[infinity] + list(range(len(target) + 1))]
+    for i in range(1, len(source) + 1):
+        matrix.append([infinity, i] + [0] * len(target))
+        last_match = 0
+        for j in range(1, len(target) + 1):
+            k = last_row.get(target[j - 1], 0)
+            l = last_match
+            if source[i - 1] == target[j - 1]:
+                cost = 0
+                last_match = j
+            else:
+                cost = 1
+            matrix[i + 1][j + 1] = min(
+                matrix[i][j] + cost,
+                matrix[i + 1][j] + 1,
+                matrix[i][j + 1] + 1,
+                matrix[k][l] + (i - k - 1) + 1 + (j - l - 1)
+            )
+        last_row[source[i - 1]] = i
+    distance = matrix[len(source) + 1][len(target) + 1]
+    return distance if distance <= max_distance else max_distance + 1
+
+
+class TextBlobCorrector:
+    """Corrects words one at a time with TextBlob's Norvig-style corrector."""
+
+    name = 'textblob'
+    cache_kind = 'correct:textblob'
+
+    def correct(self, word: str) -> str:
+        from textblob import Word
+        return str(Word(word).correct())
+
+    def correct_words(self, words: Iterable[str]) -> List[str]:
+        return [self.correct(word) for word in words]
+
+
+class SymSpellCorrector:
+    """
+    Symmetric-delete spelling corrector.
+
+    Every dictionary word is indexed under each string reachable by deleting up to
+    max_distance of its characters. Looking up a word only needs the deletes of the
+    word itself, so no edit candidates are generated for the whole alphabet. The
+    candidates are then ranked like TextBlob's corrector: the nearest edit distance
+    first, then the highest count, then the lexicographically largest word.
+
+    Args:
+        words (list): Dictionary words, in index order.
+        counts (np.ndarray): Count of each dictionary word.
+        delete_hashes (np.ndarray): Sorted hashes of every indexed delete.
+        delete_offsets (np.ndarray): Start of each hash's word ids in delete_words.
+        delete_words (np.ndarray): Word ids grouped by delete hash.
+        max_distance (int): Largest edit distance considered for a correction.
+        digest (str): Content hash of the word list, naming the index's entries in the
+            word cache; computed from words and counts if not given.
+    """
+
+    name = 'symspell'
+
+    def __init__(self, words: List[str], counts: np.ndarray, delete_hashes: np.ndarray,
+                 delete_offsets: np.ndarray, delete_words: np.ndarray, max_distance: int = MAX_EDIT_DISTANCE,
+                 digest: Optional[str] = None):
+        self.words = words
+        self.counts = counts
+        self.delete_hashes = delete_hashes
+        self.delete_offsets = delete_offsets
+        self.delete_words = delete_words
+        self.max_distance = max_distance
+        self.known = {word: int(count) for word, count in zip(words, counts)}
+        if digest is None:
+            listing = '\n'.join(f'{word} {count}' for word, count in self.known.items())
+            digest = hashlib.sha1(listing.encode('utf-8')).hexdigest()[:16]
+        # Corrections depend on the word list and the distance, like the index path
+        self.cache_kind = f'correct:{self.name}:{digest}-d{max_distance}'
+
+    @classmethod
+    def build(cls, counts: Dict[str, int], max_distance: int = MAX_EDIT_DISTANCE, digest: Optional[str] = None):
+        words = list(counts)
+        hashes = []
+        word_ids = []
+        for word_id, word in enumerate(words):
+            for delete in _deletes(word, max_distance):
+                hashes.append(_hash(delete))
+                word_ids.append(word_id)
+
+        hashes = np.array(hashes, dtype=np.uint64)
+        word_ids = np.array(word_ids, dtype=np.int32)
+        order = np.argsort(hashes, kind='stable')
+        hashes, word_ids = hashes[order], word_ids[order]
+        delete_hashes, starts = np.unique(hashes, return_index=True)
+        delete_offsets = np.append(starts, len(hashes)).astype(np.int64)
+
+        return cls(words, np.array([counts[word] for word in words], dtype=np.int64),
+                   delete_hashes, delete_offsets, word_ids, max_distance, digest)
+
+    @classmethod
+    def from_frequency_list(cls, path: Optional[str] = None, index_dir: Optional[str] = None,
+                            max_distance: int = MAX_EDIT_DISTANCE):
+        """
+        Load the index for a word-frequency list, building and saving it on first use.
+
+        The index is stored under index_dir (default: DIDIT_CACHE_DIR or ~/.cache/didit)
+        in a directory named after the list's content hash, so editing the list
+        rebuilds it automatically.
+        """
+        path = path or default_frequency_list()
+        with open(path, 'rb') as frequency_file:
+            digest = hashlib.sha1(frequency_file.read()).hexdigest()[:16]
+        index_path = os.path.join(index_dir or default_cache_dir(), 'symspell',
+                                  f'{digest}-d{max_distance}-v{INDEX_VERSION}')
+
+        if os.path.exists(os.path.join(index_path, 'meta.json')):
+            return cls.load(index_path, digest)
+
+        corrector = cls.build(read_frequency_list(path), max_distance, digest)
+        corrector.save(index_path)
+        return corrector
+
+    def save(self, index_path: str):
+        # Write into a scratch directory and rename it, so concurrent workers never see half an index
+        parent = os.path.dirname(index_path)
+        os.makedirs(parent, exist_ok=True)
+        scratch = tempfile.mkdtemp(dir=parent)
+        with open(os.path.join(scratch, 'words.txt'), 'w', encoding='utf-8') as words_file:
+            words_file.write('\n'.join(self.words))
+        np.save(os.path.join(scratch, 'counts.npy'), self.counts)
+        np.save(os.path.join(scratch, 'delete_hashes.npy'), self.delete_hashes)
+        np.save(os.path.join(scratch, 'delete_offsets.npy'), self.delete_offsets)
+        np.save(os.path.join(scratch, 'delete_words.npy'), self.delete_words)
+        with open(os.path.join(scratch, 'meta.json'), 'w', encoding='utf-8') as meta_file:
+            json.dump({'version': INDEX_VERSION, 'max_distance': self.max_distance}, meta_file)
+        try:
+            os.rename(scratch, index_path)
+        except OSError:
+            # Another process saved the same index first
+            for name in os.listdir(scratch):
+                os.remove(os.path.join(scratch, name))
+            os.rmdir(scratch)
+
+    @classmethod
+    def load(cls, index_path: str, digest: Optional[str] = None):
+        with open(os.path.join(index_path, 'meta.json'), 'r', encoding='utf-8') as meta_file:
+            meta = json.load(meta_file)
+        with open(os.path.join(index_path, 'words.txt'), 'r', encoding='utf-8') as words_file:
+            words = words_file.read().split('\n')
+        arrays = [np.load(os.path.join(index_path, f'{name}.npy'), mmap_mode='r')
+                  for name in ('counts', 'delete_hashes', 'delete_offsets', 'delete_words')]
+        return cls(words, *arrays, max_distance=meta['max_distance'], digest=digest)
+
+    def candidates(self, word: str) -> set:
+        # Ids of dictionary words sharing at least one delete with the word
+        hashes = np.array([_hash(delete) for delete in _deletes(word, self.max_distance)], dtype=np.uint64)
+        positions = np.searchsorted(self.delete_hashes, hashes)
+        found = positions < len(self.delete_hashes)
+        found[found] = self.delete_hashes[positions[found]] == hashes[found]
+        candidates = set()
+        for position in positions[found]:
+            candidates.update(self.delete_words[self.delete_offsets[position]:self.delete_offsets[position + 1]].tolist())
+        return candidates
+
+    def correct(self, word: str) -> str:
+        if is_passthrough(word) or word in self.known:
+            return word
+
+        # Keep the candidates at the smallest edit distance, checking the cheap
+        # single-edit case before computing full distances
+        candidates = [self.words[word_id] for word_id in self.candidates(word)]
+        nearest = [candidate for candidate in candidates if within_one_edit(word, candidate)]
+        if not nearest:
+            nearest = self._nearest(word, candidates)
+        if not nearest:
+            return word
+
+        correction = max(nearest, key=lambda candidate: (self.known[candidate], candidate))
+        # Preserve capitalization
+        return correction.title() if word.istitle() else correction
+
+    def _nearest(self, word: str, candidates: List[str]) -> List[str]:
+        best_distance = self.max_distance + 1
+        nearest = []
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, self.max_distance)
+            if distance > self.max_distance:
+                continue
+            if distance < best_distance:
+                best_distance = distance
+                nearest = [candidate]
+            elif distance == best_distance:
+                nearest.append(candidate)
+        return nearest
+
+    def correct_words(self, words: Iterable[str]) -> List[str]:
+        # Each distinct word is looked up once per batch
+        words = list(words)
+        corrections = {word: self.correct(word) for word in set(words)}
+        return [corrections[word] for word in words]
+
+
+_correctors = {}
+
+
+def get_corrector(name: Optional[str] = None):
+    """Return the shared corrector for a backend name ('symspell' or 'textblob')."""
+    name = name or DEFAULT_BACKEND
+    if name not in _correctors:
+        if name == 'symspell':
+            _correctors[name] = SymSpellCorrector.from_frequency_list()
+        elif name == 'textblob':
+            _correctors[name] = TextBlobCorrector()
+        else:
+            raise ValueError(f"Unknown spelling backend: {name}")
+    return _correctors[name]
+
+
+def set_default_backend(name: str):
+    """Switch the backend used by normalize_text, e.g. back to 'textblob' for comparison."""
+    global DEFAULT_BACKEND
+    get_corrector(name)
+    DEFAULT_BACKEND = name
+
+
+def correct_text(text: str, corrector=None, cache=None) -> str:
+    # Correct every token and join them back together, as TextBlob.correct() does.
+    # Words already corrected by any process sharing the word cache are not corrected again.
+    corrector = corrector or get_corrector()
+    cache = cache or get_word_cache()
+    tokens = TOKEN_PATTERN.findall(text)
+    corrections = cache.lookup(corrector.cache_kind,
+                               (token for token in tokens if not is_passthrough(token)),
+                               corrector.correct_words)
+    return ''.join(corrections.get(token, token) for token in tokens)
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from cache import WordCache
+from signature import normalize_text
+from spelling import (SymSpellCorrector, TextBlobCorrector, correct_text, edit_distance,
+                      get_corrector, within_one_edit)
+from testing import setUpModule  # noqa: F401
+
+
+class EditDistanceTests(unittest.TestCase):
+    def test_single_edits(self):
+        for source, target in [('speling', 'spelling'), ('teh', 'the'), ('cat', 'cut'), ('cats', 'cat')]:
+            self.assertTrue(within_one_edit(source, target))
+            self.assertEqual(edit_distance(source, target), 1)
+
+    def test_unrestricted_transposition(self):
+        # A transposition followed by an insert between the swapped characters
+        self.assertEqual(edit_distance('ca', 'abc'), 2)
+        self.assertFalse(within_one_edit('ca', 'abc'))
+
+    def test_caps_distance(self):
+        self.assertEqual(edit_distance('spuicila', 'suicidal'), 3)
+
+
+def isolate_caches(test: unittest.TestCase):
+    # Keep the word cache in memory and the SymSpell index in a scratch directory, not in ~/.cache/didit
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    for patcher in (mock.patch.dict(os.environ, {'DIDIT_CACHE_DIR': directory.name, 'DIDIT_WORD_CACHE': 'memory'}),
+                    mock.patch('cache._word_cache', None), mock.patch('spelling._correctors', {})):
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    return directory.name
+
+
+class SymSpellTests(unittest.TestCase):
+    def setUp(self):
+        self.index_dir = isolate_caches(self)
+        self.frequency_list = os.path.join(self.index_dir, 'words.txt')
+        with open(self.frequency_list, 'w', encoding='utf-8') as frequency_file:
+            frequency_file.write(';;; comment\nspelling 10\nspewing 3\nthe 100\ntea 5\nhe 50\n')
+
+    def test_ranks_like_textblob(self):
+        corrector = SymSpellCorrector.from_frequency_list(self.frequency_list, self.index_dir)
+
+        self.assertEqual(corrector.correct('speling'), 'spelling')
+        self.assertEqual(corrector.correct('teh'), 'the')
+        self.assertEqual(corrector.correct('Teh'), 'The')
+        self.assertEqual(corrector.correct('xyzzy'), 'xyzzy')
+        self.assertEqual(corrector.correct('3.5'), '3.5')
+
+    def test_index_is_saved_and_reloaded(self):
+        built = SymSpellCorrector.from_frequency_list(self.frequency_list, self.index_dir)
+        loaded = SymSpellCorrector.from_frequency_list(self.frequency_list, self.index_dir)
+
+        self.assertEqual(loaded.words, built.words)
+        self.assertEqual(len(os.listdir(os.path.join(self.index_dir, 'symspell'))), 1)
+
+    def test_corrections_are_cached_per_word_list_and_distance(self):
+        cache = WordCache(None)
+        corrector = SymSpellCorrector.from_frequency_list(self.frequency_list, self.index_dir)
+        self.assertEqual(correct_text('teh spelingg', corrector, cache), 'the spelling')
+
+        # A list where 'teh' is a word of its own, and a distance too small to reach 'spelling'
+        other_list = os.path.join(self.index_dir, 'other.txt')
+        with open(other_list, 'w', encoding='utf-8') as frequency_file:
+            frequency_file.write('teh 10\nspelling 10\n')
+        other = SymSpellCorrector.from_frequency_list(other_list, self.index_dir)
+        self.assertEqual(correct_text('teh spelingg', other, cache), 'teh spelling')
+        nearer = SymSpellCorrector.from_frequency_list(self.frequency_list, self.index_dir, max_distance=1)
+        self.assertEqual(correct_text('teh spelingg', nearer, cache), 'the spelingg')
+
+    def test_batch_api(self):
+        corrector = SymSpellCorrector.from_frequency_list(self.frequency_list, self.index_dir)
+        self.assertEqual(corrector.correct_words(['teh', ' ', 'speling', ' ', 'teh']),
+                         ['the', ' ', 'spelling', ' ', 'the'])
+
+
+class BackendEquivalenceTests(unittest.TestCase):
+    def setUp(self):
+        isolate_caches(self)
+
+    def test_matches_textblob(self):
+        symspell = get_corrector('symspell')
+        textblob = TextBlobCorrector()
+        words = ['speling', 'recieve', 'teh', 'pacakge', 'tomorow', 'adress', 'Speling', 'barkign',
+                 'runnning', 'don', 'naïve', 'x1y', '__']
+
+        self.assertEqual(symspell.correct_words(words), textblob.correct_words(words))
+
+    def test_normalize_text_matches_textblob(self):
+        text = "I can't recieve the pacakge tomorow, teh adress is 221B Baker Street!"
+        self.assertEqual(correct_text(text, get_corrector('symspell')), correct_text(text, TextBlobCorrector()))
+        self.assertEqual(normalize_text(text, get_corrector('symspell')), normalize_text(text, TextBlobCorrector()))
+
+
+if __name__ == '__main__':
+    unittest.main()
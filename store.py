@@ -0,0 +1,304 @@
+import atexit
+import hashlib
+import json
+import os
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+import signature
+from compact import ALPHABET, CHARACTER_FIELDS, HEAD_SIZE, CompactFingerprint, Vocabulary, _CHARACTERS, _SCALARS, _STOPWORDS
+from signature import Fingerprint, TextAnalysis
+
+
+# Bumped whenever the on-disk layout changes
+STORE_VERSION = 1
+
+DIGEST_SIZE = 20
+
+# Fingerprints computed by FingerprintStore.fingerprint are buffered and appended this many at a time
+FLUSH_ROWS = 256
+
+
+def content_digest(text: str) -> bytes:
+    # The raw bytes behind signature.content_hash
+    return hashlib.sha1(text.encode('utf-8')).digest()
+
+
+class FingerprintStore:
+    """
+    A persistent, append-only store of fingerprints keyed by content hash.
+
+    Fingerprints are kept in the CompactFingerprint layout, split into columns:
+
+        heads.f32       (rows x HEAD_SIZE) float32: character tables, stopwords, scalars, offsets
+        sparse.f32      every row's sparse ids and values, one row after another
+        ends.i64        (rows,) end of each row in sparse.f32
+        digests.bin     (rows x 20) SHA-1 digests of each row's text
+        vocabulary.jsonl  one interned word per line, in id order
+        meta.json       row count and sizes; written last, so it marks what is committed
+
+    Readers memory-map every column, so opening a store of millions of fingerprints is
+    instant and rows are zero-copy views. Only one process should append at a time;
+    rows appended by another process become visible after refresh(). Fingerprints
+    computed by fingerprint() are committed FLUSH_ROWS at a time, by flush() or by close().
+
+    Args:
+        path (str): Directory of the store; created if missing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.vocabulary = Vocabulary()
+        self._vocabulary_size = 0
+        self._pid = os.getpid()
+        # Fingerprints computed but not yet appended, by digest
+        self._pending: Dict[bytes, Tuple[str, Fingerprint]] = {}
+        self.meta = None
+        self._index = None
+        self.refresh()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def refresh(self):
+        # (Re)open the committed part of every column; a lookup index already built takes in the new rows
+        previous_rows = self.meta['rows'] if self.meta else 0
+        meta = {'version': STORE_VERSION, 'rows': 0, 'sparse': 0, 'vocabulary': 0}
+        if os.path.exists(self._file('meta.json')):
+            with open(self._file('meta.json'), 'r', encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            if meta['version'] != STORE_VERSION:
+                raise ValueError(f"{self.path} has store version {meta['version']}, expected {STORE_VERSION}")
+        self.meta = meta
+
+        rows = meta['rows']
+        self.heads = self._map('heads.f32', np.float32, (rows, HEAD_SIZE))
+        self.sparse = self._map('sparse.f32', np.float32, (meta['sparse'],))
+        self.ends = self._map('ends.i64', np.int64, (rows,))
+        self.digests = self._map('digests.bin', np.uint8, (rows, DIGEST_SIZE))
+
+        if meta['vocabulary'] > self._vocabulary_size:
+            with open(self._file('vocabulary.jsonl'), 'r', encoding='utf-8') as vocabulary_file:
+                for number, line in enumerate(vocabulary_file):
+                    if number >= meta['vocabulary']:
+                        break
+                    if number >= self._vocabulary_size:
+                        self.vocabulary.id(json.loads(line))
+            self._vocabulary_size = meta['vocabulary']
+        if self._index is not None:
+            self._index = self._merge_index(previous_rows) if rows >= previous_rows else None
+
+    def _map(self, name: str, dtype, shape) -> np.ndarray:
+        if not shape[0]:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode='r', shape=shape)
+
+    def __len__(self) -> int:
+        return self.meta['rows']
+
+    def _lookup_index(self):
+        # Rows sorted by the first 8 bytes of their digest, built on the first lookup
+        if self._index is None:
+            prefixes = np.ascontiguousarray(self.digests[:, :8]).view(np.uint64).ravel()
+            order = np.argsort(prefixes, kind='stable')
+            self._index = (prefixes[order], order)
+        return self._index
+
+    def _merge_index(self, previous_rows: int):
+        # Merge the sorted prefixes of the rows from previous_rows on into the index, without re-sorting it
+        prefixes, order = self._index
+        added = np.ascontiguousarray(self.digests[previous_rows:, :8]).view(np.uint64).ravel()
+        added_order = np.argsort(added, kind='stable')
+        positions = np.searchsorted(prefixes, added[added_order], side='right')
+        return (np.insert(prefixes, positions, added[added_order]),
+                np.insert(order, positions, added_order + previous_rows))
+
+    def row_of(self, digest: bytes) -> Optional[int]:
+        # Row holding the text with this SHA-1 digest, or None
+        if not len(self):
+            return None
+        prefixes, order = self._lookup_index()
+        prefix = np.frombuffer(digest[:8], dtype=np.uint64)[0]
+        position = np.searchsorted(prefixes, prefix)
+        while position < len(prefixes) and prefixes[position] == prefix:
+            row = int(order[position])
+            if bytes(self.digests[row]) == digest:
+                return row
+            position += 1
+        return None
+
+    def __contains__(self, text: str) -> bool:
+        return self.row_of(content_digest(text)) is not None
+
+    def row(self, row: int) -> CompactFingerprint:
+        # A zero-copy view of one stored fingerprint
+        start = int(self.ends[row - 1]) if row else 0
+        return CompactFingerprint(self.heads[row], self.vocabulary, tail=self.sparse[start:int(self.ends[row])])
+
+    def get(self, text: str) -> Optional[CompactFingerprint]:
+        row = self.row_of(content_digest(text))
+        return None if row is None else self.row(row)
+
+    def __iter__(self) -> Iterator[CompactFingerprint]:
+        for row in range(len(self)):
+            yield self.row(row)
+
+    @property
+    def characters(self) -> np.ndarray:
+        # (rows x CHARACTER_FIELDS x ALPHABET) character frequencies of every row, NaN where absent
+        return self.heads[:, _CHARACTERS].reshape(len(self), len(CHARACTER_FIELDS), len(ALPHABET))
+
+    @property
+    def stopwords(self) -> np.ndarray:
+        # (rows x STOPWORDS) stopword frequencies of every row
+        return self.heads[:, _STOPWORDS]
+
+    @property
+    def scalars(self) -> np.ndarray:
+        # (rows x 3) COSINE_SIMILARITY_CHAR, COSINE_SIMILARITY_WORD and structural_deviation of every row
+        if not len(self):
+            return np.empty((0, 3), dtype=np.float64)
+        return np.ndarray((len(self), 3), dtype=np.float64, buffer=self.heads,
+                          offset=_SCALARS.start * 4, strides=(HEAD_SIZE * 4, 8))
+
+    def append(self, texts: Iterable[str], fingerprints: Iterable[Fingerprint]) -> int:
+        """
+        Append fingerprints with the texts they were computed from, after any buffered by
+        fingerprint(); texts already stored are skipped. Returns the number of rows added.
+        """
+        if os.getpid() != self._pid:
+            raise RuntimeError("FingerprintStore can only be appended to by the process that opened it")
+        self._truncate_uncommitted()
+
+        pending, self._pending = list(self._pending.values()), {}
+        known = set()
+        heads, sparse, ends, digests = [], [], [], []
+        end = self.meta['sparse']
+        for text, fingerprint in chain(pending, zip(texts, fingerprints)):
+            digest = content_digest(text)
+            if digest in known or self.row_of(digest) is not None:
+                continue
+            known.add(digest)
+            if not isinstance(fingerprint, Fingerprint):
+                fingerprint = fingerprint.to_fingerprint()
+            compact = CompactFingerprint.from_fingerprint(fingerprint, self.vocabulary)
+            heads.append(compact.head)
+            sparse.append(compact.sparse_part)
+            end += len(compact.sparse_part)
+            ends.append(end)
+            digests.append(digest)
+        if not heads:
+            return 0
+
+        with open(self._file('vocabulary.jsonl'), 'a', encoding='utf-8') as vocabulary_file:
+            for word in self.vocabulary.words[self._vocabulary_size:]:
+                vocabulary_file.write(json.dumps(word) + '\n')
+        self._write('heads.f32', np.concatenate(heads))
+        self._write('sparse.f32', np.concatenate(sparse))
+        self._write('ends.i64', np.array(ends, dtype=np.int64))
+        self._write('digests.bin', np.frombuffer(b''.join(digests), dtype=np.uint8))
+
+        meta = {'version': STORE_VERSION, 'rows': self.meta['rows'] + len(heads), 'sparse': end,
+                'vocabulary': len(self.vocabulary)}
+        scratch = self._file('meta.json.tmp')
+        with open(scratch, 'w', encoding='utf-8') as meta_file:
+            json.dump(meta, meta_file)
+            meta_file.flush()
+            os.fsync(meta_file.fileno())
+        os.replace(scratch, self._file('meta.json'))
+        self._vocabulary_size = len(self.vocabulary)
+        self.refresh()
+        return len(heads)
+
+    def _write(self, name: str, array: np.ndarray):
+        with open(self._file(name), 'ab') as column:
+            column.write(array.tobytes())
+            column.flush()
+            os.fsync(column.fileno())
+
+    def _truncate_uncommitted(self):
+        # Drop anything written after the last committed meta.json, e.g. by an interrupted append
+        rows = self.meta['rows']
+        sizes = {
+            'heads.f32': rows * HEAD_SIZE * 4,
+            'sparse.f32': self.meta['sparse'] * 4,
+            'ends.i64': rows * 8,
+            'digests.bin': rows * DIGEST_SIZE,
+        }
+        for name, size in sizes.items():
+            if os.path.exists(self._file(name)) and os.path.getsize(self._file(name)) > size:
+                with open(self._file(name), 'r+b') as column:
+                    column.truncate(size)
+        if os.path.exists(self._file('vocabulary.jsonl')):
+            with open(self._file('vocabulary.jsonl'), 'r+', encoding='utf-8') as vocabulary_file:
+                committed = 0
+                for _ in range(self.meta['vocabulary']):
+                    line = vocabulary_file.readline()
+                    committed += len(line.encode('utf-8'))
+                vocabulary_file.truncate(committed)
+        # Words interned by a failed append are forgotten too
+        del self.vocabulary.words[self._vocabulary_size:]
+        self.vocabulary.ids = {word: word_id for word_id, word in enumerate(self.vocabulary.words)}
+
+    def fingerprint(self, text: str) -> Fingerprint:
+        """
+        Return the stored fingerprint of a text, computing it if it is new.
+
+        New fingerprints are buffered and appended FLUSH_ROWS at a time, so a stream of
+        new texts costs one append per batch rather than per text. Stored fingerprints
+        come back with their values rounded to float32. Processes other than the one that
+        opened the store only read from it.
+        """
+        digest = content_digest(text)
+        if digest in self._pending:
+            return self._pending[digest][1]
+        row = self.row_of(digest)
+        if row is not None:
+            return self.row(row).to_fingerprint()
+        fingerprint = Fingerprint.from_analysis(TextAnalysis.from_text(text))
+        if os.getpid() == self._pid:
+            self._pending[digest] = (text, fingerprint)
+            if len(self._pending) >= FLUSH_ROWS:
+                self.flush()
+        return fingerprint
+
+    def flush(self) -> int:
+        # Commit the fingerprints buffered by fingerprint(); returns the number of rows added
+        return self.append([], []) if self._pending else 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self) -> 'FingerprintStore':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def fingerprints(self, texts: List[str], **options) -> List[Fingerprint]:
+        # Look up every text, fingerprint the missing ones as a batch and append them
+        stored = [self.get(text) for text in texts]
+        missing = [text for text, fingerprint in zip(texts, stored) if fingerprint is None]
+        computed = iter(Fingerprint.from_texts(missing, **options))
+        results = [next(computed) if fingerprint is None else fingerprint.to_fingerprint() for fingerprint in stored]
+        self.append(missing, [fingerprint for fingerprint, was in zip(results, stored) if was is None])
+        return results
+
+
+def use_store(store: Optional[FingerprintStore]):
+    """
+    Make Fingerprint.from_text look texts up in a store first (None turns it off). The
+    store previously in use is flushed, and the one in use at exit is flushed then.
+    """
+    previous = signature._fingerprint_store
+    if previous is not None and previous is not store and os.getpid() == previous._pid:
+        previous.flush()
+    signature._fingerprint_store = store
+
+
+@atexit.register
+def _flush_store_in_use():
+    store = signature._fingerprint_store
+    if store is not None and os.getpid() == store._pid:
+        store.flush()
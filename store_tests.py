@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import signature
+from signature import Fingerprint
+from store import FingerprintStore, content_digest, use_store
+from testing import setUpModule  # noqa: F401
+
+
+class FingerprintStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'store')
+        self.texts = ["The cat sat on the mat.", "Dogs were barking at the mailman!", "Les élèves étaient très fatigués"]
+        self.fingerprints = [Fingerprint.from_text(text) for text in self.texts]
+
+    def tearDown(self):
+        use_store(None)
+        self.directory.cleanup()
+
+    def assert_fingerprints_close(self, stored, fingerprint):
+        for field in ('CHARACTER_FREQUENCY', 'WORD_FREQUENCY', 'NORMALIZED_WORD_FREQUENCY', 'NONLETTER_FREQUENCY',
+                      'STOPWORD_FREQUENCY', 'character_delta', 'word_delta'):
+            table = getattr(fingerprint, field)
+            self.assertEqual(set(getattr(stored, field)), set(table))
+            for key, value in table.items():
+                self.assertAlmostEqual(getattr(stored, field)[key], value, places=6)
+        self.assertEqual(stored.structural_deviation, fingerprint.structural_deviation)
+
+    def test_append_and_reopen(self):
+        store = FingerprintStore(self.path)
+        self.assertEqual(store.append(self.texts, self.fingerprints), 3)
+        reopened = FingerprintStore(self.path)
+        self.assertEqual(len(reopened), 3)
+        for text, fingerprint in zip(self.texts, self.fingerprints):
+            self.assertIn(text, reopened)
+            self.assert_fingerprints_close(reopened.get(text), fingerprint)
+        self.assertIsNone(reopened.get("never stored"))
+        self.assertEqual(reopened.scalars.shape, (3, 3))
+        self.assertEqual(reopened.scalars[1, 2], self.fingerprints[1].structural_deviation)
+
+    def test_duplicates_are_skipped(self):
+        store = FingerprintStore(self.path)
+        store.append(self.texts[:2], self.fingerprints[:2])
+        self.assertEqual(store.append(self.texts, self.fingerprints), 1)
+        self.assertEqual(len(store), 3)
+
+    def test_vocabulary_grows_across_sessions(self):
+        FingerprintStore(self.path).append(self.texts[:1], self.fingerprints[:1])
+        store = FingerprintStore(self.path)
+        store.append(self.texts[1:], self.fingerprints[1:])
+        reopened = FingerprintStore(self.path)
+        for text, fingerprint in zip(self.texts, self.fingerprints):
+            self.assert_fingerprints_close(reopened.get(text), fingerprint)
+
+    def test_uncommitted_rows_are_dropped(self):
+        store = FingerprintStore(self.path)
+        store.append(self.texts[:1], self.fingerprints[:1])
+        # Simulate an append interrupted before meta.json was written
+        with open(os.path.join(self.path, 'heads.f32'), 'ab') as heads:
+            heads.write(b'\0' * 100)
+        with open(os.path.join(self.path, 'vocabulary.jsonl'), 'a', encoding='utf-8') as vocabulary:
+            vocabulary.write('"partial"\n')
+        store = FingerprintStore(self.path)
+        self.assertEqual(len(store), 1)
+        store.append(self.texts[1:], self.fingerprints[1:])
+        reopened = FingerprintStore(self.path)
+        self.assertNotIn('partial', reopened.vocabulary.ids)
+        for text, fingerprint in zip(self.texts, self.fingerprints):
+            self.assert_fingerprints_close(reopened.get(text), fingerprint)
+
+    def test_from_text_uses_store(self):
+        store = FingerprintStore(self.path)
+        use_store(store)
+        first = Fingerprint.from_text(self.texts[0])
+        self.assertIs(signature._fingerprint_store, store)
+        self.assertEqual(Fingerprint.from_text(self.texts[0]), first)
+        # New fingerprints are buffered until flushed, here by switching the store off
+        self.assertEqual(len(store), 0)
+        use_store(None)
+        self.assertEqual(len(store), 1)
+        self.assert_fingerprints_close(store.get(self.texts[0]), first)
+
+    def test_misses_are_appended_in_batches(self):
+        texts = [f"Post number {i} about the weather" for i in range(7)]
+        with mock.patch('store.FLUSH_ROWS', 3), FingerprintStore(self.path) as store:
+            with mock.patch.object(store, 'append', wraps=store.append) as append:
+                for text in texts:
+                    store.fingerprint(text)
+            self.assertEqual(append.call_count, 2)
+            self.assertEqual(len(store), 6)
+        self.assertEqual(len(FingerprintStore(self.path)), 7)
+
+    def test_lookup_index_takes_in_appended_rows(self):
+        texts = [f"Message {i}: see you at {i} o'clock" for i in range(40)]
+        store = FingerprintStore(self.path)
+        store.append(texts[:20], [Fingerprint.from_text(text) for text in texts[:20]])
+        self.assertIsNotNone(store.get(texts[0]))
+        index = store._index
+
+        store.append(texts[20:], [Fingerprint.from_text(text) for text in texts[20:]])
+
+        self.assertIsNot(store._index, index)
+        prefixes, order = store._index
+        self.assertTrue((prefixes[1:] >= prefixes[:-1]).all())
+        self.assertEqual(sorted(order.tolist()), list(range(40)))
+        for row, text in enumerate(texts):
+            self.assertEqual(store.row_of(content_digest(text)), row)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+"""
+Shared setup for the *_tests.py modules, which each import setUpModule from here.
+
+The caches that code reaches for by default (the word cache, the SymSpell index and the
+HTTP cache) are moved out of ~/.cache/didit for the whole test run: the word cache is kept
+in memory and the rest goes to one scratch directory, removed when the run exits. They are
+set in os.environ rather than patched per test, so worker processes and subprocesses
+started by the tests inherit them.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+_scratch = None
+
+
+def setUpModule():
+    global _scratch
+    if _scratch is None:
+        _scratch = tempfile.mkdtemp(prefix='didit-tests-')
+        atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+    os.environ.update({'DIDIT_CACHE_DIR': _scratch, 'DIDIT_WORD_CACHE': 'memory',
+                       'DIDIT_HTTP_CACHE': os.path.join(_scratch, 'http')})
+    # Caches opened before the environment was set are dropped, so they are reopened there
+    for module, name in (('cache', '_word_cache'), ('fetch', '_http_cache')):
+        if module in sys.modules:
+            setattr(sys.modules[module], name, None)
+    if 'spelling' in sys.modules:
+        sys.modules['spelling']._correctors.clear()
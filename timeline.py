@@ -1,5 +1,13 @@
 import csv
-from docarray import DocArray
+from typing import Dict, Iterator, List, NamedTuple, Optional
+import numpy as np
+
+
+# Columns of an interaction export
+COLUMNS = ('id', 'source', 'target', 'tweet_id', 'type')
+
+# Rows per RecordBatch yielded by iter_csv_batches
+DEFAULT_BATCH_ROWS = 65536
 
 class Doc:
     def __init__(self):
@@ -10,6 +18,7 @@ class Doc:
         self.type = None
 
 def import_csv_to_docarray(csv_file_path):
+    from docarray import DocArray
     docarray = DocArray()
     with open(csv_file_path, 'r', encoding='utf-8') as csv_file:
         csv_reader = csv.DictReader(csv_file)
@@ -22,3 +31,133 @@ def import_csv_to_docarray(csv_file_path):
             doc.type = row['type']
             docarray.append(doc)
     return docarray
+
+
+class RecordBatch(NamedTuple):
+    # A chunk of interaction rows, one numpy array of str objects per column. Not a fixed-width
+    # string array, which would pad every value to the longest one in the batch
+    id: np.ndarray
+    source: np.ndarray
+    target: np.ndarray
+    tweet_id: np.ndarray
+    type: np.ndarray
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.id)
+
+    def take(self, indices: np.ndarray) -> 'RecordBatch':
+        return RecordBatch(*(column[indices] for column in self))
+
+    def group_by(self, column: str = 'source') -> Iterator[tuple]:
+        # (key, RecordBatch) for every distinct value of a column, keys in sorted order
+        keys, inverse = np.unique(getattr(self, column), return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+        for index, key in enumerate(keys):
+            yield str(key), self.take(order[bounds[index]:bounds[index + 1]])
+
+    def docs(self) -> Iterator[Doc]:
+        # The rows as Doc objects, as import_csv_to_docarray builds them
+        for values in zip(*self):
+            doc = Doc()
+            doc.id, doc.source, doc.target, doc.tweet_id, doc.type = map(str, values)
+            yield doc
+
+
+def _pyarrow_batches(csv_file_path: str, batch_rows: int) -> Iterator[RecordBatch]:
+    # pyarrow parses blocks of the file on several threads while earlier blocks are consumed
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    try:
+        reader = pa_csv.open_csv(
+            csv_file_path,
+            read_options=pa_csv.ReadOptions(use_threads=True, block_size=1 << 24),
+            convert_options=pa_csv.ConvertOptions(column_types={name: pa.string() for name in COLUMNS},
+                                                   include_columns=list(COLUMNS))
+        )
+    except KeyError:
+        # A column is missing; name it the way the csv parser does
+        with open(csv_file_path, 'r', encoding='utf-8', newline='') as csv_file:
+            _require_columns(csv_file_path, next(csv.reader(csv_file), []))
+        raise
+    pending = []
+    pending_rows = 0
+    for block in reader:
+        pending.append(block)
+        pending_rows += block.num_rows
+        while pending_rows >= batch_rows:
+            table = pa.Table.from_batches(pending)
+            yield _from_arrow(table.slice(0, batch_rows))
+            rest = table.slice(batch_rows)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+    if pending_rows:
+        yield _from_arrow(pa.Table.from_batches(pending))
+
+
+def _require_columns(csv_file_path: str, header: List[str]):
+    missing = [name for name in COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"{csv_file_path} has no {', '.join(map(repr, missing))} column "
+                         f"(columns: {', '.join(header)})")
+
+
+def _from_arrow(table) -> RecordBatch:
+    return RecordBatch(*(table.column(name).to_numpy(zero_copy_only=False) for name in COLUMNS))
+
+
+def _csv_batches(csv_file_path: str, batch_rows: int) -> Iterator[RecordBatch]:
+    with open(csv_file_path, 'r', encoding='utf-8', newline='') as csv_file:
+        reader = csv.reader(csv_file)
+        header = next(reader, None)
+        if header is None:
+            return
+        _require_columns(csv_file_path, header)
+        positions = [header.index(name) for name in COLUMNS]
+        columns = [[] for _ in COLUMNS]
+        for row in reader:
+            for values, position in zip(columns, positions):
+                values.append(row[position])
+            if len(columns[0]) == batch_rows:
+                yield RecordBatch(*(np.array(values, dtype=object) for values in columns))
+                columns = [[] for _ in COLUMNS]
+        if columns[0]:
+            yield RecordBatch(*(np.array(values, dtype=object) for values in columns))
+
+
+def iter_csv_batches(csv_file_path: str, batch_rows: int = DEFAULT_BATCH_ROWS,
+                     parser: Optional[str] = None) -> Iterator[RecordBatch]:
+    """
+    Stream an interaction export as RecordBatches of at most batch_rows rows.
+
+    Only one batch (plus the parser's read-ahead) is in memory at a time, so exports of
+    any size are read in bounded memory.
+
+    Args:
+        csv_file_path (str): CSV file with at least the COLUMNS.
+        batch_rows (int): Rows per batch.
+        parser (str): 'pyarrow' for pyarrow's multithreaded parser, 'csv' for the
+            standard library; by default pyarrow when it is installed.
+    """
+    if parser is None:
+        try:
+            import pyarrow.csv  # noqa: F401
+            parser = 'pyarrow'
+        except ImportError:
+            parser = 'csv'
+    if parser == 'pyarrow':
+        return _pyarrow_batches(csv_file_path, batch_rows)
+    if parser == 'csv':
+        return _csv_batches(csv_file_path, batch_rows)
+    raise ValueError(f"Unknown CSV parser {parser!r}, expected 'pyarrow' or 'csv'")
+
+
+def count_by(csv_file_path: str, column: str = 'source', **options) -> Dict[str, int]:
+    # Rows per distinct value of a column, over the whole export; memory grows with the distinct values only
+    counts = {}
+    for batch in iter_csv_batches(csv_file_path, **options):
+        keys, key_counts = np.unique(getattr(batch, column), return_counts=True)
+        for key, count in zip(keys.tolist(), key_counts.tolist()):
+            counts[key] = counts.get(key, 0) + count
+    return counts
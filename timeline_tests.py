@@ -0,0 +1,76 @@
+import csv
+import os
+import tempfile
+import unittest
+from testing import setUpModule  # noqa: F401
+from timeline import COLUMNS, count_by, iter_csv_batches
+
+try:
+    import pyarrow  # noqa: F401
+    PARSERS = ('csv', 'pyarrow')
+except ImportError:
+    PARSERS = ('csv',)
+
+
+class CsvBatchTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'export.csv')
+        self.rows = [(str(index), f'user_{index % 3}', f'user_{index % 5}', str(1000 + index), 'retweet')
+                     for index in range(25)]
+        with open(self.path, 'w', encoding='utf-8', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(('extra',) + COLUMNS)
+            writer.writerows(('x',) + row for row in self.rows)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_batches_cover_every_row(self):
+        for parser in PARSERS:
+            batches = list(iter_csv_batches(self.path, batch_rows=10, parser=parser))
+            self.assertEqual([batch.num_rows for batch in batches], [10, 10, 5], parser)
+            rows = [row for batch in batches for row in zip(*(column.tolist() for column in batch))]
+            self.assertEqual(rows, self.rows, parser)
+
+    def test_group_by(self):
+        batch = next(iter_csv_batches(self.path, batch_rows=100, parser='csv'))
+        groups = dict(batch.group_by('source'))
+        self.assertEqual(list(groups), ['user_0', 'user_1', 'user_2'])
+        self.assertEqual(groups['user_1'].id.tolist(), [row[0] for row in self.rows if row[1] == 'user_1'])
+        self.assertEqual(count_by(self.path, 'target', batch_rows=7, parser='csv'),
+                         {f'user_{index}': 5 for index in range(5)})
+
+    def test_docs(self):
+        doc = next(next(iter_csv_batches(self.path, parser='csv')).docs())
+        self.assertEqual((doc.id, doc.source, doc.target, doc.tweet_id, doc.type), self.rows[0])
+
+    def test_missing_column_is_named(self):
+        with open(self.path, 'w', encoding='utf-8', newline='') as csv_file:
+            csv_file.write('id,source,tweet_id,type\n1,user_1,1001,retweet\n')
+
+        for parser in PARSERS:
+            with self.subTest(parser), self.assertRaisesRegex(ValueError, "'target'"):
+                list(iter_csv_batches(self.path, parser=parser))
+
+    def test_one_long_value_does_not_widen_the_column(self):
+        self.rows[3] = self.rows[3][:4] + ('quote ' * 10_000,)
+        with open(self.path, 'w', encoding='utf-8', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(COLUMNS)
+            writer.writerows(self.rows)
+
+        for parser in PARSERS:
+            with self.subTest(parser):
+                batch, = iter_csv_batches(self.path, parser=parser)
+                self.assertEqual(batch.type.tolist(), [row[4] for row in self.rows])
+                # A fixed-width array would hold 25 values of 60 000 characters
+                self.assertLess(batch.type.nbytes, 1000)
+
+    def test_unknown_parser(self):
+        with self.assertRaises(ValueError):
+            iter_csv_batches(self.path, parser='pandas')
+
+
+if __name__ == '__main__':
+    unittest.main()
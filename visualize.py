@@ -1,12 +1,9 @@
-import numpy as np
-import matplotlib.pyplot as plt
 import textwrap
-import seaborn as sns
-from typing import List
-from signature import Fingerprint
-import plotly.figure_factory as ff
-import plotly.subplots as sp
-import plotly.graph_objects as go
+from typing import List, Optional
+from signature import Fingerprint, STOPWORDS
+
+# numpy, matplotlib and plotly are imported inside the functions that draw,
+# so importing this module does not load a plotting stack
 
 # Define a function to pad character frequencies with zeros
 def pad_char_frequencies(fp, char_labels):
@@ -27,6 +24,8 @@ def display_fingerprints(fingerprints, titles=None, rows=1, cols=None, figsize=(
         title_length (int): Maximum title length before word-wrapping (default is 24).
     """
     
+    import matplotlib.pyplot as plt
+
     if cols is None:
         cols = len(fingerprints) // rows + (len(fingerprints) % rows > 0)
 
@@ -46,32 +45,128 @@ def display_fingerprints(fingerprints, titles=None, rows=1, cols=None, figsize=(
     plt.show()
 
 
-def render_heatmap(text_snippets: List[str]):
-    fingerprints = [Fingerprint.from_text(text) for text in text_snippets]
-    char_labels = list(fingerprints[0].NORMALIZED_CHARACTER_FREQUENCY.keys())
-    char_freq_matrix = np.array([pad_char_frequencies(fp, char_labels) for fp in fingerprints])
-    snippet_labels = [textwrap.wrap(text, 20) for text in text_snippets]
+# Largest matrix whose cells are labelled with their values
+ANNOTATED_CELLS = 400
 
-    # Convert Seaborn heatmap to Plotly figure
-    fig = ff.create_annotated_heatmap(
-        z=char_freq_matrix,
-        x=char_labels,
-        y=['\n'.join(label) for label in snippet_labels],
-        colorscale='YlGnBu',
-        showscale=True
-    )
+# Defaults of render_heatmap: most frequent columns shown, and rows shown before snippets are averaged in groups
+HEATMAP_TOP_K = 100
+HEATMAP_MAX_ROWS = 500
+
+
+def _row_groups(rows: int, max_rows: int):
+    # Split rows into at most max_rows consecutive groups of near-equal size
+    import numpy as np
+    return np.array_split(np.arange(rows), min(rows, max_rows))
+
+
+def render_heatmap(text_snippets: List[str], fingerprints: Optional[List[Fingerprint]] = None,
+                   table: str = 'NORMALIZED_CHARACTER_FREQUENCY', top_k: Optional[int] = HEATMAP_TOP_K,
+                   max_rows: Optional[int] = HEATMAP_MAX_ROWS):
+    """
+    Heatmap of one frequency table across many text snippets.
+
+    Columns are the union of every snippet's keys, narrowed to the top_k with the highest
+    mean frequency. Past max_rows snippets, consecutive snippets are averaged in groups,
+    one row per group. The figure is one go.Heatmap trace, which plotly.js draws as a
+    single image, and only matrices of up to ANNOTATED_CELLS cells label their values,
+    so thousands of snippets render in seconds.
+
+    Args:
+        text_snippets (list): Texts to show, one row each.
+        fingerprints (list): Their fingerprints, if already computed.
+        table (str): Frequency table to show, e.g. 'NORMALIZED_CHARACTER_FREQUENCY' or 'WORD_FREQUENCY'.
+        top_k (int): Largest number of columns, or None for all of them.
+        max_rows (int): Largest number of rows, or None for one row per snippet.
+    """
+    import numpy as np
+    import plotly.graph_objects as go
+    from matrix import FingerprintMatrix
+
+    if fingerprints is None:
+        fingerprints = Fingerprint.from_texts(text_snippets)
+    matrix = FingerprintMatrix.from_fingerprints(fingerprints)
+    values = matrix.table(table).tocsc()
+    character_table = table in FingerprintMatrix.CHARACTER_TABLES or table == 'character_delta'
+    labels = STOPWORDS if table == 'STOPWORD_FREQUENCY' else matrix.characters if character_table else matrix.words
+
+    # Keys of the shared vocabulary that this table never uses are dropped
+    columns = np.flatnonzero(values.getnnz(axis=0))
+    if top_k is not None and len(columns) > top_k:
+        mean_frequency = np.asarray(values[:, columns].mean(axis=0)).ravel()
+        # The top_k columns, in order of decreasing mean frequency
+        columns = columns[np.argsort(-mean_frequency, kind='stable')[:top_k]]
+    values = values[:, columns].toarray()
+    column_labels = [repr(labels[column])[1:-1] for column in columns]
+
+    snippet_labels = [textwrap.shorten(text, 40, placeholder='…') or '(empty)' for text in text_snippets]
+    if max_rows is not None and len(fingerprints) > max_rows:
+        groups = _row_groups(len(fingerprints), max_rows)
+        values = np.array([values[group].mean(axis=0) for group in groups])
+        row_labels = [f'snippets {group[0] + 1}–{group[-1] + 1}' for group in groups]
+    else:
+        row_labels = [f'{index + 1}. {label}' for index, label in enumerate(snippet_labels)]
 
-    # Update layout
+    heatmap = go.Heatmap(z=values, x=column_labels, y=row_labels, colorscale='YlGnBu', showscale=True)
+    if values.size <= ANNOTATED_CELLS:
+        heatmap.texttemplate = '%{z:.2f}'
+    fig = go.Figure(heatmap)
     fig.update_layout(
-        title="Heatmap of Normalized Character Frequencies",
-        xaxis_title="Character",
-        yaxis_title="Text Snippet"
+        title=f"Heatmap of {table.replace('_', ' ').title()}",
+        xaxis_title="Character" if character_table else "Word",
+        yaxis_title="Text Snippet",
+        yaxis_autorange='reversed'
     )
-    
+
+    return fig
+
+
+# Pairwise comparisons offered by render_comparison, by label
+COMPARISONS = {
+    'Character frequency (cosine)': 'CHARACTER_FREQUENCY',
+    'Word frequency (cosine)': 'WORD_FREQUENCY',
+    'Character delta (cosine)': 'character_delta',
+    'Word delta (cosine)': 'word_delta',
+    'Hashed n-grams (cosine)': 'HASHED_NGRAMS',
+    'Structural deviation (difference)': 'structural_deviation',
+}
+
+
+def render_comparison(fingerprints: List[Fingerprint], labels: List[str], comparison: str = 'CHARACTER_FREQUENCY',
+                      texts: Optional[List[str]] = None):
+    """
+    Render one N x N heatmap comparing every pair of fingerprints, computed in a single
+    vectorized pass over a FingerprintMatrix.
+
+    Args:
+        fingerprints (list): Fingerprints to compare.
+        labels (list): Axis label of each fingerprint.
+        comparison (str): A table name, for the cosine similarity of that table, or
+            'structural_deviation', for the absolute difference of structural deviations.
+        texts (list): Texts of the fingerprints, needed for the 'HASHED_NGRAMS' comparison.
+    """
+    import plotly.graph_objects as go
+    from matrix import FingerprintMatrix
+
+    matrix = FingerprintMatrix.from_fingerprints(fingerprints, texts=texts if comparison == 'HASHED_NGRAMS' else None)
+    if comparison == 'structural_deviation':
+        values, colorscale, zmin, zmax = matrix.structural_deviation_difference(), 'YlOrRd', 0.0, None
+    else:
+        values, colorscale, zmin, zmax = matrix.cosine_similarity(comparison), 'YlGnBu', 0.0, 1.0
+
+    heatmap = go.Heatmap(z=values, x=labels, y=labels, colorscale=colorscale, zmin=zmin, zmax=zmax)
+    if values.size <= ANNOTATED_CELLS:
+        # One text template for the whole trace, rather than an annotation per cell
+        heatmap.texttemplate = '%{z:.2f}'
+    fig = go.Figure(heatmap)
+    title = next((label for label, name in COMPARISONS.items() if name == comparison), comparison)
+    fig.update_layout(title=title, yaxis_autorange='reversed', height=max(400, 40 * len(labels)))
     return fig
 
 
 def visualize_fingerprint_identity(fingerprint):
+    import plotly.subplots as sp
+    import plotly.graph_objects as go
+
     character_frequency = fingerprint.CHARACTER_FREQUENCY
     word_frequency = fingerprint.WORD_FREQUENCY
     
@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from signature import Fingerprint
+from testing import setUpModule  # noqa: F401
+from visualize import render_comparison, render_heatmap
+
+
+class RenderHeatmapTests(unittest.TestCase):
+    def setUp(self):
+        self.texts = ["abc", "xyz!", "The cat sat on the mat.", "Dogs were barking at the cat!"]
+        self.fingerprints = Fingerprint.from_texts(self.texts)
+
+    def test_union_of_columns(self):
+        heatmap = render_heatmap(self.texts, self.fingerprints, top_k=None).data[0]
+        keys = set().union(*(fingerprint.NORMALIZED_CHARACTER_FREQUENCY for fingerprint in self.fingerprints))
+        self.assertEqual(set(heatmap.x), keys)
+        first, second = (fingerprint.NORMALIZED_CHARACTER_FREQUENCY for fingerprint in self.fingerprints[:2])
+        key = next(key for key in second if key not in first)
+        column = list(heatmap.x).index(key)
+        self.assertAlmostEqual(heatmap.z[1][column], second[key])
+        self.assertEqual(heatmap.z[0][column], 0)
+
+    def test_top_k_columns(self):
+        heatmap = render_heatmap(self.texts, self.fingerprints, table='WORD_FREQUENCY', top_k=2).data[0]
+        totals = {}
+        for fingerprint in self.fingerprints:
+            for word, frequency in fingerprint.WORD_FREQUENCY.items():
+                totals[word] = totals.get(word, 0) + frequency
+        self.assertEqual(list(heatmap.x), sorted(totals, key=totals.get, reverse=True)[:2])
+
+    def test_large_matrices_are_downsampled_without_annotations(self):
+        texts = self.texts * 300
+        figure = render_heatmap(texts, self.fingerprints * 300, max_rows=100)
+        heatmap = figure.data[0]
+        self.assertEqual(len(heatmap.y), 100)
+        self.assertEqual(heatmap.y[0], 'snippets 1–12')
+        self.assertIsNone(heatmap.texttemplate)
+        self.assertEqual(len(figure.layout.annotations), 0)
+        np.testing.assert_allclose(np.asarray(heatmap.z).mean(axis=0),
+                                   np.asarray(render_heatmap(self.texts, self.fingerprints).data[0].z).mean(axis=0))
+
+    def test_comparison(self):
+        heatmap = render_comparison(self.fingerprints, ['a', 'b', 'c', 'd']).data[0]
+        np.testing.assert_allclose(np.diag(heatmap.z), 1.0)
+        self.assertEqual(np.asarray(heatmap.z).shape, (4, 4))
+
+    def test_hashed_ngram_comparison(self):
+        heatmap = render_comparison(self.fingerprints, ['a', 'b', 'c', 'd'], 'HASHED_NGRAMS', self.texts).data[0]
+        z = np.asarray(heatmap.z)
+        np.testing.assert_allclose(np.diag(z), 1.0, atol=1e-6)
+        self.assertGreater(z[2, 3], z[0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()